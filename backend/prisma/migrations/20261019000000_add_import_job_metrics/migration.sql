@@ -0,0 +1,4 @@
+-- Worker-side metrics (LLM usage per call purpose/model) written by complete_job / fail_job.
+-- AlterTable
+ALTER TABLE "public"."ImportJob" ADD COLUMN IF NOT EXISTS "metrics" JSONB;
+ALTER TABLE metrobistro."ImportJob" ADD COLUMN IF NOT EXISTS "metrics" JSONB;
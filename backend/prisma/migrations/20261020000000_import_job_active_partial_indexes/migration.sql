@@ -0,0 +1,19 @@
+-- Partial indexes over active ImportJob rows only, for db.claim_next_job's two claim paths
+-- (pending work; expired-lease recovery). Finished rows are not indexed, so claim cost does
+-- not grow with history. Prisma cannot express partial indexes; they live only here.
+-- They are not in schema.prisma, so `prisma migrate dev` may generate DROP INDEX statements
+-- for them as drift: delete those lines from the generated migration before applying it.
+-- CreateIndex
+CREATE INDEX IF NOT EXISTS "ImportJob_pending_createdAt_idx"
+  ON "public"."ImportJob" ("createdAt") WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS "ImportJob_pending_userId_createdAt_idx"
+  ON "public"."ImportJob" ("userId", "createdAt") WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS "ImportJob_processing_leaseExpiresAt_idx"
+  ON "public"."ImportJob" ("leaseExpiresAt") INCLUDE ("userId") WHERE status = 'processing';
+
+CREATE INDEX IF NOT EXISTS "ImportJob_pending_createdAt_idx"
+  ON metrobistro."ImportJob" ("createdAt") WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS "ImportJob_pending_userId_createdAt_idx"
+  ON metrobistro."ImportJob" ("userId", "createdAt") WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS "ImportJob_processing_leaseExpiresAt_idx"
+  ON metrobistro."ImportJob" ("leaseExpiresAt") INCLUDE ("userId") WHERE status = 'processing';
@@ -0,0 +1,38 @@
+-- Finished ImportJob rows moved out of the hot table by workers/import/retention.py.
+-- No foreign key to User so archiving never blocks on (or cascades from) user changes.
+-- CreateTable
+CREATE TABLE IF NOT EXISTS "public"."ImportJobArchive" (
+    "id" TEXT NOT NULL,
+    "userId" TEXT NOT NULL,
+    "url" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "kind" TEXT NOT NULL,
+    "result" JSONB,
+    "metrics" JSONB,
+    "error" TEXT,
+    "savedRecipeId" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "startedAt" TIMESTAMP(3),
+    "completedAt" TIMESTAMP(3),
+    "archivedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "ImportJobArchive_pkey" PRIMARY KEY ("id")
+);
+CREATE INDEX IF NOT EXISTS "ImportJobArchive_userId_createdAt_idx" ON "public"."ImportJobArchive"("userId", "createdAt");
+
+CREATE TABLE IF NOT EXISTS metrobistro."ImportJobArchive" (
+    "id" TEXT NOT NULL,
+    "userId" TEXT NOT NULL,
+    "url" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "kind" TEXT NOT NULL,
+    "result" JSONB,
+    "metrics" JSONB,
+    "error" TEXT,
+    "savedRecipeId" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "startedAt" TIMESTAMP(3),
+    "completedAt" TIMESTAMP(3),
+    "archivedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "ImportJobArchive_pkey" PRIMARY KEY ("id")
+);
+CREATE INDEX IF NOT EXISTS "ImportJobArchive_userId_createdAt_idx" ON metrobistro."ImportJobArchive"("userId", "createdAt");
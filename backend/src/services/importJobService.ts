@@ -15,6 +15,7 @@ export interface ImportJobData {
   kind: string;
   step: string;
   result?: any;
+  metrics?: any;
   error?: string | null;
   savedRecipeId?: string | null;
   claimedAt?: Date | null;
@@ -1,36 +1,154 @@
 import base64
 import json
 import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Optional
 
 import functions_framework
 from cloudevents.http import CloudEvent
 from google.cloud import run_v2
 
 
-@functions_framework.cloud_event
-def handle(cloud_event: CloudEvent):
-    """Pub/Sub message → Cloud Run Jobs execute with JOB_ID override."""
-    data = cloud_event.data or {}
-    message = data.get("message") or {}
-    raw = message.get("data")
-    if not raw:
-        raise ValueError("Pub/Sub message missing data")
+class Deferred(RuntimeError):
+    """Raised to nack: the trigger's RETRY_POLICY_RETRY redelivers with exponential backoff."""
 
-    payload = json.loads(base64.b64decode(raw).decode("utf-8"))
+
+@dataclass
+class Decision:
+    action: str  # "run" | "defer" (nack, redelivered later) | "leave" (ack; job stays pending)
+    running: int
+    starting: int
+    ceiling: int
+    attempt: Optional[int]
+    pending: Optional[int] = None  # ImportJob rows still pending (queue depth); None = not counted
+
+    def log_line(self, job_id: str, job_name: str) -> str:
+        pending = "?" if self.pending is None else self.pending
+        return (
+            f"dispatch {self.action} ImportJob {job_id} on {job_name}: pending={pending} "
+            f"running={self.running} starting={self.starting} ceiling={self.ceiling or 'off'} "
+            f"deliveryAttempt={self.attempt}"
+        )
+
+
+def count_active(
+    executions_client: Any, job_path: str, now: float, lookback_s: float, scan_limit: int
+) -> tuple[int, int]:
+    """(running, starting) executions of job_path that have not completed.
+
+    Executions are listed newest first; the scan stops at ones created more than
+    lookback_s ago (older than any job timeout) or after scan_limit entries.
+    """
+    running = starting = 0
+    scanned = 0
+    request = run_v2.ListExecutionsRequest(parent=job_path, page_size=100)
+    for execution in executions_client.list_executions(request=request):
+        scanned += 1
+        created = execution.create_time.timestamp() if execution.create_time else now
+        if scanned > scan_limit or now - created > lookback_s:
+            break
+        if execution.completion_time:
+            continue
+        if execution.running_count:
+            running += 1
+        else:
+            starting += 1
+    return running, starting
+
+
+def count_pending(database_url: str, schema: str) -> int:
+    """Number of ImportJob rows with status 'pending' in schema (served by the partial claim index)."""
+    import psycopg
+    from psycopg import sql
+
+    # Prisma URLs may include ?schema=public which libpq/psycopg reject
+    if "?" in database_url:
+        base, query = database_url.split("?", 1)
+        keep = [
+            part
+            for part in query.split("&")
+            if part
+            and part.split("=", 1)[0].lower()
+            not in ("schema", "pgbouncer", "connection_limit", "pool_timeout")
+        ]
+        database_url = base + (("?" + "&".join(keep)) if keep else "")
+    query = sql.SQL("SELECT count(*) FROM {}.\"ImportJob\" WHERE status = 'pending'").format(
+        sql.Identifier(schema)
+    )
+    with psycopg.connect(database_url, connect_timeout=5) as conn:
+        return int(conn.execute(query).fetchone()[0])
+
+
+def decide(
+    running: int,
+    starting: int,
+    ceiling: int,
+    over_ceiling: str,
+    attempt: Optional[int],
+    pending: Optional[int] = None,
+) -> Decision:
+    """Run while fewer than ceiling executions are active (0 = no ceiling); otherwise defer or leave."""
+    if not ceiling or running + starting < ceiling:
+        action = "run"
+    else:
+        action = "leave" if over_ceiling == "leave" else "defer"
+    return Decision(action, running, starting, ceiling, attempt, pending)
+
+
+def dispatch(
+    payload: Mapping[str, Any],
+    attempt: Optional[int],
+    jobs_client: Any,
+    executions_client: Any,
+    env: Mapping[str, str],
+    pending_counter: Optional[Callable[[str], int]] = None,
+) -> Decision:
+    """Decide for one ImportJob message and start the Cloud Run execution if allowed.
+
+    Clients are passed in so the decision can be exercised with fakes exposing
+    list_executions(request=...) and run_job(request=...). pending_counter(target)
+    returns the queue depth for the log line; a failing count is logged and never
+    blocks dispatch.
+    """
     job_id = payload.get("jobId") or payload.get("job_id")
     if not job_id:
         raise ValueError(f"Missing jobId in payload: {payload!r}")
 
     target = (payload.get("target") or "prod").lower()
-    project = os.environ["GCP_PROJECT"]
-    location = os.environ["JOB_LOCATION"]
     if target in ("dev", "preview"):
-        job_name = os.environ.get("JOB_NAME_DEV") or os.environ["JOB_NAME"]
+        job_name = env.get("JOB_NAME_DEV") or env["JOB_NAME"]
     else:
-        job_name = os.environ["JOB_NAME"]
+        job_name = env["JOB_NAME"]
+    name = f"projects/{env['GCP_PROJECT']}/locations/{env['JOB_LOCATION']}/jobs/{job_name}"
 
-    client = run_v2.JobsClient()
-    name = f"projects/{project}/locations/{location}/jobs/{job_name}"
+    ceiling = int(env.get("DISPATCH_MAX_ACTIVE") or "0")
+    running = starting = 0
+    if ceiling:
+        running, starting = count_active(
+            executions_client,
+            name,
+            time.time(),
+            float(env.get("DISPATCH_LOOKBACK_SECONDS") or "3600"),
+            int(env.get("DISPATCH_SCAN_LIMIT") or "200"),
+        )
+    pending: Optional[int] = None
+    if pending_counter is not None:
+        try:
+            pending = pending_counter(target)
+        except Exception as e:  # noqa: BLE001 - queue depth is diagnostic only
+            print(f"dispatch pending count failed for target={target}: {e}")
+    decision = decide(
+        running,
+        starting,
+        ceiling,
+        (env.get("DISPATCH_OVER_CEILING") or "defer").lower(),
+        attempt,
+        pending,
+    )
+    print(decision.log_line(str(job_id), job_name))
+    if decision.action != "run":
+        return decision
 
     request = run_v2.RunJobRequest(
         name=name,
@@ -42,9 +160,54 @@ def handle(cloud_event: CloudEvent):
             ]
         ),
     )
-    operation = client.run_job(request=request)
+    operation = jobs_client.run_job(request=request)
     print(
         f"Started Cloud Run Job {job_name} for ImportJob {job_id} "
         f"(target={target}): {operation.operation.name}"
     )
-    return "ok"
+    return decision
+
+
+def pending_counter_from_env(env: Mapping[str, str]) -> Optional[Callable[[str], int]]:
+    """Counter over DATABASE_URL / DATABASE_URL_DEV (by target); None when neither is set."""
+    if not env.get("DATABASE_URL") and not env.get("DATABASE_URL_DEV"):
+        return None
+    schema = env.get("IMPORT_SCHEMA") or "public"
+
+    def counter(target: str) -> int:
+        if target in ("dev", "preview"):
+            url = env.get("DATABASE_URL_DEV") or env["DATABASE_URL"]
+        else:
+            url = env["DATABASE_URL"]
+        return count_pending(url, schema)
+
+    return counter
+
+
+_clients: Optional[tuple[run_v2.JobsClient, run_v2.ExecutionsClient]] = None
+
+
+@functions_framework.cloud_event
+def handle(cloud_event: CloudEvent):
+    """Pub/Sub message → Cloud Run Jobs execute with JOB_ID override, within DISPATCH_MAX_ACTIVE."""
+    global _clients
+    data = cloud_event.data or {}
+    message = data.get("message") or {}
+    raw = message.get("data")
+    if not raw:
+        raise ValueError("Pub/Sub message missing data")
+
+    payload = json.loads(base64.b64decode(raw).decode("utf-8"))
+    if _clients is None:
+        _clients = (run_v2.JobsClient(), run_v2.ExecutionsClient())
+    decision = dispatch(
+        payload,
+        data.get("deliveryAttempt"),
+        _clients[0],
+        _clients[1],
+        os.environ,
+        pending_counter_from_env(os.environ),
+    )
+    if decision.action == "defer":
+        raise Deferred(f"{decision.running + decision.starting} executions active (ceiling {decision.ceiling})")
+    return decision.action
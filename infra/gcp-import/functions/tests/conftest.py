@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The function's main.py is deployed flat from functions/execute_job
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "execute_job"))
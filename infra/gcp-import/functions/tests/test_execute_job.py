@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.cloud.run_v2")
+pytest.importorskip("functions_framework")
+pytest.importorskip("cloudevents")
+
+import main  # noqa: E402
+
+ENV = {
+    "GCP_PROJECT": "proj",
+    "JOB_LOCATION": "us-central1",
+    "JOB_NAME": "metrobistro-import",
+    "JOB_NAME_DEV": "metrobistro-import-dev",
+    "DISPATCH_MAX_ACTIVE": "2",
+}
+
+
+def execution(running: bool = False, done: bool = False):
+    return SimpleNamespace(
+        create_time=datetime.now(timezone.utc),
+        completion_time=datetime.now(timezone.utc) if done else None,
+        running_count=1 if running else 0,
+    )
+
+
+class FakeExecutions:
+    def __init__(self, executions):
+        self.executions = executions
+        self.parents = []
+
+    def list_executions(self, request):
+        self.parents.append(request.parent)
+        return iter(self.executions)
+
+
+class FakeJobs:
+    def __init__(self):
+        self.requests = []
+
+    def run_job(self, request):
+        self.requests.append(request)
+        return SimpleNamespace(operation=SimpleNamespace(name="operations/1"))
+
+
+def test_runs_below_ceiling(capsys):
+    jobs = FakeJobs()
+    executions = FakeExecutions([execution(running=True), execution(done=True)])
+    decision = main.dispatch({"jobId": "j1"}, 1, jobs, executions, ENV, lambda target: 7)
+
+    assert (decision.action, decision.running, decision.starting, decision.pending) == ("run", 1, 0, 7)
+    assert executions.parents == ["projects/proj/locations/us-central1/jobs/metrobistro-import"]
+    [request] = jobs.requests
+    assert request.overrides.container_overrides[0].env[0].value == "j1"
+    assert "dispatch run ImportJob j1 on metrobistro-import: pending=7 running=1 starting=0" in capsys.readouterr().out
+
+
+def test_defers_at_ceiling():
+    jobs = FakeJobs()
+    executions = FakeExecutions([execution(running=True), execution()])
+    decision = main.dispatch({"jobId": "j2", "target": "dev"}, 3, jobs, executions, ENV)
+
+    assert (decision.action, decision.running, decision.starting, decision.pending) == ("defer", 1, 1, None)
+    assert executions.parents[0].endswith("/jobs/metrobistro-import-dev")
+    assert jobs.requests == []
+    assert "pending=?" in decision.log_line("j2", "metrobistro-import-dev")
+
+
+def test_leaves_at_ceiling_when_configured():
+    jobs = FakeJobs()
+    env = {**ENV, "DISPATCH_OVER_CEILING": "leave"}
+    decision = main.dispatch({"jobId": "j3"}, None, jobs, FakeExecutions([execution(), execution()]), env)
+
+    assert decision.action == "leave"
+    assert jobs.requests == []
+
+
+def test_no_ceiling_skips_listing_and_survives_failing_counter(capsys):
+    def broken(target):
+        raise OSError("db down")
+
+    jobs = FakeJobs()
+    executions = FakeExecutions([execution(running=True)] * 5)
+    decision = main.dispatch({"jobId": "j4"}, 1, jobs, executions, {**ENV, "DISPATCH_MAX_ACTIVE": "0"}, broken)
+
+    assert (decision.action, decision.pending) == ("run", None)
+    assert executions.parents == []
+    assert len(jobs.requests) == 1
+    assert "pending count failed for target=prod: db down" in capsys.readouterr().out
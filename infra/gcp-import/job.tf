@@ -227,6 +227,25 @@ resource "google_cloudfunctions2_function" "execute_job" {
       JOB_NAME     = google_cloud_run_v2_job.import_worker.name
       JOB_NAME_DEV = google_cloud_run_v2_job.import_worker_dev.name
       JOB_LOCATION = var.region
+      # Backpressure: NVIDIA/Groq quotas cannot absorb an unbounded burst of executions
+      DISPATCH_MAX_ACTIVE   = tostring(var.dispatch_max_active)
+      DISPATCH_OVER_CEILING = var.dispatch_over_ceiling
+      # Queue depth (pending ImportJob rows) for the dispatch log line
+      IMPORT_SCHEMA = "metrobistro"
+    }
+
+    secret_environment_variables {
+      key        = "DATABASE_URL"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.database_url.secret_id
+      version    = "latest"
+    }
+
+    secret_environment_variables {
+      key        = "DATABASE_URL_DEV"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.database_url_dev.secret_id
+      version    = "latest"
     }
   }
 
@@ -241,6 +260,8 @@ resource "google_cloudfunctions2_function" "execute_job" {
     google_project_service.apis,
     google_cloud_run_v2_job_iam_member.executor_run,
     google_cloud_run_v2_job_iam_member.executor_run_dev,
+    google_secret_manager_secret_iam_member.executor_db,
+    google_secret_manager_secret_iam_member.executor_db_dev,
   ]
 }
 
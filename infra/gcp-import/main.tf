@@ -131,6 +131,19 @@ resource "google_secret_manager_secret_iam_member" "runner_db_dev" {
   member    = "serviceAccount:${google_service_account.runner.email}"
 }
 
+# execute_job reads the pending ImportJob count for its dispatch log line
+resource "google_secret_manager_secret_iam_member" "executor_db" {
+  secret_id = google_secret_manager_secret.database_url.id
+  role      = "roles/secretmanager.secretAccessor"
+  member    = "serviceAccount:${google_service_account.executor.email}"
+}
+
+resource "google_secret_manager_secret_iam_member" "executor_db_dev" {
+  secret_id = google_secret_manager_secret.database_url_dev.id
+  role      = "roles/secretmanager.secretAccessor"
+  member    = "serviceAccount:${google_service_account.executor.email}"
+}
+
 resource "google_secret_manager_secret_iam_member" "runner_nvidia" {
   secret_id = google_secret_manager_secret.nvidia_api_key.id
   role      = "roles/secretmanager.secretAccessor"
@@ -48,3 +48,15 @@ variable "job_timeout" {
   type    = string
   default = "1800s"
 }
+
+variable "dispatch_max_active" {
+  type        = number
+  description = "Max unfinished import executions per Cloud Run Job before execute_job defers (0 = no ceiling)"
+  default     = 4
+}
+
+variable "dispatch_over_ceiling" {
+  type        = string
+  description = "Over the ceiling: defer (nack; Eventarc retries with backoff) or leave (ack; job stays pending for a worker.py poller)"
+  default     = "defer"
+}
@@ -0,0 +1,123 @@
+"""Split encoded speech audio on silence into bounded chunks (parallel Whisper transcription)."""
+from __future__ import annotations
+
+import logging
+import re
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*([\d.]+)")
+_PROGRESS_TIME = re.compile(r"time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+def detect_silences(audio: bytes, timeout: float = 300) -> tuple[list[tuple[float, float]], float]:
+    """Run ffmpeg silencedetect over in-memory audio; returns (silences, decoded duration seconds)."""
+    ff = subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-nostdin",
+            "-i",
+            "pipe:0",
+            "-af",
+            "silencedetect=noise=-35dB:d=0.4",
+            "-f",
+            "null",
+            "-",
+        ],
+        input=audio,
+        capture_output=True,
+        timeout=timeout,
+    )
+    err = (ff.stderr or b"").decode("utf-8", "replace")
+    if ff.returncode != 0:
+        raise RuntimeError(f"ffmpeg silencedetect failed: {err[-500:]}")
+    starts = [max(0.0, float(x)) for x in _SILENCE_START.findall(err)]
+    ends = [float(x) for x in _SILENCE_END.findall(err)]
+    silences = list(zip(starts, ends))
+    duration = 0.0
+    for h, m, sec in _PROGRESS_TIME.findall(err):
+        duration = int(h) * 3600 + int(m) * 60 + float(sec)
+    return silences, duration
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    max_seconds: float,
+    overlap_seconds: float,
+) -> list[tuple[float, float]]:
+    """(start, end) windows no longer than max_seconds.
+
+    Each cut goes in the middle of the last silence in the second half of the window.
+    Without a usable silence the cut is hard and the next window starts overlap_seconds
+    earlier, so words split across the boundary appear in both chunks (removed on stitch).
+    The overlap is capped at half a window so every window moves the start forward.
+    """
+    if max_seconds <= 0:
+        raise ValueError(f"max_seconds must be positive, got {max_seconds}")
+    overlap_seconds = min(max(0.0, overlap_seconds), max_seconds / 2)
+    windows: list[tuple[float, float]] = []
+    start = 0.0
+    while duration - start > max_seconds:
+        limit = start + max_seconds
+        mids = [(a + b) / 2 for a, b in silences if start + max_seconds / 2 < (a + b) / 2 <= limit]
+        if mids:
+            cut = max(mids)
+            windows.append((start, cut))
+            start = cut
+        else:
+            windows.append((start, limit))
+            start = limit - overlap_seconds
+    windows.append((start, duration))
+    return windows
+
+
+def cut(audio: bytes, start: float, end: float, fmt: str, timeout: float = 120) -> bytes:
+    """Copy [start, end) out of in-memory audio without re-encoding."""
+    ff = subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-nostdin",
+            "-i",
+            "pipe:0",
+            "-ss",
+            f"{start:.3f}",
+            "-t",
+            f"{end - start:.3f}",
+            "-c",
+            "copy",
+            "-f",
+            fmt,
+            "pipe:1",
+        ],
+        input=audio,
+        capture_output=True,
+        timeout=timeout,
+    )
+    if ff.returncode != 0 or not ff.stdout:
+        raise RuntimeError(f"ffmpeg cut failed: {(ff.stderr or b'').decode('utf-8', 'replace')[:500]}")
+    return ff.stdout
+
+
+def split(
+    audio: bytes,
+    fmt: str,
+    *,
+    duration: float | None,
+    max_seconds: float,
+    overlap_seconds: float,
+) -> list[bytes]:
+    """Split audio into ≤ max_seconds chunks cut on silence (see plan_chunks)."""
+    silences, decoded = detect_silences(audio)
+    total = duration or decoded
+    windows = plan_chunks(total, silences, max_seconds, overlap_seconds)
+    logger.info(
+        "audio split duration=%.0fs silences=%d chunks=%d", total, len(silences), len(windows)
+    )
+    return [cut(audio, start, end, fmt) for start, end in windows]
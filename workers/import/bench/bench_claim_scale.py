@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Claim latency vs ImportJob history size on a local Postgres (DATABASE_URL).
+
+Creates a scratch schema with an ImportJob table, the Prisma indexes and the partial
+claim indexes from the shipped migration, then for each --sizes step grows the
+completed history (with ~1 KB result JSON per row), resets the active rows (pending
+spread over users, a few running and expired leases) and times db.claim_next_job per
+policy next to the previous single-statement OR query. Exits 1 if the median claim at
+the largest size is more than --max-ratio times the one at the smallest.
+
+    DATABASE_URL=postgresql://localhost/recipe_bench python bench/bench_claim_scale.py \
+        --sizes 0,1000000,3000000 [--claims 200] [--keep] [--out claim.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import db  # noqa: E402
+
+MIGRATION = ROOT.parent.parent / "backend/prisma/migrations/20261020000000_import_job_active_partial_indexes/migration.sql"
+
+# claim_next_job before the split into pending / lease-recovery paths
+LEGACY_CLAIM = """
+    WITH candidate AS (
+      SELECT id FROM {table}
+      WHERE status = 'pending'
+         OR (status = 'processing' AND "leaseExpiresAt" IS NOT NULL AND "leaseExpiresAt" < %(now)s)
+      ORDER BY "createdAt" ASC
+      LIMIT 1
+      FOR UPDATE SKIP LOCKED
+    )
+    UPDATE {table} j
+    SET status = 'processing', step = 'claimed', "claimedAt" = %(now)s, "claimedBy" = 'bench',
+        "leaseExpiresAt" = %(lease)s, "startedAt" = COALESCE(j."startedAt", %(now)s), "updatedAt" = %(now)s
+    FROM candidate
+    WHERE j.id = candidate.id
+    RETURNING j.id
+"""
+
+
+def create_schema(conn: Any, schema: str) -> None:
+    conn.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+    conn.execute(f'CREATE SCHEMA "{schema}"')
+    conn.execute(
+        f"""
+        CREATE TABLE "{schema}"."ImportJob" (
+          id TEXT PRIMARY KEY,
+          "userId" TEXT NOT NULL,
+          url TEXT NOT NULL,
+          status TEXT NOT NULL DEFAULT 'pending',
+          kind TEXT NOT NULL DEFAULT 'url',
+          step TEXT NOT NULL DEFAULT 'queued',
+          result JSONB,
+          metrics JSONB,
+          error TEXT,
+          "savedRecipeId" TEXT,
+          "claimedAt" TIMESTAMP(3),
+          "claimedBy" TEXT,
+          "leaseExpiresAt" TIMESTAMP(3),
+          "aiImportJobId" TEXT,
+          "aiImportKind" TEXT,
+          "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          "startedAt" TIMESTAMP(3),
+          "completedAt" TIMESTAMP(3)
+        )
+        """
+    )
+    conn.execute(f'CREATE INDEX ON "{schema}"."ImportJob" (status, "leaseExpiresAt")')
+    conn.execute(f'CREATE INDEX ON "{schema}"."ImportJob" (status, "createdAt")')
+    # The shipped partial indexes, retargeted from public to the scratch schema
+    sql = MIGRATION.read_text(encoding="utf-8").split("metrobistro.", 1)[0].rsplit(";", 1)[0] + ";"
+    conn.execute(sql.replace('"public"."ImportJob"', f'"{schema}"."ImportJob"'))
+    conn.commit()
+
+
+def grow_history(conn: Any, table: str, have: int, want: int) -> None:
+    if want <= have:
+        return
+    conn.execute(
+        f"""
+        INSERT INTO {table} (id, "userId", url, status, kind, step, result, "createdAt", "updatedAt", "completedAt")
+        SELECT 'done-' || g, 'user' || (g %% 5000), 'https://example.test/' || g,
+               CASE WHEN g %% 20 = 0 THEN 'failed' ELSE 'completed' END,
+               CASE WHEN g %% 3 = 0 THEN 'video' ELSE 'url' END, 'completed',
+               jsonb_build_object('title', 'Recipe ' || g, 'notes', repeat('x', 1000)),
+               now() - interval '1 second' * ({want} - g), now(), now()
+        FROM generate_series(%s, %s) AS g
+        """,
+        (have + 1, want),
+    )
+    conn.commit()
+    conn.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+def reset_active(conn: Any, table: str, pending: int, users: int, running: int, expired: int) -> None:
+    now = datetime.now(timezone.utc)
+    conn.execute(f"DELETE FROM {table} WHERE status IN ('pending', 'processing')")
+    conn.execute(
+        f"""
+        INSERT INTO {table} (id, "userId", url, status, kind, "createdAt")
+        SELECT 'pending-' || g, 'user' || (CASE WHEN g %% 2 = 0 THEN 0 ELSE g %% %s END),
+               'https://example.test/p' || g, 'pending', CASE WHEN g %% 4 = 0 THEN 'video' ELSE 'url' END,
+               %s + interval '1 millisecond' * g
+        FROM generate_series(1, %s) AS g
+        """,
+        (users, now, pending),
+    )
+    conn.execute(
+        f"""
+        INSERT INTO {table} (id, "userId", url, status, step, "claimedAt", "leaseExpiresAt", "createdAt")
+        SELECT 'running-' || g, 'user' || (g %% %s), 'https://example.test/r' || g, 'processing', 'extracting',
+               %s, CASE WHEN g <= %s THEN %s - interval '1 minute' ELSE %s + interval '15 minutes' END, %s
+        FROM generate_series(1, %s) AS g
+        """,
+        (users, now, expired, now, now, now, running + expired),
+    )
+    conn.commit()
+    conn.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+def time_claims(claim: Any, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        if not claim():
+            break
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3) if ordered else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="0,1000000,3000000", help="completed-history row counts")
+    parser.add_argument("--claims", type=int, default=200, help="claims timed per policy and size")
+    parser.add_argument("--pending", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--running", type=int, default=8)
+    parser.add_argument("--expired", type=int, default=20)
+    parser.add_argument("--schema", default="claim_bench")
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema afterwards")
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+    if not os.environ.get("DATABASE_URL"):
+        print("DATABASE_URL (a local scratch database) is required", file=sys.stderr)
+        return 2
+
+    os.environ["IMPORT_SCHEMA"] = args.schema
+    table = f'"{args.schema}"."ImportJob"'
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results: dict[str, dict[str, Any]] = {}
+    with db.connect() as conn:
+        create_schema(conn, args.schema)
+        have = 0
+        try:
+            for size in sizes:
+                grow_history(conn, table, have, size)
+                have = max(have, size)
+                row: dict[str, Any] = {}
+                for policy in ("fifo", "fair", "legacy"):
+                    reset_active(conn, table, args.pending, args.users, args.running, args.expired)
+                    if policy == "legacy":
+                        def claim() -> bool:
+                            now = datetime.now(timezone.utc)
+                            cur = conn.execute(
+                                LEGACY_CLAIM.format(table=table), {"now": now, "lease": now + timedelta(minutes=15)}
+                            )
+                            hit = cur.fetchone()
+                            conn.commit()
+                            return hit is not None
+                    else:
+                        os.environ["CLAIM_POLICY"] = policy
+
+                        def claim() -> bool:
+                            return db.claim_next_job("bench", 900) is not None
+                    samples = time_claims(claim, args.claims)
+                    row[policy] = {"p50Ms": _pct(samples, 0.5), "p95Ms": _pct(samples, 0.95), "n": len(samples)}
+                results[str(size)] = row
+                print(f"history={size:>9}  " + "  ".join(
+                    f"{p}: p50 {v['p50Ms']:.2f} ms p95 {v['p95Ms']:.2f} ms" for p, v in row.items()
+                ), flush=True)
+        finally:
+            if not args.keep:
+                conn.rollback()
+                conn.execute(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE')
+                conn.commit()
+
+    smallest, largest = results[str(min(sizes))], results[str(max(sizes))]
+    ratios = {
+        p: round(largest[p]["p50Ms"] / max(smallest[p]["p50Ms"], 1e-3), 2) for p in ("fifo", "fair", "legacy")
+    }
+    report = {"config": {k: v for k, v in vars(args).items() if k != "out"}, "bySize": results, "p50Ratio": ratios}
+    print(json.dumps({"p50Ratio": ratios}))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    over = [p for p in ("fifo", "fair") if ratios[p] > args.max_ratio]
+    if over:
+        print(f"claim latency grew more than {args.max_ratio}x with history: {over}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
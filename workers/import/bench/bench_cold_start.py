@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Cold-start regression check for job_main: fresh-interpreter time to import what each path needs.
+
+Scenarios run in a new `python` process each repeat (no DB or network needed):
+
+    entry  import job_main (what runs before the claim besides db)
+    claim  entry + db (psycopg) — everything before time-to-claim
+    url    claim + url_import (httpx, bs4, nvidia_client)
+    video  claim + video_import (yt-dlp, groq_client, ...)
+    eager  every worker module imported up front (previous job_main behaviour)
+
+Median wall time per scenario is checked against a budget (exit 1 when exceeded). The
+slowest modules of the url and video paths come from `-X importtime`.
+
+    python bench/bench_cold_start.py [--repeat 7] [--budget claim=400 --budget video=1500] [--out cold.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+WORKER_DIR = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "entry": "import job_main",
+    "claim": "import job_main; job_main._load('db')",
+    "url": "import job_main; job_main._load('db'); job_main._load('url_import')",
+    "video": "import job_main; job_main._load('db'); job_main._load('video_import')",
+    "eager": "import db, groq_client, nvidia_client, url_import, video_import",
+}
+# Generous defaults for a small Cloud Run instance; tighten with --budget once measured there
+DEFAULT_BUDGETS_MS = {"entry": 250, "claim": 400, "url": 900, "video": 1500}
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\| ( *)(\S+)")
+
+
+def _run(code: str, *flags: str) -> tuple[float, str]:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "0"}
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=WORKER_DIR, env=env, capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed: {proc.stderr[-800:]}")
+    return elapsed, proc.stderr
+
+
+def _slowest_imports(code: str, top: int) -> list[dict[str, Any]]:
+    """Top-level packages by cumulative import time from -X importtime."""
+    _, stderr = _run(code, "-X", "importtime")
+    rows = []
+    for self_us, cumulative_us, indent, name in _IMPORTTIME.findall(stderr):
+        if not indent:  # top-level imports only; nested ones are inside their cumulative time
+            rows.append({"module": name, "selfMs": int(self_us) / 1000, "cumulativeMs": int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda r: r["cumulativeMs"], reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--budget", action="append", default=[], help="scenario=ms (overrides default)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        name, _, ms = item.partition("=")
+        budgets[name] = float(ms)
+
+    _run("import job_main, db, url_import, video_import")  # warm .pyc so repeats measure imports, not compiles
+    baseline = statistics.median(_run("pass")[0] for _ in range(args.repeat))
+    report: dict[str, Any] = {"python": sys.version.split()[0], "interpreterMs": round(baseline, 1), "scenarios": {}}
+    over = 0
+    for name, code in SCENARIOS.items():
+        wall = statistics.median(_run(code)[0] for _ in range(args.repeat))
+        row: dict[str, Any] = {"wallMs": round(wall, 1), "importMs": round(wall - baseline, 1)}
+        if name in budgets:
+            row["budgetMs"] = budgets[name]
+            row["ok"] = wall <= budgets[name]
+            over += not row["ok"]
+        if name in ("url", "video"):
+            row["slowest"] = _slowest_imports(code, args.top)
+        report["scenarios"][name] = row
+        status = "" if "ok" not in row else (" ok" if row["ok"] else f" OVER BUDGET ({budgets[name]} ms)")
+        print(f"{name:6s} wall={row['wallMs']:7.1f} ms  imports={row['importMs']:7.1f} ms{status}")
+    eager, worst = report["scenarios"]["eager"]["wallMs"], max(
+        report["scenarios"]["url"]["wallMs"], report["scenarios"]["video"]["wallMs"]
+    )
+    print(f"lazy saving vs eager: url {eager - report['scenarios']['url']['wallMs']:.1f} ms, "
+          f"video {eager - report['scenarios']['video']['wallMs']:.1f} ms (worst path {worst:.1f} ms)")
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
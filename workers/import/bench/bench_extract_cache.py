@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Hit rate, false-match rate and lookup latency of extract_cache (content-fingerprint cache).
+
+Recipes are the URL cases of corpus/replay (their golden fields, original page.html as the
+first copy) plus --synthetic generated ones. Each recipe is rendered as the pages we see
+for one recipe: its origin site, a share link (same HTML), a syndicated copy in another
+site's template with different chrome and reader comments, the same with one step
+reworded, a print view without JSON-LD and an AMP page. The origin's fingerprint is stored; every other copy is looked up and
+should hit its own recipe. Near misses are looked up too and must not hit: the same
+recipe with scaled quantities, with one ingredient swapped, and a sibling recipe sharing
+most of its ingredients and steps. Every fingerprint goes through the same path as
+import_from_url (BeautifulSoup, JSON-LD hint + _clean_html).
+
+The same lookups are then repeated after filling the index with --entries filler
+entries, to check that latency and accuracy hold at that size.
+
+    python bench/bench_extract_cache.py [--synthetic 300] [--entries 500000] [--out cache.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import extract_cache  # noqa: E402
+import page_signals  # noqa: E402
+import url_import  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "corpus" / "replay"
+
+DISHES = ["Chicken Curry", "Beef Stew", "Banana Bread", "Tomato Soup", "Fried Rice", "Lentil Dal", "Pork Ramen",
+          "Veggie Lasagna", "Fish Tacos", "Apple Crumble", "Mushroom Risotto", "Shrimp Scampi", "Chili", "Pad Thai"]
+INGREDIENTS = [
+    ("cups", "flour"), ("tbsp", "olive oil"), ("cloves", "garlic"), ("tsp", "salt"), ("tsp", "black pepper"),
+    ("g", "butter"), ("cups", "chicken stock"), ("tbsp", "soy sauce"), ("g", "onion, diced"), ("tsp", "cumin"),
+    ("cans", "chopped tomatoes"), ("ml", "coconut milk"), ("tbsp", "brown sugar"), ("g", "rice"), ("eggs", ""),
+    ("tsp", "paprika"), ("cups", "spinach"), ("g", "carrots, sliced"), ("tbsp", "lemon juice"), ("g", "mushrooms"),
+    ("tsp", "ginger, grated"), ("cups", "milk"), ("g", "parmesan"), ("tbsp", "fresh parsley"), ("lb", "chicken thighs"),
+    ("lb", "ground beef"), ("g", "pasta"), ("tsp", "chili flakes"), ("tbsp", "honey"), ("g", "shrimp"),
+]
+STEPS = [
+    "Heat the {a} in a large pan over medium heat.", "Add the {a} and cook for {n} minutes, stirring often.",
+    "Stir in the {a} and {b} and simmer for {n} minutes.", "Whisk the {a} with the {b} until smooth.",
+    "Season with {a} and {b} to taste.", "Bake at {t}F for {n} minutes until golden.",
+    "Pour in the {a} and bring to a boil.", "Fold the {a} gently into the {b}.",
+    "Transfer to a serving dish and garnish with {a}.", "Reduce the heat and cover for {n} minutes.",
+    "Mix the {a}, {b} and a pinch of salt in a bowl.", "Roast the {a} for {n} minutes, turning once.",
+]
+COMMENTS = [
+    "I added extra garlic and baked it for 10 more minutes, perfect!", "Made this twice, my kids loved it.",
+    "Can I use almond milk instead? Stir it in at the end maybe?", "Way too salty for me, I'd reduce the soy sauce.",
+    "Served with rice and a green salad. Five stars.",
+]
+
+
+def _name(ing: tuple[str, str]) -> str:
+    return ing[1].split(",")[0] or "eggs"
+
+
+def synthetic(rng: random.Random, base: dict[str, Any] | None = None) -> dict[str, Any]:
+    """A generated recipe; with base, a sibling sharing most of its ingredients and steps."""
+    if base is None:
+        items = [(rng.choice([1, 2, 3, 4, 250, 400, 0.5]), ing) for ing in rng.sample(INGREDIENTS, rng.randint(6, 11))]
+        steps = [(tpl, rng.randint(3, 40), rng.choice([350, 375, 400, 425])) for tpl in rng.sample(STEPS, rng.randint(4, 7))]
+        title = f"{rng.choice(['Easy', 'Classic', 'Weeknight', 'Grandma’s', 'One-Pot'])} {rng.choice(DISHES)}"
+    else:
+        items = list(base["items"])
+        for i in rng.sample(range(len(items)), 2):
+            items[i] = (items[i][0], rng.choice([x for x in INGREDIENTS if x not in [it[1] for it in items]]))
+        steps = list(base["steps"])
+        steps[rng.randrange(len(steps))] = (rng.choice(STEPS), rng.randint(3, 40), 375)
+        title = base["title"]
+    return {"title": title, "items": items, "steps": steps}
+
+
+def _render_fields(recipe: dict[str, Any]) -> tuple[list[str], list[str]]:
+    if "ingredientLines" in recipe:
+        return recipe["ingredientLines"], recipe["stepLines"]
+    names = [_name(ing) for _, ing in recipe["items"]]
+    ingredients = [f"{qty:g} {ing[0]} {ing[1]}".strip() for qty, ing in recipe["items"]]
+    steps = []
+    for k, (tpl, n, t) in enumerate(recipe["steps"]):
+        steps.append(tpl.format(a=names[k % len(names)], b=names[(k + 3) % len(names)], n=n, t=t))
+    return ingredients, steps
+
+
+def _jsonld(title: str, ingredients: list[str], steps: list[str]) -> str:
+    data = {"@context": "https://schema.org", "@type": "Recipe", "name": title, "recipeIngredient": ingredients,
+            "recipeInstructions": [{"@type": "HowToStep", "text": s} for s in steps]}
+    return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+
+def render(recipe: dict[str, Any], style: str, rng: random.Random) -> str:
+    title = recipe["title"]
+    ingredients, steps = _render_fields(recipe)
+    ing_html = "".join(f"<li>{i}</li>" for i in ingredients)
+    step_html = "".join(f"<li>{s}</li>" for s in steps)
+    if style == "print":
+        return (f"<html><head><title>{title} (print)</title></head><body><h1>{title}</h1>"
+                f"<h2>Ingredients</h2><ul>{ing_html}</ul><h2>Directions</h2><ol>{step_html}</ol></body></html>")
+    if style == "amp":
+        return (f"<html amp><head><title>{title}</title>{_jsonld(title, ingredients, steps)}</head><body>"
+                f'<amp-img src="https://amp.cdn.test/{rng.randrange(10**6)}.jpg"></amp-img>'
+                f"<div class='ads'>Advertisement</div><a href='#r'>Jump to Recipe</a><h1>{title}</h1>"
+                f"<div class='wprm-recipe'><h3>Ingredients</h3><ul>{ing_html}</ul><h3>Instructions</h3>"
+                f"<ol>{step_html}</ol></div><footer>© AMP mirror</footer></body></html>")
+    site = "Tasty Syndicate" if style == "syndicated" else "Home Cook Blog"
+    intro = ("This one is a reader favourite, republished with permission." if style == "syndicated"
+             else "We make this every week; it never gets old.")
+    comments = "".join(f"<p>{c}</p>" for c in rng.sample(COMMENTS, 3)) if style == "syndicated" else ""
+    return (f"<html><head><title>{title} | {site}</title>{_jsonld(title, ingredients, steps)}</head><body>"
+            f"<nav>Home Recipes Dinner Dessert About</nav><h1>{title}</h1><p>{intro}</p>"
+            f'<img src="https://{site.replace(" ", "").lower()}.test/img/{rng.randrange(10**6)}.jpg" alt="{title}">'
+            f"<h2>Ingredients</h2><ul>{ing_html}</ul><h2>Instructions</h2><ol>{step_html}</ol>"
+            f"<aside class='sidebar'>Popular: Best Brownies, Easy Chili, Sheet Pan Salmon</aside>"
+            f"<section class='reader-notes'><h3>Reviews</h3>{comments}</section>"
+            f"<footer>Subscribe to our newsletter</footer></body></html>")
+
+
+def page_text(html: str) -> str:
+    """The text import_from_url sends to the LLM (and fingerprints)."""
+    soup = BeautifulSoup(html, "html.parser")
+    jsonld = page_signals.extract_json_ld_recipe(soup)
+    return page_signals.format_jsonld_hint(jsonld) + url_import._clean_html(soup)
+
+
+def scaled(recipe: dict[str, Any]) -> dict[str, Any]:
+    if "items" in recipe:
+        return {**recipe, "items": [(q * 2, ing) for q, ing in recipe["items"]]}
+    lines = [_scale_line(line) for line in recipe["ingredientLines"]]
+    return {**recipe, "ingredientLines": lines}
+
+
+def _scale_line(line: str) -> str:
+    head, _, rest = line.partition(" ")
+    try:
+        return f"{float(head) * 2:g} {rest}"
+    except ValueError:
+        return line
+
+
+def edited(recipe: dict[str, Any], rng: random.Random) -> dict[str, Any]:
+    """Same recipe as republished with one step reworded by an editor."""
+    ingredients, steps = _render_fields(recipe)
+    steps = list(steps)
+    i = rng.randrange(len(steps))
+    steps[i] = steps[i].rstrip(".") + rng.choice(
+        [", or until done.", " (a nonstick pan works best).", ", stirring occasionally.", "; don't rush this step."]
+    )
+    return {**recipe, "ingredientLines": ingredients, "stepLines": steps}
+
+
+def swapped(recipe: dict[str, Any], rng: random.Random) -> dict[str, Any]:
+    if "items" in recipe:
+        items = list(recipe["items"])
+        i = rng.randrange(len(items))
+        items[i] = (items[i][0], rng.choice([x for x in INGREDIENTS if x not in [it[1] for it in items]]))
+        return {**recipe, "items": items}
+    lines = list(recipe["ingredientLines"])
+    lines[len(lines) // 2] = "2 tbsp smoked paprika"
+    return {**recipe, "ingredientLines": lines}
+
+
+def corpus_recipes() -> list[dict[str, Any]]:
+    out = []
+    for case_dir in sorted(CORPUS.iterdir()):
+        case_file = case_dir / "case.json"
+        if not case_file.exists() or json.loads(case_file.read_text())["kind"] != "url":
+            continue
+        golden = json.loads((case_dir / "golden.json").read_text())
+        out.append({
+            "title": golden["title"],
+            "ingredientLines": [s for s in golden["ingredients"].splitlines() if s.strip()],
+            "stepLines": [s.split(". ", 1)[-1] for s in golden["instructions"].splitlines() if s.strip()],
+            "originHtml": (case_dir / "page.html").read_text(encoding="utf-8"),
+            "id": f"corpus:{case_dir.name}",
+        })
+    return out
+
+
+def fill(index: extract_cache.Index, entries: int, rng: random.Random) -> float:
+    """Insert entries random-signature filler rows in one transaction; returns seconds taken."""
+    started = time.perf_counter()
+    conn = sqlite3.connect(index.path)
+    now = time.time()
+    with conn:
+        start_id = (conn.execute("SELECT coalesce(max(id), 0) FROM entry").fetchone()[0]) + 1
+        rows, bands = [], []
+        for i in range(start_id, start_id + entries):
+            sig = tuple(rng.getrandbits(32) for _ in range(extract_cache.NUM_PERM))
+            rows.append((i, array("I", sig).tobytes(), "filler", "{}", f"filler:{i}", now, now - 1))
+            bands.extend((k, i) for k in extract_cache.band_keys(sig))
+            if len(rows) >= 5000:
+                conn.executemany("INSERT INTO entry VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.executemany("INSERT OR IGNORE INTO band VALUES (?, ?)", bands)
+                rows, bands = [], []
+        conn.executemany("INSERT INTO entry VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT OR IGNORE INTO band VALUES (?, ?)", bands)
+    conn.close()
+    return time.perf_counter() - started
+
+
+def evaluate(index: extract_cache.Index, probes: list[dict[str, Any]]) -> dict[str, Any]:
+    hits = dup_total = false = neg_total = 0
+    lookup_ms: list[float] = []
+    misses_by_style: dict[str, int] = {}
+    for probe in probes:
+        started = time.perf_counter()
+        hit = index.lookup(probe["fp"]) if probe["fp"] else None
+        lookup_ms.append((time.perf_counter() - started) * 1000)
+        got = hit.result.get("id") if hit else None
+        if probe["expect"]:
+            dup_total += 1
+            if got == probe["expect"]:
+                hits += 1
+            else:
+                misses_by_style[probe["style"]] = misses_by_style.get(probe["style"], 0) + 1
+            if got is not None and got != probe["expect"]:
+                false += 1
+        else:
+            neg_total += 1
+            if got is not None:
+                false += 1
+                misses_by_style[f"false:{probe['style']}"] = misses_by_style.get(f"false:{probe['style']}", 0) + 1
+    lookup_ms.sort()
+    return {
+        "duplicates": dup_total,
+        "hitRate": round(hits / max(1, dup_total), 4),
+        "nearMisses": neg_total,
+        "falseMatchRate": round(false / max(1, dup_total + neg_total), 4),
+        "missesByStyle": misses_by_style,
+        "lookupMsP50": round(statistics.median(lookup_ms), 3),
+        "lookupMsP99": round(lookup_ms[int(len(lookup_ms) * 0.99) - 1], 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", type=int, default=300, help="generated recipes besides the corpus ones")
+    parser.add_argument(
+        "--entries", type=int, default=500000, help="filler entries for the scale run (0 = skip; default = cache cap)"
+    )
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--min-hit-rate", type=float, default=0.9)
+    parser.add_argument("--max-false-match", type=float, default=0.0)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    recipes = corpus_recipes()
+    for i in range(args.synthetic):
+        recipes.append({**synthetic(rng), "id": f"synthetic:{i}"})
+
+    scratch = Path(tempfile.mkdtemp(prefix="extract-cache-bench-"))
+    try:
+        return _run(args, recipes, rng, scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _run(args: argparse.Namespace, recipes: list[dict[str, Any]], rng: random.Random, scratch: Path) -> int:
+    fingerprint_ms: list[float] = []
+
+    def fp_of(html: str) -> Any:
+        text = page_text(html)
+        started = time.perf_counter()
+        fp = extract_cache.fingerprint(text)
+        fingerprint_ms.append((time.perf_counter() - started) * 1000)
+        return fp
+
+    index = extract_cache.Index(
+        str(scratch / "cache.sqlite"), threshold=args.threshold, max_entries=args.entries + len(recipes) + 1
+    )
+    probes: list[dict[str, Any]] = []
+    unfingerprinted = 0
+    near_miss: list[tuple[str, Callable[[dict[str, Any]], dict[str, Any]]]] = [
+        ("scaled", scaled),
+        ("swapped", lambda r: swapped(r, rng)),
+    ]
+    for recipe in recipes:
+        origin = recipe.get("originHtml") or render(recipe, "origin", rng)
+        fp = fp_of(origin)
+        if fp is None:
+            unfingerprinted += 1
+            continue
+        index.store(fp, {"id": recipe["id"], "title": recipe["title"]}, f"https://origin.test/{recipe['id']}")
+        probes.append({"style": "share", "fp": fp_of(origin), "expect": recipe["id"]})
+        for style in ("syndicated", "print", "amp"):
+            probes.append({"style": style, "fp": fp_of(render(recipe, style, rng)), "expect": recipe["id"]})
+        probes.append(
+            {"style": "edited", "fp": fp_of(render(edited(recipe, rng), "syndicated", rng)), "expect": recipe["id"]}
+        )
+        for style, make in near_miss:
+            probes.append({"style": style, "fp": fp_of(render(make(recipe), "origin", rng)), "expect": None})
+        if "items" in recipe:
+            sibling = synthetic(rng, base=recipe)
+            probes.append({"style": "sibling", "fp": fp_of(render(sibling, "origin", rng)), "expect": None})
+
+    report: dict[str, Any] = {
+        "recipes": len(recipes),
+        "unfingerprinted": unfingerprinted,
+        "fingerprintMsP50": round(statistics.median(fingerprint_ms), 3),
+        "params": {"numPerm": extract_cache.NUM_PERM, "bands": extract_cache.BANDS, "threshold": args.threshold},
+        "small": {"entries": index.size(), **evaluate(index, probes)},
+    }
+    print(f"entries={report['small']['entries']:>7}  {json.dumps(report['small'])}")
+    if args.entries:
+        fill_s = fill(index, args.entries, rng)
+        report["large"] = {"entries": index.size(), "fillS": round(fill_s, 1), **evaluate(index, probes)}
+        print(f"entries={report['large']['entries']:>7}  {json.dumps(report['large'])}")
+    print(f"fingerprint p50 {report['fingerprintMsP50']} ms, {unfingerprinted} recipes too short to fingerprint")
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    worst = report.get("large") or report["small"]
+    if report["small"]["hitRate"] < args.min_hit_rate or worst["hitRate"] < args.min_hit_rate:
+        print(f"hit rate below {args.min_hit_rate}", file=sys.stderr)
+        return 1
+    if max(report["small"]["falseMatchRate"], worst["falseMatchRate"]) > args.max_false_match:
+        print(f"false-match rate above {args.max_false_match}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
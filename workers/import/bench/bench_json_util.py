@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: json_util.extract_json_object vs the previous brace-walking extractor.
+
+    python bench/bench_json_util.py [--repeat 2000] [--corpus bench/corpus/llm_outputs]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_util  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "llm_outputs"
+
+
+def _legacy_loads_lenient(blob: str) -> Optional[dict[str, Any]]:
+    try:
+        data = json.loads(blob)
+        return data if isinstance(data, dict) else None
+    except json.JSONDecodeError:
+        pass
+    fixed = re.sub(r",\s*([}\]])", r"\1", blob)
+    try:
+        data = json.loads(fixed)
+        return data if isinstance(data, dict) else None
+    except json.JSONDecodeError:
+        return None
+
+
+def legacy_extract_json_object(text: str) -> Optional[dict[str, Any]]:
+    """Baseline: the extractor json_util shipped before the raw_decode scanner."""
+    if not text:
+        return None
+    s = text.strip()
+    if s.endswith("---END---"):
+        s = s[: -len("---END---")].strip()
+    fence = re.search(r"```(?:json)?\s*([\s\S]*?)```", s, re.I)
+    if fence:
+        s = fence.group(1).strip()
+    direct = _legacy_loads_lenient(s)
+    if direct is not None:
+        return direct
+    start = s.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_str = False
+    escape = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_str:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return _legacy_loads_lenient(s[start : i + 1])
+    return None
+
+
+def load_corpus(corpus: Path) -> dict[str, str]:
+    return {p.name: p.read_text(encoding="utf-8") for p in sorted(corpus.glob("*.txt"))}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus)
+    recipe = samples.get("prose_wrapped.txt", "{}")
+    # Long reply: several paragraphs of prose and a few decoys around a large recipe object
+    long_steps = "\n".join(f"{i}. Stir and taste, adjusting seasoning as needed." for i in range(1, 150))
+    samples["synthetic_long_recipe.txt"] = (
+        ("The page describes a family recipe. " * 150)
+        + '\nExample shape: {"title": "..."}\n'
+        + recipe.replace('"instructions": "', '"instructions": "' + long_steps.replace("\n", "\\n"))
+        + "\n" + ("Serving notes follow. " * 100)
+    )
+    # Worst case for the scanner: 200 small objects it must decode before the real answer
+    samples["synthetic_many_objects.txt"] = "\n".join(
+        f'Option {i}: {{"note": "{"x" * 200}", "i": {i}}} and text {{not json}}'
+        for i in range(200)
+    ) + "\n" + recipe
+
+    report: dict[str, Any] = {"repeat": args.repeat, "samples": {}}
+    total_old = total_new = 0.0
+    for name, text in samples.items():
+        old = timeit.timeit(lambda: legacy_extract_json_object(text), number=args.repeat)
+        new = timeit.timeit(lambda: json_util.extract_json_object(text), number=args.repeat)
+        if not name.startswith("synthetic_"):
+            total_old += old
+            total_new += new
+        old_keys = sorted((legacy_extract_json_object(text) or {}).keys())
+        new_keys = sorted((json_util.extract_json_object(text) or {}).keys())
+        report["samples"][name] = {
+            "bytes": len(text.encode("utf-8")),
+            "legacy_us": round(old / args.repeat * 1e6, 2),
+            "new_us": round(new / args.repeat * 1e6, 2),
+            "legacy_keys": old_keys,
+            "new_keys": new_keys,
+        }
+    # Totals cover the corpus only; synthetic_* stress cases are reported per sample.
+    report["legacy_total_s"] = round(total_old, 4)
+    report["new_total_s"] = round(total_new, 4)
+    report["corpus_speedup"] = round(total_old / total_new, 2) if total_new else None
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
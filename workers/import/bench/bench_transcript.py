@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Prompt-token reduction of transcripts.compact over caption files.
+
+Files are corpus/captions/*.vtt|*.srt plus the subtitle tracks of the replay cases
+(corpus/replay/*/), or --corpus DIR. "before" is the previous transcript
+(video_import._subtitle_text lines, joined as sent to the LLM); "after" is the compacted
+text. Tokens are transcripts.estimate_tokens (~4 chars/token). outLines / maxLineWords
+show whether unpunctuated auto-captions were broken into sentence-sized lines.
+
+    python bench/bench_transcript.py [--corpus DIR] [--out transcript-report.json] [--show NAME]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import transcripts  # noqa: E402
+import video_import  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "corpus"
+
+
+def caption_files(corpus: Path | None) -> list[Path]:
+    if corpus is not None:
+        return sorted(p for p in corpus.iterdir() if p.suffix in (".vtt", ".srt"))
+    files = [p for p in (CORPUS / "captions").iterdir() if p.suffix in (".vtt", ".srt")]
+    files += [p for p in (CORPUS / "replay").glob("*/*") if p.suffix in (".vtt", ".srt")]
+    return sorted(files)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, help="directory of .vtt/.srt files instead of the defaults")
+    parser.add_argument("--out", type=Path)
+    parser.add_argument("--show", help="print the compacted text of this file")
+    args = parser.parse_args()
+
+    rows: dict[str, Any] = {}
+    total_before = total_after = 0
+    for path in caption_files(args.corpus):
+        before = video_import._subtitle_text(path.read_text(encoding="utf-8", errors="replace"))
+        after = transcripts.compact(before.splitlines())
+        tb, ta = transcripts.estimate_tokens(before), transcripts.estimate_tokens(after)
+        total_before += tb
+        total_after += ta
+        rows[path.name] = {
+            "lines": len(before.splitlines()),
+            "tokensBefore": tb,
+            "tokensAfter": ta,
+            "reductionPct": round(100 * (1 - ta / tb), 1) if tb else 0.0,
+            "outLines": len(after.splitlines()),
+            "maxLineWords": max((len(line.split()) for line in after.splitlines()), default=0),
+        }
+        row = rows[path.name]
+        print(
+            f"{path.name}: {tb} → {ta} tokens (-{row['reductionPct']}%), "
+            f"{row['outLines']} lines, longest {row['maxLineWords']} words"
+        )
+        if args.show == path.name:
+            print(after)
+    summary = {
+        "files": len(rows),
+        "tokensBefore": total_before,
+        "tokensAfter": total_after,
+        "reductionPct": round(100 * (1 - total_after / total_before), 1) if total_before else 0.0,
+    }
+    print(f"total: {total_before} → {total_after} tokens (-{summary['reductionPct']}%)")
+    if args.out:
+        args.out.write_text(json.dumps({"files": rows, "summary": summary}, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Wall time per video: legacy two-process yt-dlp CLI vs the in-process video_import._fetch_sources.
+
+The in-process side runs the shipping _fetch_sources (one yt-dlp session, metadata, then
+audio streamed through ffmpeg) with speculative extraction off and the Groq upload
+replaced by a no-op, so both sides stop once the audio is encoded. Needs network,
+ffmpeg and the yt-dlp CLI on PATH for the legacy side. With --metadata,
+compares only the metadata phase (video_import._metadata): eager comments (the old
+VIDEO_COMMENTS=always, 50 comments) vs adaptive comment fetching.
+
+    python bench/bench_ytdlp.py URL [URL ...] [--repeat 2] [--out ytdlp-report.json]
+    python bench/bench_ytdlp.py --metadata URL [URL ...]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scratch  # noqa: E402
+import transcripts  # noqa: E402
+import video_import  # noqa: E402
+
+
+def captions(raw: str) -> str:
+    """Subtitle body → transcript the way production parses it (video_import._subtitles_from_info)."""
+    return transcripts.compact(video_import._subtitle_text(raw).splitlines())
+
+
+def legacy_download(url: str, work_dir: Path) -> bool:
+    """Previous behaviour: metadata/subs/comments process, then a second process for audio."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    cookies = os.environ.get("YTDLP_COOKIES", "").strip()
+    cookie_args = ["--cookies", cookies] if cookies and Path(cookies).is_file() else []
+    subprocess.run(
+        ["yt-dlp", *cookie_args, "--write-info-json", "--write-auto-sub", "--write-sub",
+         "--write-comments", "--extractor-args", "youtube:max-comments=50",
+         "--sub-langs", "en.*,zh.*,es.*,en,zh,es", "--skip-download", "--convert-subs", "srt",
+         "-o", str(work_dir / "%(id)s.%(ext)s"), url],
+        capture_output=True, text=True, timeout=300,
+    )
+    if any(captions(p.read_text(encoding="utf-8", errors="replace")) for p in work_dir.glob("*.srt")):
+        return False
+    subprocess.run(
+        ["yt-dlp", *cookie_args, "-x", "--audio-format", "mp3", "--audio-quality", "5",
+         "-o", str(work_dir / "audio.%(ext)s"), url],
+        capture_output=True, text=True, timeout=600,
+    )
+    return True
+
+
+def inprocess_sources(url: str, work_dir: Path) -> bool:
+    """video_import._fetch_sources up to the Whisper upload; True if the audio path ran."""
+    os.environ["VIDEO_SPECULATIVE_EXTRACT"] = "0"
+    transcribed: list[bool] = []
+
+    def no_upload(data: bytes, filename: str, duration: float, cancel: Any = None) -> str:
+        transcribed.append(True)
+        return "(not uploaded)"
+
+    video_import._transcribe = no_upload
+    with scratch.job_scratch(work_dir, label="bench") as job_scratch:
+        video_import._fetch_sources(url, job_scratch, lambda step: None)
+    return bool(transcribed)
+
+
+def metadata_phase(url: str, work_dir: Path, comments: str, max_comments: str) -> str:
+    """Run the metadata phase under one comment policy; returns the uploader comments used."""
+    os.environ["VIDEO_COMMENTS"] = comments
+    os.environ["VIDEO_MAX_COMMENTS"] = max_comments
+    with video_import.yt_dlp.YoutubeDL(video_import._ydl_params(work_dir)) as ydl:
+        return video_import._metadata(ydl, url)[5]
+
+
+def compare_metadata(urls: list[str], repeat: int) -> dict[str, Any]:
+    report: dict[str, Any] = {}
+    for url in urls:
+        eager: list[float] = []
+        adaptive: list[float] = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(prefix="ytdlp-meta-") as tmp:
+                elapsed, eager_comments = _time(metadata_phase, url, Path(tmp), "always", "50")
+                eager.append(elapsed)
+                elapsed, adaptive_comments = _time(metadata_phase, url, Path(tmp), "adaptive", "10")
+                adaptive.append(elapsed)
+        row = {
+            "eagerS": round(statistics.median(eager), 2),
+            "adaptiveS": round(statistics.median(adaptive), 2),
+            "sameComments": eager_comments == adaptive_comments,
+        }
+        row["reductionPct"] = round(100 * (1 - row["adaptiveS"] / row["eagerS"]), 1) if row["eagerS"] else 0.0
+        report[url] = row
+        print(f"{url}: eager={row['eagerS']}s adaptive={row['adaptiveS']}s "
+              f"(-{row['reductionPct']}%) same_comments={row['sameComments']}")
+    return report
+
+
+def _time(fn: Any, *args: Any) -> tuple[float, Any]:
+    started = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - started, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--out", type=Path)
+    parser.add_argument("--metadata", action="store_true", help="metadata phase: eager vs adaptive comments")
+    args = parser.parse_args()
+
+    if args.metadata:
+        report = compare_metadata(args.urls, args.repeat)
+        if args.out:
+            args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        return 0
+
+    report: dict[str, Any] = {}
+    for url in args.urls:
+        legacy: list[float] = []
+        inproc: list[float] = []
+        audio = False
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix="ytdlp-legacy-") as tmp:
+                elapsed, audio = _time(legacy_download, url, Path(tmp))
+                legacy.append(elapsed)
+            with tempfile.TemporaryDirectory(prefix="ytdlp-inproc-") as tmp:
+                elapsed, _ = _time(inprocess_sources, url, Path(tmp))
+                inproc.append(elapsed)
+        row = {
+            "audioPath": audio,
+            "legacyS": round(statistics.median(legacy), 2),
+            "inProcessS": round(statistics.median(inproc), 2),
+        }
+        row["savedS"] = round(row["legacyS"] - row["inProcessS"], 2)
+        report[url] = row
+        print(f"{url}: legacy={row['legacyS']}s in-process={row['inProcessS']}s audio={audio}")
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
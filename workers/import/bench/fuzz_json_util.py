@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Fuzz json_util.extract_json_object with mutations of the LLM output corpus.
+
+Checks that the extractor never raises, only returns dicts (or None), and still finds the
+recipe when a valid reply is wrapped in fences, prose, markers or decoy objects.
+
+    python bench/fuzz_json_util.py [--iterations 5000] [--seed 1]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_util  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "llm_outputs"
+
+PROSE = (
+    "Sure! Here is the JSON:",
+    "I extracted the following recipe.",
+    "Note: cook time is an estimate {approx}.",
+    "Let me know if you want changes.",
+)
+DECOYS = ('{"note": "ignore me"}', '{"x": 1}', "{broken: json", "{}")
+
+
+def _wrap_fence(s: str, rng: random.Random) -> str:
+    return f"```{rng.choice(['json', 'JSON', ''])}\n{s}\n```"
+
+
+def _wrap_prose(s: str, rng: random.Random) -> str:
+    return f"{rng.choice(PROSE)}\n\n{s}\n\n{rng.choice(PROSE)}"
+
+
+def _end_marker(s: str, rng: random.Random) -> str:
+    return s + rng.choice(["\n---END---", "---END---", "\n---END---\n"])
+
+
+def _decoy(s: str, rng: random.Random) -> str:
+    return f"{rng.choice(DECOYS)}\n{s}\n{rng.choice(DECOYS)}"
+
+
+# Mutations that keep the recipe object intact: extractor must still return it.
+PRESERVING: tuple[Callable[[str, random.Random], str], ...] = (
+    _wrap_fence,
+    _wrap_prose,
+    _end_marker,
+    _decoy,
+)
+
+
+def _truncate(s: str, rng: random.Random) -> str:
+    return s[: rng.randrange(0, max(1, len(s)))]
+
+
+def _noise(s: str, rng: random.Random) -> str:
+    chars = list(s)
+    for _ in range(rng.randint(1, 8)):
+        if chars:
+            chars[rng.randrange(len(chars))] = rng.choice('{}[]",:\\\n x')
+    return "".join(chars)
+
+
+def _braces(s: str, rng: random.Random) -> str:
+    return "{" * rng.randint(1, 50) + s + "}" * rng.randint(0, 50)
+
+
+DESTRUCTIVE: tuple[Callable[[str, random.Random], str], ...] = (_truncate, _noise, _braces)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    samples = [p.read_text(encoding="utf-8") for p in sorted(args.corpus.glob("*.txt"))]
+    baselines = [json_util.extract_json_object(s) for s in samples]
+    failures = 0
+    for i in range(args.iterations):
+        idx = rng.randrange(len(samples))
+        text = samples[idx]
+        preserving = rng.random() < 0.5
+        ops = PRESERVING if preserving else DESTRUCTIVE
+        for _ in range(rng.randint(1, 3)):
+            text = rng.choice(ops)(text, rng)
+        try:
+            out = json_util.extract_json_object(text)
+        except Exception as e:  # the extractor must never raise
+            failures += 1
+            print(f"[{i}] raised {type(e).__name__}: {e}\n{text[:300]!r}")
+            continue
+        if out is not None and not isinstance(out, dict):
+            failures += 1
+            print(f"[{i}] returned {type(out).__name__}")
+        elif preserving and baselines[idx] and "title" in baselines[idx] and out != baselines[idx]:
+            failures += 1
+            print(f"[{i}] lost recipe object for sample {idx}\n{text[:300]!r}")
+    print(f"{args.iterations} iterations, {failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Queue load test on a local Postgres: claim throughput, lease recovery, duplicate processing.
+
+Applies backend/prisma/migrations in order to a disposable database (first run; Supabase
+roles and _prisma_migrations are stubbed so the RLS migrations apply to plain Postgres),
+then seeds --users users and --jobs pending ImportJob rows in --schema. --pollers threads
+run db.claim_next_job → update_step → complete_job/fail_job with a stub process_job of
+--work-ms (lognormal) and --fail-rate. With --crash-rate a poller "dies" after claiming:
+it abandons the job without finishing it and restarts under a new worker id, so the job
+is only picked up again through lease expiry (--lease-seconds). Reports claims/sec, jobs
+processed more than once while a live holder still had them, p50/p99 enqueue-to-claim
+wait, lease-recovery delay and SQL round trips per job.
+
+    DATABASE_URL=postgresql://localhost/recipe_load python bench/load_queue.py \
+        --jobs 2000 --pollers 16 --work-ms 50 --crash-rate 0.02 --lease-seconds 3 [--pool] [--out q.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import psycopg
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import db  # noqa: E402
+
+MIGRATIONS = ROOT.parent.parent / "backend/prisma/migrations"
+
+
+class CountingCursor(psycopg.Cursor):
+    """Counts statements sent; each is one client/server round trip."""
+
+    lock = threading.Lock()
+    count = 0
+
+    def execute(self, *args: Any, **kwargs: Any) -> Any:
+        with CountingCursor.lock:
+            CountingCursor.count += 1
+        return super().execute(*args, **kwargs)
+
+
+def _counting_connect(original: Any) -> Any:
+    connects = {"n": 0}
+
+    def connect() -> psycopg.Connection:
+        conn = original()
+        conn.cursor_factory = CountingCursor
+        with CountingCursor.lock:
+            connects["n"] += 1
+        return conn
+
+    connect.connects = connects  # type: ignore[attr-defined]
+    return connect
+
+
+def migrate(conn: psycopg.Connection) -> None:
+    """Apply every Prisma migration once, on a database that has never seen them."""
+    if conn.execute("SELECT to_regclass('public.\"ImportJob\"') AS t").fetchone()["t"]:
+        return
+    conn.execute(
+        """
+        DO $$ BEGIN
+          IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN CREATE ROLE anon NOLOGIN; END IF;
+          IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'authenticated') THEN CREATE ROLE authenticated NOLOGIN; END IF;
+        END $$;
+        CREATE TABLE IF NOT EXISTS public."_prisma_migrations" (id TEXT PRIMARY KEY);
+        """
+    )
+    for sql in sorted(MIGRATIONS.glob("*/migration.sql")):
+        conn.execute(sql.read_text(encoding="utf-8"))
+        print(f"applied {sql.parent.name}", flush=True)
+    conn.commit()
+
+
+def seed(conn: psycopg.Connection, schema: str, jobs: int, users: int, video_share: float) -> None:
+    table = f'"{schema}"."ImportJob"'
+    conn.execute(f"DELETE FROM {table}")
+    conn.execute(
+        f"""
+        INSERT INTO "{schema}"."User" (id, email, "oidcProvider", "oidcSub", "updatedAt")
+        SELECT 'load-user-' || g, 'load-' || g || '@example.test', 'load', 'load-' || g, now()
+        FROM generate_series(0, %s) AS g
+        ON CONFLICT DO NOTHING
+        """,
+        (users - 1,),
+    )
+    # Skewed like real traffic: half the jobs belong to one bulk importer
+    conn.execute(
+        f"""
+        INSERT INTO {table} (id, "userId", url, status, kind, step, "createdAt", "updatedAt")
+        SELECT 'load-' || g, 'load-user-' || (CASE WHEN g %% 2 = 0 THEN 0 ELSE g %% %s END),
+               'https://example.test/' || g, 'pending',
+               CASE WHEN random() < %s THEN 'video' ELSE 'url' END, 'queued', now(), now()
+        FROM generate_series(1, %s) AS g
+        """,
+        (users, video_share, jobs),
+    )
+    conn.commit()
+    conn.execute(f"ANALYZE {table}")
+    conn.commit()
+
+
+class Run:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.lock = threading.Lock()
+        self.claims: list[dict[str, Any]] = []
+        self.holder: dict[str, str] = {}  # job id → live worker holding it
+        self.abandoned: dict[str, float] = {}  # job id → when its holder crashed
+        self.recovery_s: list[float] = []
+        self.finished: dict[str, int] = defaultdict(int)
+        self.duplicates = 0
+        self.crashes = 0
+        self.claim_errors = 0
+        self.done = threading.Event()
+        self.enqueued_at = time.time()
+
+    def poller(self, index: int) -> None:
+        rng = random.Random(index)
+        worker_id = f"load-{index}-{uuid.uuid4().hex[:6]}"
+        while not self.done.is_set():
+            try:
+                job = db.claim_next_job(worker_id, self.args.lease_seconds, schema=self.args.schema)
+            except psycopg.Error:
+                with self.lock:
+                    self.claim_errors += 1
+                time.sleep(0.05)
+                continue
+            if not job:
+                time.sleep(self.args.idle_ms / 1000)
+                continue
+            job_id = job["id"]
+            now = time.time()
+            with self.lock:
+                if job_id in self.holder:
+                    self.duplicates += 1  # someone alive still owns it
+                if job_id in self.abandoned:
+                    self.recovery_s.append(now - self.abandoned.pop(job_id))
+                self.holder[job_id] = worker_id
+                # All rows are enqueued together by seed(), right before the pollers start
+                self.claims.append({"id": job_id, "waitS": now - self.enqueued_at})
+            if rng.random() < self.args.crash_rate:
+                with self.lock:
+                    self.crashes += 1
+                    self.holder.pop(job_id, None)
+                    self.abandoned[job_id] = now
+                worker_id = f"load-{index}-{uuid.uuid4().hex[:6]}"  # restarted process
+                continue
+            db.update_step(job_id, "extracting", renew_lease_seconds=self.args.lease_seconds, schema=self.args.schema)
+            time.sleep(rng.lognormvariate(0, 0.5) * self.args.work_ms / 1000)
+            if rng.random() < self.args.fail_rate:
+                db.fail_job(job_id, "simulated failure", {"load": True}, schema=self.args.schema)
+            else:
+                db.complete_job(job_id, {"title": "Load test"}, {"load": True}, schema=self.args.schema)
+            with self.lock:
+                self.holder.pop(job_id, None)
+                self.finished[job_id] += 1
+                if len(self.finished) >= self.args.jobs:
+                    self.done.set()
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3) if ordered else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--pollers", type=int, default=16)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--video-share", type=float, default=0.3)
+    parser.add_argument("--work-ms", type=float, default=50.0, help="median stub process_job time")
+    parser.add_argument("--fail-rate", type=float, default=0.02)
+    parser.add_argument("--crash-rate", type=float, default=0.02, help="claims abandoned by a crashing poller")
+    parser.add_argument("--lease-seconds", type=int, default=3)
+    parser.add_argument("--idle-ms", type=float, default=100.0, help="poller sleep after an empty claim")
+    parser.add_argument("--schema", default="metrobistro")
+    parser.add_argument("--policy", choices=("fair", "fifo"), default="fair")
+    parser.add_argument("--pool", action="store_true", help="reuse connections (db.enable_pool) like service_main")
+    parser.add_argument("--timeout-s", type=float, default=600.0)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+    if not os.environ.get("DATABASE_URL"):
+        print("DATABASE_URL (a disposable local database) is required", file=sys.stderr)
+        return 2
+
+    os.environ["CLAIM_POLICY"] = args.policy
+    with db.connect() as conn:
+        migrate(conn)
+        seed(conn, args.schema, args.jobs, args.users, args.video_share)
+
+    db.connect = _counting_connect(db.connect)
+    if args.pool:
+        db.enable_pool(args.pollers + 1)
+    run = Run(args)
+    threads = [threading.Thread(target=run.poller, args=(i,), daemon=True) for i in range(args.pollers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    finished_in_time = run.done.wait(timeout=args.timeout_s)
+    elapsed = time.perf_counter() - started
+    run.done.set()
+    for t in threads:
+        t.join(timeout=args.lease_seconds + 5)
+
+    waits = [c["waitS"] for c in run.claims]
+    report = {
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "completedAll": finished_in_time,
+        "jobsFinished": len(run.finished),
+        "elapsedS": round(elapsed, 2),
+        "claims": len(run.claims),
+        "claimsPerSec": round(len(run.claims) / elapsed, 1),
+        "jobsPerSec": round(len(run.finished) / elapsed, 1),
+        "crashes": run.crashes,
+        "duplicateProcessing": run.duplicates,
+        "finishedMoreThanOnce": sum(1 for n in run.finished.values() if n > 1),
+        "claimErrors": run.claim_errors,
+        "waitS": {"p50": _pct(waits, 0.5), "p99": _pct(waits, 0.99), "max": _pct(waits, 1.0)},
+        "leaseRecoveryS": {"n": len(run.recovery_s), "p50": _pct(run.recovery_s, 0.5), "p99": _pct(run.recovery_s, 0.99)},
+        "roundTripsPerJob": round(CountingCursor.count / max(1, len(run.finished)), 2),
+        "connectsPerJob": round(db.connect.connects["n"] / max(1, len(run.finished)), 2),
+        "finishedAt": datetime.now(timezone.utc).isoformat(),
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0 if finished_in_time and not run.duplicates else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Local load test for service_main: jobs/sec and enqueue-to-complete latency under push load.
+
+Runs the real HTTP service (JobService + handler, concurrency limit, 429 backpressure)
+on localhost. The ImportJob table is an in-memory stand-in for db with the same claim
+semantics, and process_job is replaced by a step-reporting sleep drawn around
+--work-ms (import work is not what is measured here). A publisher emulates Pub/Sub
+push: up to --push-concurrency outstanding requests, exponential backoff on non-2xx.
+
+    python bench/load_service.py --jobs 400 --concurrency 8 --work-ms 200 [--rate 30] [--out load.json]
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import types
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class MemoryJobs:
+    """In-memory ImportJob rows with the claim/complete/fail semantics of db.py."""
+
+    def __init__(self) -> None:
+        self.rows: dict[str, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.round_trips = 0
+
+    def module(self) -> types.ModuleType:
+        mod = types.ModuleType("db")
+        for name in ("enable_pool", "ping", "claim_job_by_id", "get_job", "update_step", "complete_job", "fail_job"):
+            setattr(mod, name, getattr(self, name))
+        return mod
+
+    def enqueue(self, kind: str = "url") -> str:
+        job_id = str(uuid.uuid4())
+        with self.lock:
+            self.rows[job_id] = {"id": job_id, "url": f"https://example.test/{job_id}", "kind": kind,
+                                 "status": "pending", "enqueuedAt": time.perf_counter()}
+        return job_id
+
+    def enable_pool(self, size: int) -> None:
+        pass
+
+    def ping(self) -> None:
+        pass
+
+    def claim_job_by_id(
+        self, job_id: str, worker_id: str, lease_seconds: int, schema: Optional[str] = None
+    ) -> Optional[dict[str, Any]]:
+        with self.lock:
+            self.round_trips += 1
+            row = self.rows.get(job_id)
+            now = time.perf_counter()
+            if row is None or not (row["status"] == "pending" or
+                                   (row["status"] == "processing" and row["leaseExpiresAt"] < now)):
+                return None
+            row.update(status="processing", claimedBy=worker_id, leaseExpiresAt=now + lease_seconds, claimedAt=now)
+            return dict(row)
+
+    def get_job(self, job_id: str, schema: Optional[str] = None) -> Optional[dict[str, Any]]:
+        with self.lock:
+            self.round_trips += 1
+            row = self.rows.get(job_id)
+            return dict(row) if row else None
+
+    def update_step(
+        self, job_id: str, step: str, renew_lease_seconds: Optional[int] = None, schema: Optional[str] = None
+    ) -> None:
+        with self.lock:
+            self.round_trips += 1
+            self.rows[job_id]["step"] = step
+
+    def _finish(self, job_id: str, status: str) -> None:
+        with self.lock:
+            self.round_trips += 1
+            self.rows[job_id].update(status=status, completedAt=time.perf_counter())
+
+    def complete_job(
+        self, job_id: str, result: dict[str, Any], metrics: Optional[dict[str, Any]] = None, schema: Optional[str] = None
+    ) -> None:
+        self._finish(job_id, "completed")
+
+    def fail_job(
+        self, job_id: str, error: str, metrics: Optional[dict[str, Any]] = None, schema: Optional[str] = None
+    ) -> None:
+        self._finish(job_id, "failed")
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8, help="SERVICE_CONCURRENCY")
+    parser.add_argument("--push-concurrency", type=int, default=0, help="outstanding pushes (default 2x concurrency)")
+    parser.add_argument("--work-ms", type=float, default=200.0, help="median simulated job time")
+    parser.add_argument("--fail-rate", type=float, default=0.02)
+    parser.add_argument("--rate", type=float, default=0.0, help="arrivals/sec (Poisson); 0 = one burst")
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    jobs_table = MemoryJobs()
+    sys.modules["db"] = jobs_table.module()
+    import llm_usage
+    import service_main
+
+    def fake_process_job(job: dict[str, Any]) -> None:
+        db = sys.modules["db"]
+        for step in ("fetching", "extracting"):
+            db.update_step(job["id"], step, renew_lease_seconds=900)
+        time.sleep(random.lognormvariate(0, 0.5) * args.work_ms / 1000)
+        if random.random() < args.fail_rate:
+            raise RuntimeError("simulated extraction failure")
+        db.complete_job(job["id"], {"title": "x"}, llm_usage.job_metrics(job["id"], job["url"], None))
+
+    service_main.process_job = fake_process_job
+    llm_usage.job_metrics = lambda job_id, url, usage: {}
+    service = service_main.JobService(args.concurrency, "load-test", 900)
+    server = service_main.serve(service, 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    stats = {"pushes": 0, "status": {}}
+    stats_lock = threading.Lock()
+
+    def push(job_id: str) -> None:
+        """Pub/Sub push with retry backoff until a 2xx ack."""
+        envelope = {"message": {"data": base64.b64encode(json.dumps({"jobId": job_id}).encode()).decode()},
+                    "subscription": "projects/local/subscriptions/import-jobs"}
+        backoff = 0.05
+        with httpx.Client(timeout=60.0) as client:
+            while True:
+                res = client.post(url, json=envelope)
+                with stats_lock:
+                    stats["pushes"] += 1
+                    stats["status"][res.status_code] = stats["status"].get(res.status_code, 0) + 1
+                if 200 <= res.status_code < 300:
+                    return
+                time.sleep(backoff * random.uniform(0.5, 1.5))
+                backoff = min(backoff * 2, 2.0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.push_concurrency or 2 * args.concurrency) as publisher:
+        futures = []
+        for _ in range(args.jobs):
+            futures.append(publisher.submit(push, jobs_table.enqueue()))
+            if args.rate > 0:
+                time.sleep(random.expovariate(args.rate))
+        for f in futures:
+            f.result()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    latencies = [(r["completedAt"] - r["enqueuedAt"]) * 1000 for r in jobs_table.rows.values() if "completedAt" in r]
+    report = {
+        "config": vars(args) | {"out": str(args.out) if args.out else None},
+        "jobs": args.jobs,
+        "finished": len(latencies),
+        "failed": sum(1 for r in jobs_table.rows.values() if r["status"] == "failed"),
+        "elapsedS": round(elapsed, 2),
+        "jobsPerSec": round(len(latencies) / elapsed, 2),
+        "enqueueToCompleteMs": {
+            "p50": round(_pct(latencies, 0.50), 1),
+            "p90": round(_pct(latencies, 0.90), 1),
+            "p99": round(_pct(latencies, 0.99), 1),
+            "max": round(max(latencies, default=0.0), 1),
+            "mean": round(statistics.fmean(latencies), 1) if latencies else 0.0,
+        },
+        "pushes": stats["pushes"],
+        "pushStatus": {str(k): v for k, v in sorted(stats["status"].items())},
+        "dbRoundTrips": jobs_table.round_trips,
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0 if report["finished"] == args.jobs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
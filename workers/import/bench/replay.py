@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""Offline replay benchmark for url_import.import_from_url / video_import.import_from_video.
+
+Each case under corpus/replay/<name>/ has a case.json plus saved inputs: page HTML (url
+kind) or a yt-dlp info.json, subtitle files and an optional transcript (video kind).
+NVIDIA and Groq are served by a local stub that replays llm.json with configurable
+latency; the yt-dlp session and ffmpeg are replaced by the saved files. Cases with
+audioChunks exercise chunked Whisper: the stub answers later chunks first, fails chunks
+listed in groqFailures, and the report checks the stitched transcript reached the
+extraction prompt in order. Per stage (fetch,
+parse, clean, llm, transcribe, finalize) the report has self wall time, thread CPU time,
+peak traced memory and net allocated blocks, and diffs the result against golden.json.
+
+    python bench/replay.py --out bench-report.json [--repeat 3] [--llm-latency-ms 300]
+    python bench/replay.py --update-golden   # accept current outputs as golden
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+WORKER_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "replay"
+_CHUNK_MARK = re.compile(rb"CHUNK ([\d.]+)")
+GOLDEN_FIELDS = ("title", "description", "ingredients", "instructions", "cookTime", "difficulty", "imageUrl")
+
+
+class StubState:
+    """What the stub server replays for the case currently running."""
+
+    def __init__(self) -> None:
+        self.pages: dict[str, bytes] = {}
+        self.llm: list[dict[str, Any]] = []
+        self.used: set[int] = set()
+        self.transcript = ""
+        self.chunks: list[dict[str, Any]] = []
+        self.groq_failures: dict[float, int] = {}
+        self.groq_log: list[dict[str, Any]] = []
+        self.prompts: list[str] = []
+        self.llm_latency = 0.0
+        self.groq_latency = 0.0
+        self.lock = threading.Lock()
+
+    def load_case(self, llm: list[dict[str, Any]], transcript: str, case: dict[str, Any]) -> None:
+        with self.lock:
+            self.llm = llm
+            self.used = set()
+            self.transcript = transcript
+            self.chunks = case.get("audioChunks") or []
+            self.groq_failures = {float(k): int(v) for k, v in (case.get("groqFailures") or {}).items()}
+            self.groq_log = []
+            self.prompts = []
+
+    def transcribe(self, body: bytes) -> tuple[int, str, float]:
+        """(status, text, delay) for a Whisper upload; chunk uploads carry a CHUNK <start> mark."""
+        mark = _CHUNK_MARK.search(body)
+        if mark is None or not self.chunks:
+            return 200, self.transcript, self.groq_latency
+        start = float(mark.group(1))
+        with self.lock:
+            index = min(range(len(self.chunks)), key=lambda i: abs(self.chunks[i]["start"] - start))
+            failing = self.groq_failures.get(self.chunks[index]["start"], 0) > 0
+            if failing:
+                self.groq_failures[self.chunks[index]["start"]] -= 1
+            self.groq_log.append({"chunk": index, "status": 503 if failing else 200})
+        # Later chunks answer sooner so completion order never matches chunk order
+        delay = self.groq_latency * (len(self.chunks) - index) / len(self.chunks)
+        if failing:
+            return 503, "injected failure", 0.0
+        return 200, self.chunks[index]["text"], delay
+
+    def next_llm(self, prompt: str) -> Optional[dict[str, Any]]:
+        """First unused recorded response whose `match` appears in the prompt."""
+        with self.lock:
+            self.prompts.append(prompt)
+            for i, entry in enumerate(self.llm):
+                if i in self.used:
+                    continue
+                if entry.get("match", "") in prompt:
+                    self.used.add(i)
+                    return entry
+        return None
+
+
+def make_handler(state: StubState) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+        def _send(self, status: int, body: bytes, ctype: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802
+            page = state.pages.get(self.path)
+            if page is None:
+                self._send(404, b"not found", "text/plain")
+            else:
+                self._send(200, page, "text/html; charset=utf-8")
+
+        def do_POST(self) -> None:  # noqa: N802
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path.endswith("/chat/completions"):
+                payload = json.loads(body or b"{}")
+                prompt = "".join(m.get("content", "") for m in payload.get("messages", []))
+                entry = state.next_llm(prompt)
+                if entry is None:
+                    self._send(500, b'{"error": "no recorded response matches prompt"}', "application/json")
+                    return
+                latency = entry.get("latencyMs")
+                time.sleep(latency / 1000 if latency is not None else state.llm_latency)
+                out = {
+                    "model": payload.get("model"),
+                    "choices": [{"message": {"role": "assistant", "content": entry["content"]}}],
+                    "usage": entry.get("usage") or {},
+                }
+                self._send(200, json.dumps(out).encode(), "application/json")
+            elif self.path.endswith("/audio/transcriptions"):
+                status, text, delay = state.transcribe(body)
+                time.sleep(delay)
+                self._send(status, text.encode(), "text/plain; charset=utf-8")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+    return Handler
+
+
+class StageRecorder:
+    """Nested stage timer: self wall/CPU time, peak traced memory, net allocated blocks."""
+
+    def __init__(self, memory: bool) -> None:
+        self.memory = memory
+        self.stack: list[dict[str, Any]] = []
+        self.stages: dict[str, dict[str, float]] = {}
+
+    def _row(self, stage: str) -> dict[str, float]:
+        return self.stages.setdefault(
+            stage, {"calls": 0, "wallMs": 0.0, "cpuMs": 0.0, "peakKiB": 0.0, "netBlocks": 0}
+        )
+
+    def enter(self, stage: str) -> None:
+        if self.memory:
+            if self.stack:
+                _, peak = tracemalloc.get_traced_memory()
+                self.stack[-1]["peak"] = max(self.stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+        self.stack.append(
+            {
+                "stage": stage,
+                "wall": time.perf_counter(),
+                "cpu": time.thread_time(),
+                "mem": tracemalloc.get_traced_memory()[0] if self.memory else 0,
+                "peak": 0,
+                "blocks": sys.getallocatedblocks(),
+                "child_wall": 0.0,
+                "child_cpu": 0.0,
+            }
+        )
+
+    def exit(self) -> None:
+        frame = self.stack.pop()
+        wall = time.perf_counter() - frame["wall"]
+        cpu = time.thread_time() - frame["cpu"]
+        row = self._row(frame["stage"])
+        row["calls"] += 1
+        row["wallMs"] += (wall - frame["child_wall"]) * 1000
+        row["cpuMs"] += (cpu - frame["child_cpu"]) * 1000
+        row["netBlocks"] += sys.getallocatedblocks() - frame["blocks"]
+        peak = frame["peak"]
+        if self.memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            row["peakKiB"] = max(row["peakKiB"], (peak - frame["mem"]) / 1024)
+        if self.stack:
+            parent = self.stack[-1]
+            parent["child_wall"] += wall
+            parent["child_cpu"] += cpu
+            parent["peak"] = max(parent["peak"], peak)
+
+    def wrap(self, owner: Any, attr: str, stage: str, top_level_only: bool = False) -> None:
+        fn = getattr(owner, attr)
+
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            # Background work (speculative audio, Whisper chunks) is not attributed to a stage
+            if (top_level_only and self.stack) or threading.current_thread() is not threading.main_thread():
+                return fn(*args, **kwargs)
+            self.enter(stage)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.exit()
+
+        setattr(owner, attr, wrapped)
+
+
+class _ReplayYoutubeDL:
+    """Stand-in for yt_dlp.YoutubeDL: serves the saved info.json and subtitles, writes dummy audio."""
+
+    def __init__(self, case_dir: Path, case: dict[str, Any], params: dict[str, Any]) -> None:
+        self.case_dir = case_dir
+        self.case = case
+        self.params = params
+        self.cookiejar = SimpleNamespace(get_cookie_header=lambda _url: "")
+
+    def __enter__(self) -> "_ReplayYoutubeDL":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    def extract_info(self, url: str, download: bool = False, process: bool = True) -> dict[str, Any]:
+        info = json.loads((self.case_dir / self.case["info"]).read_text(encoding="utf-8"))
+        if not process and self.params.get("getcomments"):
+            # Like the real extractors: comments come from a lazy post-extractor
+            comments = info.pop("comments", None) or []
+            info["__post_extractor"] = lambda: {"comments": comments, "comment_count": len(comments)}
+        info["requested_subtitles"] = {
+            sub: {"ext": Path(sub).suffix.lstrip("."), "data": (self.case_dir / sub).read_text(encoding="utf-8")}
+            for sub in self.case.get("subs") or []
+        }
+        info.setdefault("url", "https://media.replay.invalid/audio")
+        info.setdefault("protocol", "https")
+        return info
+
+    def add_progress_hook(self, hook: Callable[[dict], None]) -> None:
+        pass
+
+    def process_ie_result(self, info: dict[str, Any], download: bool = True) -> dict[str, Any]:
+        post_extractor = info.pop("__post_extractor", None)
+        if post_extractor:
+            info.update(post_extractor())
+        if download:
+            (Path(self.params["outtmpl"]).parent / "audio.mp3").write_bytes(b"\0" * 4096)
+        return info
+
+
+def _fake_yt_dlp(case_dir: Path, case: dict[str, Any], real: Any) -> SimpleNamespace:
+    return SimpleNamespace(
+        YoutubeDL=lambda params: _ReplayYoutubeDL(case_dir, case, params), utils=real.utils
+    )
+
+
+def _fake_ffmpeg(case: dict[str, Any]) -> Callable[..., subprocess.CompletedProcess]:
+    """Stand-in for subprocess.run in video_import/audio_chunks.
+
+    Encoding writes dummy audio to stdout; silencedetect reports the case's silences;
+    a cut writes a CHUNK <start> mark the Groq stub maps back to the chunk's text.
+    """
+    duration = float(case.get("duration") or 0)
+
+    def run(cmd: list[str], **_kwargs: Any) -> subprocess.CompletedProcess:
+        if any("silencedetect" in arg for arg in cmd):
+            lines = [
+                f"[silencedetect @ 0x0] silence_start: {a}\n[silencedetect @ 0x0] silence_end: {b} | "
+                f"silence_duration: {b - a:.3f}"
+                for a, b in case.get("silences") or []
+            ]
+            h, rem = divmod(duration, 3600)
+            m, sec = divmod(rem, 60)
+            lines.append(f"size=N/A time={int(h):02d}:{int(m):02d}:{sec:05.2f} bitrate=N/A")
+            return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr="\n".join(lines).encode())
+        if "-ss" in cmd:
+            start = cmd[cmd.index("-ss") + 1]
+            return subprocess.CompletedProcess(cmd, 0, stdout=b"OggS CHUNK " + start.encode(), stderr=b"")
+        return subprocess.CompletedProcess(cmd, 0, stdout=b"OggS" + b"\0" * 4096, stderr=b"")
+
+    return run
+
+
+def _fake_subprocess(case: dict[str, Any]) -> SimpleNamespace:
+    run = _fake_ffmpeg(case)
+
+    class Popen:
+        def __init__(self, cmd: list[str], **_kwargs: Any) -> None:
+            self.cmd = cmd
+            self.returncode: Optional[int] = None
+
+        def communicate(self, timeout: Optional[float] = None) -> tuple[bytes, bytes]:
+            done = run(self.cmd)
+            self.returncode = done.returncode
+            return done.stdout, done.stderr
+
+        def kill(self) -> None:
+            pass
+
+    return SimpleNamespace(
+        run=run, Popen=Popen, PIPE=subprocess.PIPE, TimeoutExpired=subprocess.TimeoutExpired
+    )
+
+
+def _transcript_check(state: StubState, transcript: str) -> dict[str, Any]:
+    """Did the stitched chunk transcript reach the extraction prompt intact and in order?"""
+    expected = " ".join(transcript.split())
+    prompts = [" ".join(p.split()) for p in state.prompts]
+    return {
+        "ok": any(expected in p for p in prompts),
+        "requests": len(state.groq_log),
+        "injectedFailures": sum(1 for r in state.groq_log if r["status"] != 200),
+        "arrivalOrder": [r["chunk"] for r in state.groq_log],
+    }
+
+
+def _golden_diff(result: dict[str, Any], golden: Optional[dict[str, Any]]) -> dict[str, Any]:
+    if golden is None:
+        return {"ok": None, "mismatches": {}}
+    mismatches = {
+        key: {"expected": golden.get(key), "actual": result.get(key)}
+        for key in GOLDEN_FIELDS
+        if (golden.get(key) or "") != (result.get(key) or "")
+    }
+    return {"ok": not mismatches, "mismatches": mismatches}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--out", type=Path, default=Path("bench-report.json"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--groq-latency-ms", type=float, default=0.0)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (lower overhead)")
+    parser.add_argument("--case", action="append", help="only run these case names")
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument(
+        "--video-cache", action="store_true", help="enable video_cache (fresh dir): repeats after the first are hits"
+    )
+    parser.add_argument(
+        "--extract-cache",
+        action="store_true",
+        help="enable extract_cache (fresh file): URL repeats after the first skip the LLM",
+    )
+    args = parser.parse_args()
+
+    state = StubState()
+    state.llm_latency = args.llm_latency_ms / 1000
+    state.groq_latency = args.groq_latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Point the clients at the stub before the worker modules read their env
+    os.environ["NVIDIA_BASE_URL"] = f"{base}/nvidia/v1"
+    os.environ["GROQ_BASE_URL"] = f"{base}/groq/openai/v1"
+    os.environ.setdefault("NVIDIA_API_KEY", "replay")
+    os.environ.setdefault("GROQ_API_KEY", "replay")
+    os.environ.setdefault("NVIDIA_MAX_RETRIES", "0")  # a missing recording should fail fast
+    os.environ["VIDEO_CACHE_DIR"] = tempfile.mkdtemp(prefix="replay-cache-") if args.video_cache else "off"
+    os.environ["EXTRACT_CACHE_PATH"] = (
+        str(Path(tempfile.mkdtemp(prefix="replay-extract-")) / "cache.sqlite") if args.extract_cache else "off"
+    )
+    sys.path.insert(0, str(WORKER_DIR))
+    import audio_chunks
+    import nvidia_client
+    import page_signals
+    import transcripts
+    import url_import
+    import video_cache
+    import video_import
+
+    real_yt_dlp = video_import.yt_dlp
+    recorder = StageRecorder(memory=not args.no_memory)
+    recorder.wrap(url_import, "_fetch_html", "fetch")
+    recorder.wrap(url_import, "BeautifulSoup", "parse", top_level_only=True)
+    for name in ("extract_json_ld_recipe", "extract_cook_time_from_text", "collect_image_candidates",
+                 "select_best_image", "format_jsonld_hint"):
+        recorder.wrap(page_signals, name, "parse")
+    recorder.wrap(url_import, "_clean_html", "clean")
+    recorder.wrap(video_cache, "video_key", "parse")
+    recorder.wrap(video_import, "_metadata", "fetch")
+    recorder.wrap(video_import, "_audio", "fetch")
+    # Subtitle tracks are parsed and compacted inside _metadata (fetch), as in production
+    recorder.wrap(video_import, "_subtitle_text", "parse")
+    recorder.wrap(transcripts, "compact", "parse")
+    recorder.wrap(video_import, "_comments_from_same_user", "parse")
+    recorder.wrap(video_import, "_transcribe", "transcribe")
+    recorder.wrap(nvidia_client, "chat", "llm")
+    recorder.wrap(nvidia_client, "_finalize_recipe", "finalize")
+    recorder.wrap(nvidia_client, "_number_instructions", "finalize")
+
+    case_dirs = sorted(p for p in args.corpus.iterdir() if (p / "case.json").is_file())
+    if args.case:
+        case_dirs = [p for p in case_dirs if p.name in args.case]
+    if recorder.memory:
+        tracemalloc.start()
+
+    report: dict[str, Any] = {
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "repeat": args.repeat,
+            "llmLatencyMs": args.llm_latency_ms,
+            "groqLatencyMs": args.groq_latency_ms,
+            "tracemalloc": recorder.memory,
+            "videoCache": args.video_cache,
+            "extractCache": args.extract_cache,
+            "python": sys.version.split()[0],
+        },
+        "cases": {},
+    }
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        for case_dir in case_dirs:
+            case = json.loads((case_dir / "case.json").read_text(encoding="utf-8"))
+            llm = json.loads((case_dir / case["llm"]).read_text(encoding="utf-8"))
+            transcript = (
+                (case_dir / case["transcript"]).read_text(encoding="utf-8") if case.get("transcript") else ""
+            )
+            golden_path = case_dir / "golden.json"
+            golden = json.loads(golden_path.read_text(encoding="utf-8")) if golden_path.is_file() else None
+            runs: list[dict[str, Any]] = []
+            result: dict[str, Any] = {}
+            error = None
+            chunk_check = None
+            for _ in range(max(1, args.repeat)):
+                state.load_case(llm, transcript, case)
+                recorder.stages = {}
+                started = time.perf_counter()
+                try:
+                    if case["kind"] == "video":
+                        video_import.yt_dlp = _fake_yt_dlp(case_dir, case, real_yt_dlp)
+                        video_import.subprocess = _fake_subprocess(case)
+                        audio_chunks.subprocess = _fake_subprocess(case)
+                        result = video_import.import_from_video(case["url"], Path(tmp), lambda _s: None)
+                    else:
+                        path = f"/page/{case_dir.name}"
+                        state.pages[path] = (case_dir / case["page"]).read_bytes()
+                        result = _import_url(url_import, f"{base}{path}", case["url"])
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    break
+                finally:
+                    video_import.yt_dlp = real_yt_dlp
+                    video_import.subprocess = subprocess
+                    audio_chunks.subprocess = subprocess
+                total_ms = (time.perf_counter() - started) * 1000
+                if case.get("audioChunks") and chunk_check is None:
+                    chunk_check = _transcript_check(state, transcript)
+                runs.append({"totalMs": total_ms, "stages": recorder.stages})
+
+            entry: dict[str, Any] = {"kind": case["kind"], "url": case["url"]}
+            if error:
+                failures += 1
+                entry["error"] = error
+            else:
+                entry["totalMs"] = round(statistics.median(r["totalMs"] for r in runs), 2)
+                entry["stages"] = _median_stages(runs)
+                entry["golden"] = _golden_diff(result, golden)
+                if entry["golden"]["ok"] is False:
+                    failures += 1
+                if chunk_check is not None:
+                    entry["chunkedTranscript"] = chunk_check
+                    if not chunk_check["ok"]:
+                        failures += 1
+                if args.update_golden:
+                    golden_path.write_text(
+                        json.dumps({k: result.get(k, "") for k in GOLDEN_FIELDS}, indent=2, ensure_ascii=False)
+                        + "\n",
+                        encoding="utf-8",
+                    )
+            report["cases"][case_dir.name] = entry
+            print(f"{case_dir.name}: {entry.get('totalMs', '-')} ms "
+                  f"golden={entry.get('golden', {}).get('ok')} {entry.get('error', '')}")
+
+    server.shutdown()
+    report["summary"] = _summary(report["cases"])
+    args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"wrote {args.out}")
+    return 1 if failures else 0
+
+
+def _import_url(url_import: Any, fetch_url: str, original_url: str) -> dict[str, Any]:
+    """Run import_from_url fetching from the stub while relative URLs resolve against the original."""
+    real_fetch = url_import._fetch_html
+
+    def fetch(_url: str) -> str:
+        return real_fetch(fetch_url)
+
+    url_import._fetch_html = fetch
+    try:
+        return url_import.import_from_url(original_url, lambda _s: None)
+    finally:
+        url_import._fetch_html = real_fetch
+
+
+def _median_stages(runs: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    out: dict[str, dict[str, float]] = {}
+    for stage in sorted({s for r in runs for s in r["stages"]}):
+        rows = [r["stages"].get(stage) for r in runs if stage in r["stages"]]
+        out[stage] = {
+            key: round(statistics.median(row[key] for row in rows), 3)
+            for key in ("calls", "wallMs", "cpuMs", "peakKiB", "netBlocks")
+        }
+    return out
+
+
+def _summary(cases: dict[str, Any]) -> dict[str, Any]:
+    stages: dict[str, dict[str, float]] = {}
+    for entry in cases.values():
+        for stage, row in (entry.get("stages") or {}).items():
+            agg = stages.setdefault(stage, {"wallMs": 0.0, "cpuMs": 0.0, "peakKiB": 0.0})
+            agg["wallMs"] = round(agg["wallMs"] + row["wallMs"], 3)
+            agg["cpuMs"] = round(agg["cpuMs"] + row["cpuMs"], 3)
+            agg["peakKiB"] = max(agg["peakKiB"], row["peakKiB"])
+    return {
+        "cases": len(cases),
+        "errors": sum(1 for e in cases.values() if e.get("error")),
+        "goldenMismatches": sum(1 for e in cases.values() if (e.get("golden") or {}).get("ok") is False),
+        "totalMs": round(sum(e.get("totalMs", 0) for e in cases.values()), 2),
+        "stages": stages,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Simulate claim policies (db.claim_next_job) and report per-user queue wait times.
+
+Discrete-event model of POLL workers claiming ImportJob rows: one bulk user enqueues
+--bulk jobs at t=0 while --users other users each submit a couple of imports at random
+times. The ranking mirrors the SQL in db._pending_candidate_sql (fifo; fair = in-flight +
+position in the user's queue, USER_MAX_IN_FLIGHT cap, optional URL-first), so policies
+can be compared without a database.
+
+    python bench/sim_fair_claim.py [--workers 4] [--bulk 500] [--users 40] [--cap 2] [--out sim.json]
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import random
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+
+@dataclass
+class Job:
+    id: int
+    user: str
+    kind: str
+    created: float
+    duration: float
+    started: Optional[float] = None
+
+
+@dataclass(order=True)
+class Event:
+    at: float
+    seq: int
+    kind: str = field(compare=False)
+    job: Optional[Job] = field(compare=False, default=None)
+
+
+def workload(args: argparse.Namespace, rng: random.Random) -> list[Job]:
+    def duration(kind: str) -> float:
+        mean = args.video_s if kind == "video" else args.url_s
+        return rng.lognormvariate(0, 0.5) * mean
+
+    jobs: list[Job] = []
+    for _ in range(args.bulk):
+        kind = "video" if rng.random() < args.video_share else "url"
+        jobs.append(Job(len(jobs), "bulk", kind, 0.0, duration(kind)))
+    for u in range(args.users):
+        t = rng.uniform(0, args.horizon_s)
+        for _ in range(rng.choice((1, 1, 2, 3))):
+            kind = "video" if rng.random() < args.video_share else "url"
+            jobs.append(Job(len(jobs), f"user{u}", kind, t, duration(kind)))
+            t += rng.expovariate(1 / 30)
+    return jobs
+
+
+def pick(queue: list[Job], running: dict[str, int], policy: str, cap: int, url_first: bool) -> Optional[Job]:
+    """The job claim_next_job would return for this queue state."""
+    if not queue:
+        return None
+    if policy == "fifo":
+        return min(queue, key=lambda j: (j.created, j.id))
+    kind_rank = (lambda j: 1 if j.kind == "video" else 0) if url_first else (lambda j: 0)
+    per_user: dict[str, list[Job]] = {}
+    for job in queue:
+        per_user.setdefault(job.user, []).append(job)
+    best: Optional[tuple[Any, ...]] = None
+    for user, jobs in per_user.items():
+        n = running.get(user, 0)
+        if cap and n >= cap:
+            continue
+        jobs.sort(key=lambda j: (kind_rank(j), j.created, j.id))
+        for pos, job in enumerate(jobs, start=1):
+            key = (n + pos, kind_rank(job), job.created, job.id)
+            if best is None or key < best[0]:
+                best = (key, job)
+    return best[1] if best else None
+
+
+def simulate(jobs: list[Job], workers: int, policy: str, cap: int, url_first: bool) -> list[Job]:
+    jobs = [Job(j.id, j.user, j.kind, j.created, j.duration) for j in jobs]
+    events: list[Event] = []
+    seq = 0
+    for job in jobs:
+        heapq.heappush(events, Event(job.created, seq, "arrive", job))
+        seq += 1
+    queue: list[Job] = []
+    running: dict[str, int] = {}
+    idle = workers
+    while events:
+        ev = heapq.heappop(events)
+        now = ev.at
+        if ev.kind == "arrive":
+            queue.append(ev.job)
+        else:
+            running[ev.job.user] -= 1
+            idle += 1
+        while idle:
+            job = pick(queue, running, policy, cap, url_first)
+            if job is None:
+                break
+            queue.remove(job)
+            job.started = now
+            running[job.user] = running.get(job.user, 0) + 1
+            idle -= 1
+            heapq.heappush(events, Event(now + job.duration, seq, "done", job))
+            seq += 1
+    return jobs
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1) if ordered else 0.0
+
+
+def summarize(jobs: list[Job]) -> dict[str, Any]:
+    groups: dict[str, list[float]] = {"bulk": [], "others": [], "othersUrl": [], "othersVideo": []}
+    for job in jobs:
+        wait = (job.started or 0.0) - job.created
+        if job.user == "bulk":
+            groups["bulk"].append(wait)
+        else:
+            groups["others"].append(wait)
+            groups["othersVideo" if job.kind == "video" else "othersUrl"].append(wait)
+    per_user_worst = {}
+    for job in jobs:
+        if job.user != "bulk":
+            per_user_worst[job.user] = max(per_user_worst.get(job.user, 0.0), (job.started or 0.0) - job.created)
+    return {
+        "makespanS": round(max((j.started or 0) + j.duration for j in jobs), 1),
+        "waitS": {
+            name: {"n": len(v), "p50": _pct(v, 0.5), "p90": _pct(v, 0.9), "p99": _pct(v, 0.99), "max": _pct(v, 1.0)}
+            for name, v in groups.items()
+        },
+        "othersWorstPerUserS": {"p50": _pct(list(per_user_worst.values()), 0.5),
+                                "max": _pct(list(per_user_worst.values()), 1.0)},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--bulk", type=int, default=500, help="jobs the bulk user enqueues at t=0")
+    parser.add_argument("--users", type=int, default=40, help="other users, 1-3 imports each")
+    parser.add_argument("--horizon-s", type=float, default=3600.0, help="other users arrive within this window")
+    parser.add_argument("--url-s", type=float, default=25.0, help="mean URL job time")
+    parser.add_argument("--video-s", type=float, default=120.0, help="mean video job time")
+    parser.add_argument("--video-share", type=float, default=0.3)
+    parser.add_argument("--cap", type=int, default=2, help="USER_MAX_IN_FLIGHT for the fair policies")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    jobs = workload(args, random.Random(args.seed))
+    scenarios = {
+        "fifo": ("fifo", 0, False),
+        "fair": ("fair", 0, False),
+        f"fair cap={args.cap}": ("fair", args.cap, False),
+        f"fair cap={args.cap} url-first": ("fair", args.cap, True),
+    }
+    report: dict[str, Any] = {"config": {k: v for k, v in vars(args).items() if k != "out"}, "jobs": len(jobs)}
+    print(f"{'policy':<26} {'bulk p50':>9} {'others p50':>11} {'p90':>7} {'p99':>7} {'max':>7} {'url p99':>8} {'video p99':>10} {'makespan':>9}")
+    for name, (policy, cap, url_first) in scenarios.items():
+        summary = summarize(simulate(jobs, args.workers, policy, cap, url_first))
+        report[name] = summary
+        w = summary["waitS"]
+        print(
+            f"{name:<26} {w['bulk']['p50']:>9} {w['others']['p50']:>11} {w['others']['p90']:>7} {w['others']['p99']:>7} "
+            f"{w['others']['max']:>7} {w['othersUrl']['p99']:>8} {w['othersVideo']['p99']:>10} {summary['makespanS']:>9}"
+        )
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,23 @@ from __future__ import annotations
 
 import json
 import os
+import queue
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 import psycopg
 from psycopg.rows import dict_row
 
 
-def _import_job_table() -> str:
-    schema = (os.environ.get("IMPORT_SCHEMA") or "public").strip() or "public"
+def default_schema() -> str:
+    return (os.environ.get("IMPORT_SCHEMA") or "public").strip() or "public"
+
+
+def _import_job_table(schema: Optional[str] = None) -> str:
     # Always schema-qualify so Cloud Run Dev (metrobistro) and Prod (public) both work.
-    return f'"{schema}"."ImportJob"'
+    return f'"{schema or default_schema()}"."ImportJob"'
 
 
 def connect() -> psycopg.Connection:
@@ -31,49 +37,183 @@ def connect() -> psycopg.Connection:
     return psycopg.connect(url, row_factory=dict_row)
 
 
-def claim_next_job(worker_id: str, lease_seconds: int) -> Optional[dict[str, Any]]:
-    """Atomically claim oldest pending job, or an expired processing lease."""
-    table = _import_job_table()
-    now = datetime.now(timezone.utc)
-    lease = now + timedelta(seconds=lease_seconds)
-    with connect() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""
+# Idle connections kept for reuse by a long-running process (see enable_pool); None = connect per call
+_pool: Optional["queue.LifoQueue[tuple[psycopg.Connection, float]]"] = None
+
+
+def enable_pool(size: int) -> None:
+    """Reuse up to size idle connections across calls instead of connecting per call."""
+    global _pool
+    _pool = queue.LifoQueue(maxsize=max(1, size))
+
+
+@contextmanager
+def _connection() -> Iterator[psycopg.Connection]:
+    if _pool is None:
+        with connect() as conn:
+            yield conn
+        return
+    max_idle = float(os.environ.get("DB_POOL_MAX_IDLE_SECONDS", "60"))
+    conn = None
+    while conn is None:
+        try:
+            candidate, last_used = _pool.get_nowait()
+        except queue.Empty:
+            conn = connect()
+            break
+        # Poolers drop idle server connections; don't hand out one that may be dead
+        if candidate.closed or candidate.broken or time.monotonic() - last_used > max_idle:
+            candidate.close()
+        else:
+            conn = candidate
+    ok = False
+    try:
+        yield conn
+        ok = True
+    finally:
+        reusable = ok and not conn.closed and not conn.broken
+        if reusable and conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+            try:
+                conn.rollback()  # read-only callers (get_job) leave a transaction open
+            except psycopg.Error:
+                reusable = False
+        if not reusable:
+            conn.close()
+        else:
+            try:
+                _pool.put_nowait((conn, time.monotonic()))
+            except queue.Full:
+                conn.close()
+
+
+def ping() -> None:
+    """Round trip on a (pooled) connection; opens the pool's first connection early."""
+    with _connection() as conn:
+        conn.execute("SELECT 1")
+
+
+# Each claim path reads only its own status, so Postgres can use the partial indexes
+# (ImportJob_pending_*_idx, ImportJob_processing_leaseExpiresAt_idx) instead of scanning history;
+# an `OR` across both statuses cannot use either index.
+_EXPIRED_CANDIDATE = """
+                WITH candidate AS (
+                  SELECT id FROM {table}
+                  WHERE status = 'processing' AND "leaseExpiresAt" < %(now)s
+                  ORDER BY "leaseExpiresAt"
+                  LIMIT 1
+                  FOR UPDATE SKIP LOCKED
+                )"""
+
+
+def _pending_candidate_sql(table: str) -> str:
+    """CTEs ending in `candidate`: the pending job to take under CLAIM_POLICY.
+
+    fifo: oldest pending job. fair (default): each pending job is ranked by its
+    user's unexpired in-flight jobs + its position in that user's queue, lowest rank
+    first and oldest on ties. Every user's first waiting job therefore goes before
+    anyone's second, and a user already running jobs waits behind users who are not.
+    Users at USER_MAX_IN_FLIGHT running jobs are skipped (0 = no cap; concurrent
+    claimers read the count without locking it, so each may overshoot it by one).
+    CLAIM_URL_FIRST=1 puts a user's URL jobs ahead of their own videos and lets URL
+    jobs win rank ties. Only pending/processing rows are read, never finished ones.
+    """
+    policy = (os.environ.get("CLAIM_POLICY") or "fair").strip().lower()
+    if policy == "fifo":
+        return f"""
                 WITH candidate AS (
                   SELECT id FROM {table}
                   WHERE status = 'pending'
-                     OR (status = 'processing' AND "leaseExpiresAt" IS NOT NULL AND "leaseExpiresAt" < %s)
                   ORDER BY "createdAt" ASC
                   LIMIT 1
                   FOR UPDATE SKIP LOCKED
-                )
+                )"""
+    url_first = (os.environ.get("CLAIM_URL_FIRST") or "").strip().lower() in ("1", "true", "yes")
+    kind_order = "CASE WHEN {t}.kind = 'video' THEN 1 ELSE 0 END, " if url_first else ""
+    return f"""
+                WITH busy AS (
+                  SELECT "userId", count(*) AS running FROM {table}
+                  WHERE status = 'processing' AND "leaseExpiresAt" >= %(now)s
+                  GROUP BY "userId"
+                ),
+                queued AS (
+                  SELECT q.id, q.kind, q."createdAt", COALESCE(b.running, 0) AS running,
+                         row_number() OVER (PARTITION BY q."userId" ORDER BY {kind_order.format(t="q")}q."createdAt") AS pos
+                  FROM {table} q
+                  LEFT JOIN busy b ON b."userId" = q."userId"
+                  WHERE q.status = 'pending'
+                ),
+                candidate AS (
+                  SELECT j.id FROM {table} j
+                  JOIN queued ON queued.id = j.id
+                  WHERE (%(user_cap)s = 0 OR queued.running < %(user_cap)s)
+                    AND j.status = 'pending'
+                  ORDER BY queued.running + queued.pos, {kind_order.format(t="queued")}queued."createdAt"
+                  LIMIT 1
+                  FOR UPDATE OF j SKIP LOCKED
+                )"""
+
+
+def _claim(
+    conn: psycopg.Connection, table: str, candidate_sql: str, params: dict[str, Any]
+) -> Optional[dict[str, Any]]:
+    with conn.cursor() as cur:
+        cur.execute(
+            candidate_sql
+            + f"""
                 UPDATE {table} j
                 SET status = 'processing',
                     step = 'claimed',
-                    "claimedAt" = %s,
-                    "claimedBy" = %s,
-                    "leaseExpiresAt" = %s,
-                    "startedAt" = COALESCE(j."startedAt", %s),
-                    "updatedAt" = %s,
+                    "claimedAt" = %(now)s,
+                    "claimedBy" = %(worker_id)s,
+                    "leaseExpiresAt" = %(lease)s,
+                    "startedAt" = COALESCE(j."startedAt", %(now)s),
+                    "updatedAt" = %(now)s,
                     error = NULL
                 FROM candidate
                 WHERE j.id = candidate.id
                 RETURNING j.*
                 """,
-                (now, now, worker_id, lease, now, now),
-            )
-            row = cur.fetchone()
-            conn.commit()
-            return dict(row) if row else None
+            params,
+        )
+        row = cur.fetchone()
+        conn.commit()
+        return dict(row) if row else None
+
 
+def claim_next_job(worker_id: str, lease_seconds: int, schema: Optional[str] = None) -> Optional[dict[str, Any]]:
+    """Atomically claim an expired processing lease (oldest first), else a pending job per CLAIM_POLICY.
+
+    The returned row carries "schema" (the one it was claimed from) for update_step,
+    complete_job and fail_job.
+    """
+    schema = schema or default_schema()
+    table = _import_job_table(schema)
+    now = datetime.now(timezone.utc)
+    params = {
+        "now": now,
+        "worker_id": worker_id,
+        "lease": now + timedelta(seconds=lease_seconds),
+        "user_cap": int(os.environ.get("USER_MAX_IN_FLIGHT", "0")),
+    }
+    with _connection() as conn:
+        # Recovery first: those jobs have already waited their whole lease
+        row = _claim(conn, table, _EXPIRED_CANDIDATE.format(table=table), params) or _claim(
+            conn, table, _pending_candidate_sql(table), params
+        )
+    if row:
+        row["schema"] = schema
+    return row
 
-def claim_job_by_id(job_id: str, worker_id: str, lease_seconds: int) -> Optional[dict[str, Any]]:
+
+def claim_job_by_id(
+    job_id: str, worker_id: str, lease_seconds: int, schema: Optional[str] = None
+) -> Optional[dict[str, Any]]:
     """Claim a specific job (Cloud Run one-shot). Allows pending or expired lease."""
-    table = _import_job_table()
+    schema = schema or default_schema()
+    table = _import_job_table(schema)
     now = datetime.now(timezone.utc)
     lease = now + timedelta(seconds=lease_seconds)
-    with connect() as conn:
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 f"""
@@ -97,22 +237,33 @@ def claim_job_by_id(job_id: str, worker_id: str, lease_seconds: int) -> Optional
             )
             row = cur.fetchone()
             conn.commit()
-            return dict(row) if row else None
+            return {**row, "schema": schema} if row else None
 
 
-def get_job(job_id: str) -> Optional[dict[str, Any]]:
-    table = _import_job_table()
-    with connect() as conn:
+def get_job(job_id: str, schema: Optional[str] = None) -> Optional[dict[str, Any]]:
+    table = _import_job_table(schema)
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(f"SELECT * FROM {table} WHERE id = %s", (job_id,))
             row = cur.fetchone()
             return dict(row) if row else None
 
 
-def update_step(job_id: str, step: str, renew_lease_seconds: Optional[int] = None) -> None:
-    table = _import_job_table()
+def update_step(
+    job_id: str,
+    step: str,
+    renew_lease_seconds: Optional[int] = None,
+    schema: Optional[str] = None,
+    claimed_by: Optional[str] = None,
+) -> bool:
+    """Set the step and optionally renew the lease; False if the renewal found the job lost.
+
+    With claimed_by, the lease is only renewed while that worker still holds the job, so a
+    worker whose expired lease was recovered by another one finds out instead of extending it.
+    """
+    table = _import_job_table(schema)
     now = datetime.now(timezone.utc)
-    with connect() as conn:
+    with _connection() as conn:
         with conn.cursor() as cur:
             if renew_lease_seconds:
                 lease = now + timedelta(seconds=renew_lease_seconds)
@@ -120,9 +271,9 @@ def update_step(job_id: str, step: str, renew_lease_seconds: Optional[int] = Non
                     f"""
                     UPDATE {table}
                     SET step = %s, "leaseExpiresAt" = %s, "updatedAt" = %s
-                    WHERE id = %s
+                    WHERE id = %s AND (%s::text IS NULL OR "claimedBy" = %s)
                     """,
-                    (step, lease, now, job_id),
+                    (step, lease, now, job_id, claimed_by, claimed_by),
                 )
             else:
                 cur.execute(
@@ -133,13 +284,21 @@ def update_step(job_id: str, step: str, renew_lease_seconds: Optional[int] = Non
                     """,
                     (step, now, job_id),
                 )
+            held = cur.rowcount > 0
             conn.commit()
+            return held
 
 
-def complete_job(job_id: str, result: dict[str, Any]) -> None:
-    table = _import_job_table()
+def _metrics_json(metrics: Optional[dict[str, Any]]) -> Optional[str]:
+    return json.dumps(metrics) if metrics is not None else None
+
+
+def complete_job(
+    job_id: str, result: dict[str, Any], metrics: Optional[dict[str, Any]] = None, schema: Optional[str] = None
+) -> None:
+    table = _import_job_table(schema)
     now = datetime.now(timezone.utc)
-    with connect() as conn:
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 f"""
@@ -147,21 +306,24 @@ def complete_job(job_id: str, result: dict[str, Any]) -> None:
                 SET status = 'completed',
                     step = 'completed',
                     result = %s::jsonb,
+                    metrics = %s::jsonb,
                     error = NULL,
                     "completedAt" = %s,
                     "leaseExpiresAt" = NULL,
                     "updatedAt" = %s
                 WHERE id = %s
                 """,
-                (json.dumps(result), now, now, job_id),
+                (json.dumps(result), _metrics_json(metrics), now, now, job_id),
             )
             conn.commit()
 
 
-def fail_job(job_id: str, error: str) -> None:
-    table = _import_job_table()
+def fail_job(
+    job_id: str, error: str, metrics: Optional[dict[str, Any]] = None, schema: Optional[str] = None
+) -> None:
+    table = _import_job_table(schema)
     now = datetime.now(timezone.utc)
-    with connect() as conn:
+    with _connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 f"""
@@ -169,11 +331,82 @@ def fail_job(job_id: str, error: str) -> None:
                 SET status = 'failed',
                     step = 'failed',
                     error = %s,
+                    metrics = %s::jsonb,
                     "completedAt" = %s,
                     "leaseExpiresAt" = NULL,
                     "updatedAt" = %s
                 WHERE id = %s
                 """,
-                (error[:4000], now, now, job_id),
+                (error[:4000], _metrics_json(metrics), now, now, job_id),
             )
-            conn.commit()
\ No newline at end of file
+            conn.commit()
+
+
+def _archive_table(schema: Optional[str] = None) -> str:
+    return _import_job_table(schema).replace('"ImportJob"', '"ImportJobArchive"')
+
+
+def archive_finished_batch(
+    older_than: datetime, unsaved_older_than: Optional[datetime], batch_size: int, schema: Optional[str] = None
+) -> tuple[int, int, int]:
+    """Move up to batch_size finished jobs created before older_than into ImportJobArchive.
+
+    Completed jobs whose result was never saved stay (the user can still save them from
+    the import list) unless unsaved_older_than is given and they are older than that.
+    Rows locked by a concurrent update are skipped. A row is deleted only if its archive
+    insert went through: ids already in ImportJobArchive are left in ImportJob rather
+    than dropped. Returns (rows, bytes, kept): rows moved, their total column size
+    including the TOASTed result, and rows selected but kept because the archive
+    insert conflicted (an id archived concurrently).
+    """
+    table = _import_job_table(schema)
+    archive = _archive_table(schema)
+    with _connection() as conn:
+        with conn.cursor() as cur:
+            # Give up rather than queue behind the backend's writes; the next batch retries
+            cur.execute("SET LOCAL lock_timeout = '2s'")
+            cur.execute(
+                f"""
+                WITH victims AS (
+                  SELECT j.* FROM {table} j
+                  WHERE j.status IN ('completed', 'failed')
+                    AND j."createdAt" < %(older_than)s
+                    AND (j.status = 'failed'
+                         OR j."savedRecipeId" IS NOT NULL
+                         OR j."createdAt" < %(unsaved_older_than)s::timestamptz)
+                    -- already archived (e.g. restored by hand): leave it, or every batch would retry it
+                    AND NOT EXISTS (SELECT 1 FROM {archive} a WHERE a.id = j.id)
+                  LIMIT %(batch_size)s
+                  FOR UPDATE OF j SKIP LOCKED
+                ),
+                archived AS (
+                  INSERT INTO {archive} (
+                    id, "userId", url, status, kind, result, metrics, error, "savedRecipeId",
+                    "createdAt", "startedAt", "completedAt", "archivedAt"
+                  )
+                  SELECT id, "userId", url, status, kind, result, metrics, error, "savedRecipeId",
+                         "createdAt", "startedAt", "completedAt", %(now)s
+                  FROM victims
+                  ON CONFLICT (id) DO NOTHING
+                  RETURNING id
+                ),
+                moved AS (
+                  DELETE FROM {table} j
+                  USING archived
+                  WHERE j.id = archived.id
+                  RETURNING pg_column_size(j.*) AS bytes
+                )
+                SELECT count(*) AS rows, COALESCE(sum(bytes), 0) AS bytes,
+                       (SELECT count(*) FROM victims) - count(*) AS kept
+                FROM moved
+                """,
+                {
+                    "older_than": older_than,
+                    "unsaved_older_than": unsaved_older_than,
+                    "batch_size": batch_size,
+                    "now": datetime.now(timezone.utc),
+                },
+            )
+            row = cur.fetchone()
+            conn.commit()
+            return int(row["rows"]), int(row["bytes"]), int(row["kept"])
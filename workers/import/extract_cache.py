@@ -0,0 +1,337 @@
+"""Near-duplicate extraction cache keyed by page content instead of URL.
+
+The same recipe reaches us as syndicated copies, print/AMP views and share links with
+different query strings. import_from_url fingerprints the text it would send to the LLM:
+only recipe-dense lines (quantities, cooking verbs) are kept, so navigation, ads and
+comments around the recipe do not matter. The lines are split into word 3-gram shingles
+and the set is MinHashed (NUM_PERM values). A banded LSH index (BANDS bands of ROWS
+values) finds candidates with one indexed lookup per band however many entries are
+stored. A candidate is reused only if its estimated Jaccard similarity is at least
+EXTRACT_CACHE_THRESHOLD and it has exactly the same set of ingredient lines, so a copy
+with doubled quantities or a substituted ingredient is not served from the original.
+
+Off unless EXTRACT_CACHE_PATH names a SQLite file on storage that outlives the process
+(a mounted volume, or the poller's disk). On Cloud Run Jobs /tmp is in memory and empty
+on every execution, so a cache there could never hit and would only cost RAM and CPU.
+Only the raw LLM extraction is stored; image choice and JSON-LD fallbacks are still
+applied per page. Entries expire after EXTRACT_CACHE_TTL_SECONDS; beyond
+EXTRACT_CACHE_MAX_ENTRIES (500000, about 2.5 KB each on disk) the least recently used
+are evicted.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import time
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 3
+MIN_SHINGLES = 12
+_MASK64 = (1 << 64) - 1
+
+_rng = random.Random(0x5EED_F1A9)
+# (a * x + b) mod 2**64 with odd a is a permutation of 64-bit hashes; the top 32 bits are kept
+_PERMS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+
+# "1½ cups" and "1 1/2 cups" must tokenize the same (NFKC alone would give "11⁄2")
+_FRACTIONS = {"½": "1/2", "¼": "1/4", "¾": "3/4", "⅓": "1/3", "⅔": "2/3", "⅛": "1/8"}
+_TOKEN = re.compile(r"\d+/\d+|\d+(?:\.\d+)?|[^\W\d_]+")
+_STEP_PREFIX = re.compile(r"^\s*(?:\d{1,2}[.)]|[-•*▢]|step\s+\d+:?)\s*", re.IGNORECASE)
+_HINT_KEY = re.compile(r"^(?:ingredients|instructions):\s*", re.IGNORECASE)
+_MEASURE = re.compile(
+    r"\b(\d+\s*/\s*\d+|\d+(?:\.\d+)?|½|¼|¾|⅓|⅔)\s*"
+    r"(cups?|tbsps?|tsps?|tablespoons?|teaspoons?|g|grams?|kg|ml|l|oz|ounces?|lbs?|pounds?|cloves?|pinch|"
+    r"eggs?|cans?|sticks?|slices?|whole)\b",
+    re.IGNORECASE,
+)
+_LEADING_AMOUNT = re.compile(r"^(\d+(?:[./]\d+)?|½|¼|¾|⅓|⅔)\s+\S")
+# Image lists and JSON-LD hint fields that name the page rather than the recipe steps
+_SKIP_PREFIXES = ("Image:", "imageUrl:", "title:", "description:", "cookTime:", "Structured Recipe data")
+# Words that may precede the imperative in a step ("In a bowl, whisk…", "Meanwhile, heat…")
+_STEP_LEADS = frozenset(
+    "in on into once when while then meanwhile using after before with to gently carefully slowly finally "
+    "next first again now".split()
+)
+_VERBS = frozenset(
+    "add adjust bake beat blanch blend boil braise bring broil brown brush chill chop coat combine cook cool "
+    "cover crack crush cut dice divide drain drizzle dust flip fold form fry garnish grate grease grill heat "
+    "knead ladle layer let line make marinate mash melt microwave mince mix peel place pour preheat press "
+    "put reduce refrigerate remove repeat rest rinse roast roll rub saute scoop sear season serve set shape "
+    "shred sift simmer slice soak spoon spread sprinkle squeeze steam stir strain stuff taste toast top toss "
+    "transfer turn warm wash whisk wrap zest".split()
+)
+
+
+@dataclass
+class Fingerprint:
+    signature: tuple[int, ...]
+    ingredients: str  # digest of the normalized ingredient lines (order-insensitive)
+    shingles: int
+
+
+def _normalize(line: str) -> str:
+    for glyph, ascii_fraction in _FRACTIONS.items():
+        line = line.replace(glyph, f" {ascii_fraction}")
+    line = unicodedata.normalize("NFKC", line).lower().replace("\u2044", "/")
+    line = _HINT_KEY.sub("", line)
+    return _STEP_PREFIX.sub("", line).strip()
+
+
+def _is_ingredient_line(line: str, tokens: list[str]) -> bool:
+    if len(tokens) > 12 or tokens[0] in _VERBS:
+        return False
+    return bool(_MEASURE.search(line) or _LEADING_AMOUNT.match(line))
+
+
+def _is_step_line(tokens: list[str]) -> bool:
+    """Imperative steps ("Heat the oven…", "In a bowl, whisk…"); titles and reader comments are not."""
+    if len(tokens) < 3:
+        return False
+    if tokens[0] in _VERBS:
+        return True
+    return tokens[0] in _STEP_LEADS and any(t in _VERBS for t in tokens[1:5])
+
+
+def recipe_lines(text: str) -> tuple[list[list[str]], set[str]]:
+    """Token lists of the recipe-dense lines (ingredients, steps), deduplicated, in page order,
+    and the set of ingredient lines among them."""
+    seen: set[str] = set()
+    out: list[list[str]] = []
+    ingredients: set[str] = set()
+    for raw in text.splitlines():
+        if raw.startswith(_SKIP_PREFIXES):
+            continue
+        line = _normalize(raw)
+        tokens = _TOKEN.findall(line)
+        if not tokens:
+            continue
+        key = " ".join(tokens)
+        if _is_ingredient_line(line, tokens):
+            ingredients.add(key)
+        elif not _is_step_line(tokens):
+            continue
+        if key not in seen:
+            seen.add(key)
+            out.append(tokens)
+    return out, ingredients
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _shingles(lines: Iterable[list[str]]) -> set[int]:
+    """Word 3-grams over the lines joined in order, so one step paragraph and the same steps
+    as a numbered list differ only at the few line boundaries."""
+    tokens = [t for line in lines for t in line]
+    if len(tokens) <= SHINGLE:
+        return {_hash64(" ".join(tokens))} if tokens else set()
+    return {_hash64(" ".join(tokens[i : i + SHINGLE])) for i in range(len(tokens) - SHINGLE + 1)}
+
+
+def _digest(lines: set[str]) -> str:
+    return hashlib.blake2b("|".join(sorted(lines)).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def minhash(shingles: set[int]) -> tuple[int, ...]:
+    return tuple(min(((a * x + b) & _MASK64) >> 32 for x in shingles) for a, b in _PERMS)
+
+
+def fingerprint(text: str) -> Optional[Fingerprint]:
+    """Fingerprint of the recipe-dense part of text; None when too little of it to match safely."""
+    lines, ingredients = recipe_lines(text)
+    shingles = _shingles(lines)
+    if len(shingles) < MIN_SHINGLES or not ingredients:
+        return None
+    return Fingerprint(minhash(shingles), _digest(ingredients), len(shingles))
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def band_keys(signature: tuple[int, ...]) -> list[int]:
+    keys = []
+    for band in range(BANDS):
+        chunk = array("I", signature[band * ROWS : (band + 1) * ROWS]).tobytes()
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entry (
+  id INTEGER PRIMARY KEY,
+  sig BLOB NOT NULL,
+  ingredients TEXT NOT NULL,
+  result TEXT NOT NULL,
+  url TEXT NOT NULL,
+  stored_at REAL NOT NULL,
+  used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entry_used_at ON entry (used_at);
+CREATE TABLE IF NOT EXISTS band (
+  key INTEGER NOT NULL,
+  entry INTEGER NOT NULL,
+  PRIMARY KEY (key, entry)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class Hit:
+    result: dict[str, Any]
+    similarity: float
+    url: str
+
+
+class Index:
+    """SQLite-backed LSH index; one short-lived connection per call so threads can share it."""
+
+    def __init__(
+        self, path: str, threshold: float = 0.8, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 500000
+    ) -> None:
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def lookup(self, fp: Fingerprint) -> Optional[Hit]:
+        """Best stored entry with the same ingredient lines and similarity >= threshold."""
+        keys = band_keys(fp.signature)
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT e.id, e.sig, e.ingredients, e.result, e.url, e.stored_at FROM entry e
+                WHERE e.id IN (SELECT entry FROM band WHERE key IN ({",".join("?" * len(keys))}))
+                """,
+                keys,
+            ).fetchall()
+            best: Optional[tuple[float, int, str, str]] = None
+            for entry_id, sig, ingredients, result, url, stored_at in rows:
+                if now - stored_at > self.ttl_seconds or ingredients != fp.ingredients:
+                    continue
+                sim = similarity(fp.signature, tuple(array("I", sig)))
+                if sim >= self.threshold and (best is None or sim > best[0]):
+                    best = (sim, entry_id, result, url)
+            if best is None:
+                return None
+            with conn:
+                conn.execute("UPDATE entry SET used_at = ? WHERE id = ?", (now, best[1]))
+            return Hit(json.loads(best[2]), best[0], best[3])
+        finally:
+            conn.close()
+
+    def store(self, fp: Fingerprint, result: dict[str, Any], url: str) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO entry (sig, ingredients, result, url, stored_at, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (array("I", fp.signature).tobytes(), fp.ingredients, json.dumps(result), url, now, now),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO band (key, entry) VALUES (?, ?)",
+                    [(k, cur.lastrowid) for k in band_keys(fp.signature)],
+                )
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT count(*) FROM entry").fetchone()
+        over = count - self.max_entries
+        if over <= 0:
+            return
+        # Evict a few percent past the cap so this does not run after every store
+        over += self.max_entries // 20
+        victims = conn.execute("SELECT id, sig FROM entry ORDER BY used_at LIMIT ?", (over,)).fetchall()
+        with conn:
+            conn.executemany(
+                "DELETE FROM band WHERE key = ? AND entry = ?",
+                [(k, entry_id) for entry_id, sig in victims for k in band_keys(tuple(array("I", sig)))],
+            )
+            conn.executemany("DELETE FROM entry WHERE id = ?", [(entry_id,) for entry_id, _ in victims])
+        logger.info("extract cache evicted=%d entries=%d", len(victims), count - len(victims))
+
+    def size(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT count(*) FROM entry").fetchone()[0]
+        finally:
+            conn.close()
+
+
+_index: Optional[Index] = None
+_index_path: Optional[str] = None
+
+
+def _path() -> Optional[str]:
+    path = (os.environ.get("EXTRACT_CACHE_PATH") or "").strip()
+    return None if not path or path.lower() == "off" else path
+
+
+def enabled() -> bool:
+    """True when EXTRACT_CACHE_PATH is set; callers skip fingerprinting otherwise."""
+    return _path() is not None
+
+
+def _get_index() -> Optional[Index]:
+    global _index, _index_path
+    path = _path()
+    if path is None:
+        return None
+    if _index is None or _index_path != path:
+        _index = Index(
+            path,
+            threshold=float(os.environ.get("EXTRACT_CACHE_THRESHOLD", "0.8")),
+            ttl_seconds=float(os.environ.get("EXTRACT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            max_entries=int(os.environ.get("EXTRACT_CACHE_MAX_ENTRIES", "500000")),
+        )
+        _index_path = path
+    return _index
+
+
+def lookup(fp: Fingerprint) -> Optional[Hit]:
+    """Cached extraction for a near-duplicate page, or None; cache errors are logged, never raised."""
+    try:
+        index = _get_index()
+        return index.lookup(fp) if index else None
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logger.warning("extract cache lookup failed: %s", e)
+        return None
+
+
+def store(fp: Fingerprint, result: dict[str, Any], url: str) -> None:
+    try:
+        index = _get_index()
+        if index:
+            index.store(fp, result, url)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logger.warning("extract cache write failed for %s: %s", url, e)
@@ -1,15 +1,41 @@
 from __future__ import annotations
 
+import contextvars
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import httpx
 
-GROQ_BASE = "https://api.groq.com/openai/v1"
+import llm_usage
+import metrics
+import transcripts
 
+logger = logging.getLogger(__name__)
 
-def transcribe_audio(audio_path: Path, language: str | None = None) -> str:
-    """Transcribe with Groq Whisper. Raises if GROQ_API_KEY missing."""
+GROQ_BASE = os.environ.get("GROQ_BASE_URL") or "https://api.groq.com/openai/v1"
+
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def _http_client() -> httpx.Client:
+    """Process-wide client: chunk uploads and later jobs reuse keep-alive connections."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(timeout=300.0)
+        return _client
+
+
+def transcribe_audio(
+    audio: Path | bytes, language: str | None = None, filename: str = "audio.ogg"
+) -> str:
+    """Transcribe a file or in-memory encoded audio with Groq Whisper. Raises if GROQ_API_KEY missing."""
     key = os.environ.get("GROQ_API_KEY")
     if not key:
         raise RuntimeError("GROQ_API_KEY is not set; cannot transcribe without captions")
@@ -19,18 +45,87 @@ def transcribe_audio(audio_path: Path, language: str | None = None) -> str:
     if language:
         data["language"] = language
 
-    with audio_path.open("rb") as f:
-        files = {"file": (audio_path.name, f, "application/octet-stream")}
-        with httpx.Client(timeout=300.0) as client:
-            res = client.post(
-                f"{GROQ_BASE}/audio/transcriptions",
-                headers={"Authorization": f"Bearer {key}"},
-                data=data,
-                files=files,
+    if isinstance(audio, bytes):
+        payload, size = audio, len(audio)
+    else:
+        payload, size, filename = audio.open("rb"), audio.stat().st_size, audio.name
+    started = time.monotonic()
+    try:
+        files = {"file": (filename, payload, "application/octet-stream")}
+        res = _http_client().post(
+            f"{GROQ_BASE}/audio/transcriptions",
+            headers={"Authorization": f"Bearer {key}"},
+            data=data,
+            files=files,
+        )
+        res.raise_for_status()
+    except httpx.HTTPError:
+        metrics.llm_error("groq", "transcribe")
+        raise
+    finally:
+        if not isinstance(payload, bytes):
+            payload.close()
+    llm_usage.record_call(
+        "transcribe",
+        model,
+        latency_s=time.monotonic() - started,
+        provider="groq",
+        upload_bytes=size,
+    )
+    # response_format=text returns plain text; json returns {"text": ...}
+    ctype = res.headers.get("content-type", "")
+    if "application/json" in ctype:
+        return (res.json().get("text") or "").strip()
+    return res.text.strip()
+
+
+def _transcribe_chunk(
+    index: int, chunk: bytes, language: str | None, filename: str, cancel: threading.Event | None = None
+) -> str:
+    """One chunk with its own retries, so a failure never redoes the other chunks."""
+    retries = int(os.environ.get("GROQ_CHUNK_RETRIES", "2"))
+    for attempt in range(retries + 1):
+        # Checked before every upload: once the transcript is not needed, nothing more is billed
+        if cancel is not None and cancel.is_set():
+            raise RuntimeError("transcription cancelled")
+        try:
+            return transcribe_audio(chunk, language=language, filename=filename)
+        except httpx.HTTPError as e:
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            if attempt >= retries or (status is not None and status < 500 and status != 429):
+                raise
+            logger.warning(
+                "Groq chunk %d attempt %d failed (%s); retrying", index, attempt + 1, status or e
+            )
+            time.sleep(min(8.0, 0.5 * 2**attempt))
+    raise AssertionError("unreachable")
+
+
+def transcribe_chunks(
+    chunks: list[bytes],
+    language: str | None = None,
+    filename: str = "audio.ogg",
+    cancel: threading.Event | None = None,
+) -> str:
+    """Transcribe ordered audio chunks concurrently (GROQ_PARALLELISM) and stitch the text.
+
+    Chunks not yet uploaded when cancel is set are skipped and the call raises.
+    """
+    parallelism = max(1, int(os.environ.get("GROQ_PARALLELISM", "4")))
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=min(parallelism, len(chunks) or 1)) as pool:
+        # Each task runs in a copy of the caller's context so usage lands on the current job
+        futures = [
+            pool.submit(
+                contextvars.copy_context().run, _transcribe_chunk, i, chunk, language, filename, cancel
             )
-            res.raise_for_status()
-            # response_format=text returns plain text; json returns {"text": ...}
-            ctype = res.headers.get("content-type", "")
-            if "application/json" in ctype:
-                return (res.json().get("text") or "").strip()
-            return res.text.strip()
+            for i, chunk in enumerate(chunks)
+        ]
+        texts = [f.result() for f in futures]
+    logger.info(
+        "Groq chunked transcription chunks=%d parallelism=%d elapsed_s=%.1f",
+        len(chunks),
+        parallelism,
+        time.monotonic() - started,
+    )
+    return " ".join(transcripts.merge_overlapping(texts))
@@ -1,21 +1,39 @@
 #!/usr/bin/env python3
-"""Cloud Run Job entry: process a single ImportJob by JOB_ID and exit."""
+"""Cloud Run Job entry: process a single ImportJob by JOB_ID and exit.
+
+Heavy modules (psycopg via db, httpx/bs4 via url_import, yt-dlp via video_import) are
+imported on first use so a job only pays for the path it runs. STARTUP_PROFILE=1 logs
+per-module import times and time-to-claim.
+"""
 from __future__ import annotations
 
-import base64
-import json
-import logging
-import os
-import socket
-import sys
-import traceback
-from pathlib import Path
+import time
+
+_STARTED = time.perf_counter()
+
+import startup_profile  # noqa: E402
 
-from dotenv import load_dotenv
+if startup_profile.enabled():
+    startup_profile.install()
 
-import db
-import url_import
-import video_import
+import base64  # noqa: E402
+import importlib  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import os  # noqa: E402
+import socket  # noqa: E402
+import sys  # noqa: E402
+import traceback  # noqa: E402
+from pathlib import Path  # noqa: E402
+from types import ModuleType  # noqa: E402
+from typing import Optional  # noqa: E402
+from urllib.parse import urlparse  # noqa: E402
+
+from dotenv import load_dotenv  # noqa: E402
+
+import job_profile  # noqa: E402
+import llm_usage  # noqa: E402
+import tracing  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +41,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger("import-job")
 
+# First-load wall time per lazily imported module (includes its dependencies)
+_loads_ms: dict[str, float] = {}
+
+
+def _load(name: str) -> ModuleType:
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    _loads_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+    return module
+
 
 def env_int(name: str, default: int) -> int:
     try:
@@ -31,6 +62,21 @@ def env_int(name: str, default: int) -> int:
         return default
 
 
+def job_id_from_payload(raw: str) -> Optional[str]:
+    """jobId from a direct {"jobId"} body or a Pub/Sub push envelope (base64 message.data)."""
+    try:
+        data = json.loads(raw)
+        if isinstance(data, dict) and data.get("jobId"):
+            return str(data["jobId"])
+        if isinstance(data, dict) and data.get("message", {}).get("data"):
+            decoded = base64.b64decode(data["message"]["data"]).decode("utf-8")
+            inner = json.loads(decoded)
+            return str(inner["jobId"])
+    except Exception as e:
+        logger.warning("Failed to parse PUBSUB/CLOUD_EVENT payload: %s", e)
+    return None
+
+
 def resolve_job_id() -> str:
     job_id = (os.environ.get("JOB_ID") or "").strip()
     if job_id:
@@ -38,16 +84,9 @@ def resolve_job_id() -> str:
     # Pub/Sub push / Eventarc may pass the message body
     raw = (os.environ.get("PUBSUB_MESSAGE") or os.environ.get("CLOUD_EVENT_DATA") or "").strip()
     if raw:
-        try:
-            data = json.loads(raw)
-            if isinstance(data, dict) and data.get("jobId"):
-                return str(data["jobId"])
-            if isinstance(data, dict) and data.get("message", {}).get("data"):
-                decoded = base64.b64decode(data["message"]["data"]).decode("utf-8")
-                inner = json.loads(decoded)
-                return str(inner["jobId"])
-        except Exception as e:
-            logger.warning("Failed to parse PUBSUB/CLOUD_EVENT payload: %s", e)
+        job_id = job_id_from_payload(raw)
+        if job_id:
+            return job_id
     raise SystemExit("JOB_ID (or Pub/Sub message with jobId) is required")
 
 
@@ -57,19 +96,24 @@ def process_job(job: dict) -> None:
     kind = (job.get("kind") or job.get("aiImportKind") or "url").lower()
     lease = env_int("LEASE_SECONDS", 900)
     work_dir = Path(os.environ.get("WORK_DIR", "/tmp/import-worker"))
+    db = _load("db")
 
     def on_step(step: str) -> None:
         logger.info("job %s step=%s", job_id, step)
-        db.update_step(job_id, step, renew_lease_seconds=lease)
+        db.update_step(job_id, step, renew_lease_seconds=lease, schema=job.get("schema"))
 
-    if kind == "video":
-        result = video_import.import_from_video(url, work_dir, on_step)
-    else:
-        result = url_import.import_from_url(url, on_step)
+    with job_profile.profiled(job_id), tracing.job(job_id, kind=kind, host=urlparse(url).hostname or ""):
+        if kind == "video":
+            result = _load("video_import").import_from_video(url, work_dir, on_step)
+        else:
+            result = _load("url_import").import_from_url(url, on_step)
     if not result.get("title") and not result.get("ingredients"):
         raise RuntimeError("Extraction returned empty recipe")
-    db.complete_job(job_id, result)
+    db.complete_job(job_id, result, llm_usage.job_metrics(job_id, url, llm_usage.current()), schema=job.get("schema"))
     logger.info("job %s completed title=%r", job_id, (result.get("title") or "")[:60])
+    nvidia_client = _load("nvidia_client")
+    logger.info("NVIDIA tier stats: %s", nvidia_client.tier_stats())
+    logger.info("NVIDIA JSON parse stats: %s", nvidia_client.parse_stats())
 
 
 def main() -> int:
@@ -85,7 +129,11 @@ def main() -> int:
     lease = env_int("LEASE_SECONDS", 900)
     logger.info("One-shot job_id=%s worker=%s", job_id, worker_id)
 
+    db = _load("db")
     job = db.claim_job_by_id(job_id, worker_id, lease)
+    time_to_claim_ms = (time.perf_counter() - _STARTED) * 1000
+    usage = llm_usage.begin(job_id)  # process_job records into this collector
+    llm_usage.note("startup", {"timeToClaimMs": round(time_to_claim_ms, 1), "loadsMs": dict(_loads_ms)})
     if not job:
         existing = db.get_job(job_id)
         if existing and existing.get("status") in ("completed", "failed"):
@@ -100,8 +148,13 @@ def main() -> int:
     except Exception as e:
         logger.error("job %s failed: %s", job_id, e)
         logger.debug(traceback.format_exc())
-        db.fail_job(job_id, str(e))
+        db.fail_job(job_id, str(e), llm_usage.job_metrics(job_id, job["url"], usage), schema=job.get("schema"))
         return 1
+    finally:
+        if startup_profile.enabled():
+            startup_profile.uninstall()
+            profile = startup_profile.report(_loads_ms, time_to_claim_ms)
+            logger.info("startup profile: %s", json.dumps(profile))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,237 @@
+"""On-demand per-job profiling: cProfile, tracemalloc top allocators and sampled RSS.
+
+A job is profiled when its id is in JOB_PROFILE_IDS (comma-separated) or, failing that,
+with probability JOB_PROFILE (0..1, e.g. 0.02; "all" = 1). JOB_PROFILE_WHAT picks the
+collectors (cpu,mem,rss; default all). Artifacts go to JOB_PROFILE_DIR/<job id>-<time>/:
+
+  cpu.prof   pstats dump (snakeviz, `python -m pstats`), cpu.txt top functions
+  alloc.txt  tracemalloc top allocation sites at the end of the job, plus the peak
+  rss.json   samples every JOB_PROFILE_RSS_INTERVAL seconds of this process and of its
+             descendants (ffmpeg, yt-dlp helpers) from /proc
+
+Oldest profile directories are removed once the total exceeds JOB_PROFILE_MAX_BYTES.
+cProfile only sees the thread that runs the job (not Groq chunk or speculative-audio
+threads, whose wait shows up as time in the caller); tracemalloc and RSS are process
+wide, so only one job is profiled at a time. Unselected jobs import nothing extra.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+import llm_usage
+
+logger = logging.getLogger(__name__)
+
+_busy = threading.Lock()
+
+
+def selected(job_id: str) -> bool:
+    ids = os.environ.get("JOB_PROFILE_IDS") or ""
+    if job_id in (i.strip() for i in ids.split(",") if i.strip()):
+        return True
+    raw = (os.environ.get("JOB_PROFILE") or "").strip().lower()
+    if not raw or raw in ("0", "off", "false"):
+        return False
+    if raw == "all":
+        return True
+    try:
+        return random.random() < float(raw)
+    except ValueError:
+        logger.warning("ignoring JOB_PROFILE=%r (expected a fraction or 'all')", raw)
+        return False
+
+
+def _profile_dir() -> Path:
+    return Path(os.environ.get("JOB_PROFILE_DIR") or "/tmp/import-profiles")
+
+
+def _rss_kb(pid: int | str) -> int:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii", errors="replace") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _descendants(root: int) -> list[tuple[int, str]]:
+    """(pid, comm) of every live descendant of root, from one /proc scan."""
+    children: dict[int, list[tuple[int, str]]] = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", encoding="ascii", errors="replace") as f:
+                raw = f.read()
+        except OSError:
+            continue
+        comm = raw[raw.find("(") + 1 : raw.rfind(")")]
+        fields = raw[raw.rfind(")") + 2 :].split()
+        try:
+            children.setdefault(int(fields[1]), []).append((int(entry.name), comm))
+        except (IndexError, ValueError):
+            continue
+    out: list[tuple[int, str]] = []
+    stack = [root]
+    while stack:
+        for pid, comm in children.get(stack.pop(), []):
+            out.append((pid, comm))
+            stack.append(pid)
+    return out
+
+
+class RssSampler(threading.Thread):
+    """Background sampler of this process's RSS and its descendants' total (and the largest one)."""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.samples: list[dict[str, Any]] = []
+        self._done = threading.Event()
+        self._t0 = time.monotonic()
+
+    def sample(self) -> None:
+        kids = _descendants(os.getpid())
+        sizes = [(_rss_kb(pid), comm) for pid, comm in kids]
+        top = max(sizes, default=(0, ""))
+        self.samples.append(
+            {
+                "t": round(time.monotonic() - self._t0, 2),
+                "selfKb": _rss_kb("self"),
+                "childrenKb": sum(kb for kb, _ in sizes),
+                "children": len(sizes),
+                "largestChild": top[1],
+            }
+        )
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join(timeout=max(1.0, self.interval * 2))
+        self.sample()
+
+
+def _prune(root: Path, max_bytes: int, keep: Path) -> None:
+    dirs = []
+    for d in root.iterdir():
+        if not d.is_dir():
+            continue
+        try:
+            size = sum(f.stat().st_size for f in d.iterdir())
+            dirs.append((d.stat().st_mtime, size, d))
+        except OSError:
+            continue
+    total = sum(size for _, size, _ in dirs)
+    removed = 0
+    for _, size, d in sorted(dirs, key=lambda x: x[0]):
+        if total <= max_bytes:
+            break
+        if d == keep:
+            continue
+        shutil.rmtree(d, ignore_errors=True)
+        total -= size
+        removed += 1
+    if removed:
+        logger.info("job profiles pruned=%d bytes=%d", removed, total)
+
+
+@contextmanager
+def profiled(job_id: str) -> Iterator[Optional[Path]]:
+    """Profile the enclosed block if this job is selected; yields the artifact dir or None."""
+    if not selected(job_id):
+        yield None
+        return
+    if not _busy.acquire(blocking=False):
+        logger.info("job %s selected for profiling but another job is being profiled; skipping", job_id)
+        yield None
+        return
+    what = {w.strip() for w in (os.environ.get("JOB_PROFILE_WHAT") or "cpu,mem,rss").lower().split(",")}
+    out = _profile_dir() / f"{job_id}-{time.strftime('%Y%m%dT%H%M%S')}"
+    try:
+        out.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.warning("job %s not profiled: %s", job_id, e)
+        _busy.release()
+        yield None
+        return
+    profiler: Any = None
+    sampler: Optional[RssSampler] = None
+    tracing_mem = False
+    try:
+        if "mem" in what:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(int(os.environ.get("JOB_PROFILE_FRAMES", "10")))
+                tracing_mem = True
+        if "rss" in what and os.path.isdir("/proc"):
+            sampler = RssSampler(float(os.environ.get("JOB_PROFILE_RSS_INTERVAL", "0.5")))
+            sampler.start()
+        if "cpu" in what:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+        logger.info("job %s profiling %s → %s", job_id, ",".join(sorted(what)), out)
+        yield out
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        try:
+            summary = _write(out, profiler, sampler, tracing_mem)
+            llm_usage.note("profile", summary)
+            logger.info("job %s profile: %s", job_id, json.dumps(summary))
+            _prune(out.parent, int(os.environ.get("JOB_PROFILE_MAX_BYTES", str(256 * 1024 * 1024))), out)
+        except Exception as e:
+            logger.warning("job %s profile write failed: %s", job_id, e)
+        finally:
+            if tracing_mem:
+                import tracemalloc
+
+                tracemalloc.stop()
+            _busy.release()
+
+
+def _write(out: Path, profiler: Any, sampler: Optional[RssSampler], tracing_mem: bool) -> dict[str, Any]:
+    summary: dict[str, Any] = {"dir": str(out)}
+    top = int(os.environ.get("JOB_PROFILE_TOP", "40"))
+    if profiler is not None:
+        import io
+        import pstats
+
+        profiler.dump_stats(str(out / "cpu.prof"))
+        buf = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buf)
+        stats.sort_stats("cumulative").print_stats(top)
+        (out / "cpu.txt").write_text(buf.getvalue(), encoding="utf-8")
+        summary["cpuS"] = round(stats.total_tt, 2)  # type: ignore[attr-defined]
+    if tracing_mem:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced current={current / 2**20:.1f} MiB peak={peak / 2**20:.1f} MiB", ""]
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:top]:
+            lines.append(str(stat))
+        (out / "alloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        summary["tracedPeakMb"] = round(peak / 2**20, 1)
+    if sampler is not None:
+        (out / "rss.json").write_text(json.dumps(sampler.samples), encoding="utf-8")
+        summary["peakRssMb"] = round(max((s["selfKb"] for s in sampler.samples), default=0) / 1024, 1)
+        summary["peakChildRssMb"] = round(max((s["childrenKb"] for s in sampler.samples), default=0) / 1024, 1)
+    return summary
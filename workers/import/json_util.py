@@ -6,58 +6,90 @@ import re
 from typing import Any, Optional
 
 
-def _loads_lenient(blob: str) -> Optional[dict[str, Any]]:
-    try:
-        data = json.loads(blob)
-        return data if isinstance(data, dict) else None
-    except json.JSONDecodeError:
-        pass
-    # Common model mistakes: trailing commas
-    fixed = re.sub(r",\s*([}\]])", r"\1", blob)
-    try:
-        data = json.loads(fixed)
-        return data if isinstance(data, dict) else None
-    except json.JSONDecodeError:
-        return None
+_SCAN_ONCE = json.JSONDecoder().scan_once
+# Candidate object starts: '{' followed by a key or '}' (skips prose like "{approx}")
+_OBJECT_START = re.compile(r'\{\s*["}]')
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_RECIPE_KEYS = frozenset(
+    ("title", "description", "ingredients", "instructions", "cookTime", "difficulty")
+)
+
+
+def _scan_objects(s: str) -> tuple[Optional[dict[str, Any]], bool]:
+    """Decode at each candidate '{'; return the most recipe-like object and whether any failed.
+
+    Same as JSONDecoder.raw_decode at each offset, minus its per-failure error formatting.
+    Fences, prose and the ---END--- marker sit outside the objects, so they are skipped by
+    the scan itself. After a successful decode the scan resumes past that object.
+    """
+    search = _OBJECT_START.search
+    best: Optional[dict[str, Any]] = None
+    best_rank = (-1, -1)
+    failed = False
+    m = search(s)
+    while m:
+        i = m.start()
+        try:
+            obj, end = _SCAN_ONCE(s, i)
+        except (json.JSONDecodeError, StopIteration):
+            failed = True
+            m = search(s, i + 1)
+            continue
+        rank = (len(_RECIPE_KEYS.intersection(obj)), end - i)
+        if rank > best_rank:
+            best, best_rank = obj, rank
+        m = search(s, end)
+    return best, failed
 
 
 def extract_json_object(text: str) -> Optional[dict[str, Any]]:
+    """Largest recipe-like JSON object in an LLM reply (fenced, prose-wrapped or bare)."""
     if not text:
         return None
-    s = text.strip()
-    if s.endswith("---END---"):
-        s = s[: -len("---END---")].strip()
-    fence = re.search(r"```(?:json)?\s*([\s\S]*?)```", s, re.I)
-    if fence:
-        s = fence.group(1).strip()
-    direct = _loads_lenient(s)
-    if direct is not None:
-        return direct
-    start = s.find("{")
-    if start < 0:
-        return None
-    depth = 0
-    in_str = False
-    escape = False
-    for i in range(start, len(s)):
-        ch = s[i]
-        if in_str:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == '"':
-                in_str = False
-            continue
-        if ch == '"':
-            in_str = True
-        elif ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return _loads_lenient(s[start : i + 1])
-    return None
+    best, failed = _scan_objects(text)
+    if failed and "," in text:
+        # Common model mistake: trailing commas. Only pay for the rewrite when a decode failed.
+        fixed, _ = _scan_objects(_TRAILING_COMMA.sub(r"\1", text))
+        if fixed is not None and (
+            best is None
+            or len(_RECIPE_KEYS.intersection(fixed)) > len(_RECIPE_KEYS.intersection(best))
+        ):
+            best = fixed
+    return best
+
+
+_JSON_TYPES: dict[str, tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+}
+
+
+def schema_errors(data: Any, schema: dict[str, Any], path: str = "$") -> list[str]:
+    """Validate against the small JSON-schema subset we send as response_format.
+
+    Supports type, enum, properties, required and additionalProperties=false.
+    """
+    errors: list[str] = []
+    expected = schema.get("type")
+    if expected and not isinstance(data, _JSON_TYPES.get(expected, (object,))):
+        return [f"{path}: expected {expected}, got {type(data).__name__}"]
+    if "enum" in schema and data not in schema["enum"]:
+        errors.append(f"{path}: {data!r} not one of {schema['enum']}")
+    if isinstance(data, dict):
+        props = schema.get("properties") or {}
+        for key in schema.get("required") or []:
+            if key not in data:
+                errors.append(f"{path}.{key}: missing")
+        for key, value in data.items():
+            if key in props:
+                errors.extend(schema_errors(value, props[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{key}: unexpected key")
+    return errors
 
 
 def as_text(value: Any) -> str:
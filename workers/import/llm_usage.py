@@ -0,0 +1,129 @@
+"""Per-job accounting: LLM / speech calls (purpose, model, tokens, latency, retries) plus notes."""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+import metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar[Optional["JobUsage"]] = contextvars.ContextVar(
+    "llm_usage", default=None
+)
+
+
+class JobUsage:
+    """Calls recorded while one import job runs (see begin())."""
+
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+        self.calls: list[dict[str, Any]] = []
+        # Non-LLM measurements stored next to "llm" in ImportJob.metrics (see note())
+        self.extra: dict[str, Any] = {}
+
+    def summary(self) -> dict[str, Any]:
+        """Totals plus per-purpose and per-model breakdowns, small enough for the job row."""
+        by_purpose: dict[str, dict[str, Any]] = {}
+        by_model: dict[str, dict[str, Any]] = {}
+        for call in self.calls:
+            for bucket, key in ((by_purpose, call["purpose"]), (by_model, call["model"])):
+                row = bucket.setdefault(
+                    key,
+                    {"calls": 0, "promptTokens": 0, "completionTokens": 0, "latencyMs": 0, "retries": 0},
+                )
+                row["calls"] += 1
+                row["promptTokens"] += call["promptTokens"] or 0
+                row["completionTokens"] += call["completionTokens"] or 0
+                row["latencyMs"] += call["latencyMs"]
+                row["retries"] += call["retries"]
+        return {
+            "calls": len(self.calls),
+            "promptTokens": sum(c["promptTokens"] or 0 for c in self.calls),
+            "completionTokens": sum(c["completionTokens"] or 0 for c in self.calls),
+            "latencyMs": sum(c["latencyMs"] for c in self.calls),
+            "retries": sum(c["retries"] for c in self.calls),
+            "byPurpose": by_purpose,
+            "byModel": by_model,
+            "log": self.calls[:50],
+        }
+
+
+def job_metrics(job_id: str, url: str, usage: Optional[JobUsage]) -> dict:
+    """Metrics stored on the ImportJob row; also logged so expensive hosts/prompts stand out."""
+    summary = usage.summary() if usage else JobUsage(job_id).summary()
+    host = urlparse(url).hostname or ""
+    logger.info(
+        "job %s usage host=%s calls=%d prompt_tokens=%d completion_tokens=%d "
+        "latency_ms=%d retries=%d by_purpose=%s",
+        job_id,
+        host,
+        summary["calls"],
+        summary["promptTokens"],
+        summary["completionTokens"],
+        summary["latencyMs"],
+        summary["retries"],
+        json.dumps(summary["byPurpose"]),
+    )
+    return {"host": host, "llm": summary, **(usage.extra if usage else {})}
+
+
+def begin(job_id: str) -> JobUsage:
+    """Start recording for a job in the current context; returns the collector."""
+    usage = JobUsage(job_id)
+    _current.set(usage)
+    return usage
+
+
+def current() -> Optional[JobUsage]:
+    return _current.get()
+
+
+def record_call(
+    purpose: str,
+    model: str,
+    *,
+    latency_s: float,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    retries: int = 0,
+    provider: str = "nvidia",
+    upload_bytes: Optional[int] = None,
+) -> None:
+    """Record one call against the current job; no-op outside a job."""
+    metrics.llm_call(provider, purpose, latency_s)
+    usage = _current.get()
+    if usage is None:
+        return
+    call: dict[str, Any] = {
+        "purpose": purpose,
+        "provider": provider,
+        "model": model,
+        "promptTokens": prompt_tokens,
+        "completionTokens": completion_tokens,
+        "latencyMs": int(latency_s * 1000),
+        "retries": retries,
+    }
+    if upload_bytes is not None:
+        call["uploadBytes"] = upload_bytes
+    usage.calls.append(call)
+    tracing.record(
+        f"{provider}.{purpose}",
+        latency_s,
+        model=model,
+        promptTokens=prompt_tokens,
+        completionTokens=completion_tokens,
+        retries=retries,
+        uploadBytes=upload_bytes,
+    )
+
+
+def note(key: str, value: Any) -> None:
+    """Attach a per-job measurement (e.g. scratch usage) to the current job; no-op outside a job."""
+    usage = _current.get()
+    if usage is not None:
+        usage.extra[key] = value
@@ -0,0 +1,213 @@
+"""Prometheus text-format metrics for the long-running poller (worker.py).
+
+Off unless METRICS_PORT is set: every recording helper first checks a module flag and
+returns, so instrumented code paths cost one attribute read when nobody scrapes.
+enable() starts GET /metrics on a daemon thread. No client library: the exposition
+format is a few lines of text per series.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_enabled = False
+_lock = threading.Lock()
+
+CLAIM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+JOB_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+LabelKey = tuple[str, ...]
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _labels(names: tuple[str, ...], values: LabelKey, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        _registry.append(self)
+
+    def header(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self.values: dict[LabelKey, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def lines(self) -> Iterator[str]:
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.label_names, key)} {_fmt(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = JOB_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+        # per label set: [count per bucket..., +Inf count, sum]
+        self.values: dict[LabelKey, list[float]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        with _lock:
+            row = self.values.get(labels)
+            if row is None:
+                row = self.values[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += value
+
+    def lines(self) -> Iterator[str]:
+        for key, row in sorted(self.values.items()):
+            for bound, count in zip((*self.buckets, float("inf")), row[:-1]):
+                le = 'le="' + _fmt(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {_fmt(count)}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_fmt(row[-1])}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {_fmt(row[-2])}"
+
+
+_registry: list[_Metric] = []
+
+CLAIM_SECONDS = Histogram(
+    "import_claim_seconds", "claim_next_job latency by schema and result", ("schema", "result"), CLAIM_BUCKETS
+)
+IDLE_SECONDS = Counter("import_queue_idle_seconds_total", "Seconds the poller waited because every queue was empty")
+JOB_SECONDS = Histogram(
+    "import_job_duration_seconds",
+    "Job wall time from start to complete/fail by schema",
+    ("schema", "kind", "outcome"),
+    JOB_BUCKETS,
+)
+IN_FLIGHT = Gauge("import_jobs_in_flight", "Jobs currently being processed by schema", ("schema",))
+LLM_SECONDS = Histogram(
+    "import_llm_call_seconds", "NVIDIA/Groq call latency including retries", ("provider", "purpose"), LLM_BUCKETS
+)
+LLM_ERRORS = Counter("import_llm_call_errors_total", "NVIDIA/Groq calls that raised", ("provider", "purpose"))
+FETCHED_BYTES = Counter("import_fetched_bytes_total", "Bytes fetched from sources (page HTML, encoded audio)", ("source",))
+EXTRACT_CACHE = Counter(
+    "import_extract_cache_total", "URL extractions by content-fingerprint cache result", ("result",)
+)
+LEASE_RENEWALS = Counter("import_lease_renewals_total", "Lease renewals on step updates by result", ("result",))
+
+
+def claim(schema: str, found: bool, seconds: float) -> None:
+    if _enabled:
+        CLAIM_SECONDS.observe(schema, "claimed" if found else "empty", value=seconds)
+
+
+def idle(seconds: float) -> None:
+    if _enabled:
+        IDLE_SECONDS.inc(amount=seconds)
+
+
+def job_started(schema: str) -> None:
+    if _enabled:
+        IN_FLIGHT.inc(schema)
+
+
+def job_finished(schema: str, kind: str, outcome: str, seconds: float) -> None:
+    if _enabled:
+        IN_FLIGHT.inc(schema, amount=-1)
+        JOB_SECONDS.observe(schema, kind, outcome, value=seconds)
+
+
+def llm_call(provider: str, purpose: str, seconds: float) -> None:
+    if _enabled:
+        LLM_SECONDS.observe(provider, purpose, value=seconds)
+
+
+def llm_error(provider: str, purpose: str) -> None:
+    if _enabled:
+        LLM_ERRORS.inc(provider, purpose)
+
+
+def fetched(source: str, nbytes: int) -> None:
+    if _enabled:
+        FETCHED_BYTES.inc(source, amount=nbytes)
+
+
+def extract_cache(result: str) -> None:
+    if _enabled:
+        EXTRACT_CACHE.inc(result)
+
+
+def lease_renewal(held: bool) -> None:
+    if _enabled:
+        LEASE_RENEWALS.inc("renewed" if held else "lost")
+
+
+def render() -> str:
+    out: list[str] = []
+    with _lock:
+        for metric in _registry:
+            out.extend(metric.header())
+            out.extend(metric.lines())
+    return "\n".join(out) + "\n"
+
+
+def enable(port: int, host: str = "0.0.0.0") -> Optional[threading.Thread]:
+    """Start recording and serve GET /metrics on port; returns the server thread."""
+    global _enabled
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        logger.error("metrics endpoint on :%d failed: %s", port, e)
+        return None
+    server.daemon_threads = True
+    _enabled = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    logger.info("metrics on :%d/metrics", port)
+    return thread
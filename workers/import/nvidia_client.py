@@ -1,36 +1,223 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
 import re
+import threading
+import time
 
 import httpx
 
-NVIDIA_BASE = "https://integrate.api.nvidia.com/v1"
+import llm_usage
+import metrics
+
+NVIDIA_BASE = os.environ.get("NVIDIA_BASE_URL") or "https://integrate.api.nvidia.com/v1"
 logger = logging.getLogger(__name__)
 
 DIFFICULTIES = ("Easy", "Medium", "Advanced")
+TIERS = ("small", "large")
+
+# Per-tier call counters since process start (see tier_stats()).
+_tier_stats: dict[str, dict[str, float]] = {}
+# Per-model JSON parse/validation counters since process start (see parse_stats()).
+_parse_stats: dict[str, dict[str, int]] = {}
+# Poller threads and service requests run jobs concurrently; guards both dicts above.
+_stats_lock = threading.Lock()
+
+
+def _default_model() -> str:
+    return os.environ.get("NVIDIA_MODEL", "meta/llama-3.1-8b-instruct")
+
+
+def tier_model(tier: str | None) -> str:
+    """Model for a tier; NVIDIA_MODEL_SMALL / NVIDIA_MODEL_LARGE fall back to NVIDIA_MODEL."""
+    if tier == "small":
+        return os.environ.get("NVIDIA_MODEL_SMALL") or _default_model()
+    if tier == "large":
+        return os.environ.get("NVIDIA_MODEL_LARGE") or _default_model()
+    return _default_model()
+
+
+def tiering_enabled() -> bool:
+    return tier_model("small") != tier_model("large")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _non_latin_ratio(text: str) -> float:
+    letters = [ch for ch in text[:4000] if ch.isalpha()]
+    if not letters:
+        return 0.0
+    return sum(1 for ch in letters if ord(ch) > 0x24F) / len(letters)
+
+
+def score_difficulty(text: str, *, has_jsonld: bool = False, has_transcript: bool = False) -> int:
+    """Rough extraction difficulty: higher means the small model is likely to struggle."""
+    score = 0
+    if not has_jsonld:
+        score += 2
+    if has_transcript:
+        score += 2
+    if len(text) > 6000:
+        score += 2
+    elif len(text) > 3000:
+        score += 1
+    if _non_latin_ratio(text) > 0.2:
+        score += 2
+    return score
+
+
+def route_tier(text: str, *, has_jsonld: bool = False, has_transcript: bool = False) -> str:
+    """Pick "small" or "large" for an extraction prompt (NVIDIA_TIER_MAX_EASY_SCORE, default 2)."""
+    if not tiering_enabled():
+        return "large"
+    score = score_difficulty(text, has_jsonld=has_jsonld, has_transcript=has_transcript)
+    tier = "small" if score <= _env_int("NVIDIA_TIER_MAX_EASY_SCORE", 2) else "large"
+    logger.info("Extraction difficulty score=%d tier=%s", score, tier)
+    return tier
+
+
+def _tier_row(tier: str) -> dict[str, float]:
+    # caller holds _stats_lock
+    return _tier_stats.setdefault(
+        tier,
+        {"calls": 0, "escalations": 0, "latency_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0},
+    )
 
 
-def chat(prompt: str, *, temperature: float = 0.3, max_tokens: int = 2048) -> str:
+def _record_tier(tier: str, latency: float, usage: dict) -> None:
+    with _stats_lock:
+        stats = _tier_row(tier)
+        stats["calls"] += 1
+        stats["latency_s"] += latency
+        stats["prompt_tokens"] += int(usage.get("prompt_tokens") or 0)
+        stats["completion_tokens"] += int(usage.get("completion_tokens") or 0)
+
+
+def tier_stats() -> dict[str, dict[str, float]]:
+    """Cumulative calls, latency and token spend per tier for this process."""
+    with _stats_lock:
+        return {tier: dict(stats) for tier, stats in _tier_stats.items()}
+
+
+def json_response_format(name: str, schema: dict) -> dict | None:
+    """OpenAI-style response_format for NVIDIA_JSON_MODE (schema | object | off, default off)."""
+    mode = (os.environ.get("NVIDIA_JSON_MODE") or "off").strip().lower()
+    if mode == "schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": schema, "strict": True},
+        }
+    if mode == "object":
+        return {"type": "json_object"}
+    return None
+
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def _http_client() -> httpx.Client:
+    """Process-wide client so keep-alive connections (and TLS sessions) survive between calls."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(timeout=120.0)
+        return _client
+
+
+def _post_with_retries(
+    client: httpx.Client, headers: dict, payload: dict
+) -> tuple[httpx.Response, int]:
+    """POST chat/completions, retrying 429/5xx and transport errors (NVIDIA_MAX_RETRIES, default 2)."""
+    max_retries = _env_int("NVIDIA_MAX_RETRIES", 2)
+    attempt = 0
+    while True:
+        try:
+            res = client.post(f"{NVIDIA_BASE}/chat/completions", headers=headers, json=payload)
+            if res.status_code != 429 and res.status_code < 500:
+                return res, attempt
+            if attempt >= max_retries:
+                return res, attempt
+            logger.warning("NVIDIA %s; retrying (%d/%d)", res.status_code, attempt + 1, max_retries)
+        except httpx.TransportError as e:
+            if attempt >= max_retries:
+                raise
+            logger.warning("NVIDIA transport error %s; retrying (%d/%d)", e, attempt + 1, max_retries)
+        attempt += 1
+        time.sleep(min(2**attempt, 10))
+
+
+def chat(
+    prompt: str,
+    *,
+    temperature: float = 0.3,
+    max_tokens: int = 2048,
+    tier: str | None = None,
+    response_format: dict | None = None,
+    purpose: str = "other",
+) -> str:
     key = os.environ["NVIDIA_API_KEY"]
-    model = os.environ.get("NVIDIA_MODEL", "meta/llama-3.1-8b-instruct")
-    with httpx.Client(timeout=120.0) as client:
-        res = client.post(
-            f"{NVIDIA_BASE}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-            },
-        )
+    model = tier_model(tier)
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if response_format:
+        payload["response_format"] = response_format
+    started = time.monotonic()
+    client = _http_client()
+    headers = {
+        "Authorization": f"Bearer {key}",
+        "Content-Type": "application/json",
+    }
+    try:
+        res, retries = _post_with_retries(client, headers, payload)
+        if response_format and res.status_code in (400, 422):
+            # Model/endpoint without structured output support: fall back to free-form text
+            logger.warning(
+                "NVIDIA rejected response_format for model=%s (%s); retrying without it",
+                model,
+                res.status_code,
+            )
+            payload.pop("response_format")
+            res, more = _post_with_retries(client, headers, payload)
+            retries += more + 1
         res.raise_for_status()
-        data = res.json()
+    except httpx.HTTPError:
+        metrics.llm_error("nvidia", purpose)
+        raise
+    data = res.json()
+    latency = time.monotonic() - started
+    usage = data.get("usage") or {}
+    _record_tier(tier or "default", latency, usage)
+    llm_usage.record_call(
+        purpose,
+        model,
+        latency_s=latency,
+        prompt_tokens=usage.get("prompt_tokens"),
+        completion_tokens=usage.get("completion_tokens"),
+        retries=retries,
+    )
+    logger.info(
+        "NVIDIA chat purpose=%s tier=%s model=%s latency=%.2fs prompt_tokens=%s "
+        "completion_tokens=%s retries=%d",
+        purpose,
+        tier or "default",
+        model,
+        latency,
+        usage.get("prompt_tokens"),
+        usage.get("completion_tokens"),
+        retries,
+    )
     content = (data.get("choices") or [{}])[0].get("message", {}).get("content")
     if not content:
         raise RuntimeError("NVIDIA returned empty content")
@@ -142,20 +329,59 @@ def _normalize_difficulty(raw: str) -> str:
     return ""
 
 
+# (key, prompt hint) for the extraction object; drives both the prompt and the JSON schema.
+_EXTRACT_FIELDS: tuple[tuple[str, str], ...] = (
+    ("title", "Specific dish name (never 'Video by …', 'Untitled', or account name)"),
+    (
+        "description",
+        "1-2 short appetizing sentences about the dish (max ~220 chars). "
+        "NOT ingredients, NOT instructions, NOT portion lists",
+    ),
+    ("ingredients", "markdown or newline-separated list"),
+    ("instructions", "numbered steps"),
+    ("cookTime", 'total minutes as a number string only, e.g. \\"30\\"'),
+    ("difficulty", "Easy|Medium|Advanced"),
+    ("timeReasoning", "brief why that cook time"),
+    ("difficultyReasoning", "brief why that difficulty"),
+    ("imageUrl", "best image url or empty"),
+)
+
+
+def extract_json_schema() -> dict:
+    """JSON schema for the extraction object (keys from _EXTRACT_FIELDS)."""
+    properties: dict[str, dict] = {key: {"type": "string"} for key, _ in _EXTRACT_FIELDS}
+    properties["difficulty"] = {"type": "string", "enum": list(DIFFICULTIES)}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": [key for key, _ in _EXTRACT_FIELDS],
+        "additionalProperties": False,
+    }
+
+
+def _single_string_schema(key: str) -> dict:
+    return {
+        "type": "object",
+        "properties": {key: {"type": "string"}},
+        "required": [key],
+        "additionalProperties": False,
+    }
+
+
+def _validation_schema() -> dict:
+    """Looser check for parsed output: core keys only, extra keys (e.g. tags) allowed."""
+    schema = extract_json_schema()
+    schema["required"] = ["title", "ingredients", "instructions"]
+    schema.pop("additionalProperties")
+    return schema
+
+
 def _shared_extract_rules() -> str:
+    keys = ",\n".join(f'  "{key}": "{hint}"' for key, hint in _EXTRACT_FIELDS)
     return (
         "Return ONLY a JSON object with these keys:\n"
         "{\n"
-        '  "title": "Specific dish name (never \'Video by …\', \'Untitled\', or account name)",\n'
-        '  "description": "1-2 short appetizing sentences about the dish (max ~220 chars). '
-        "NOT ingredients, NOT instructions, NOT portion lists\",\n"
-        '  "ingredients": "markdown or newline-separated list",\n'
-        '  "instructions": "numbered steps",\n'
-        '  "cookTime": "total minutes as a number string only, e.g. \\"30\\"",\n'
-        '  "difficulty": "Easy|Medium|Advanced",\n'
-        '  "timeReasoning": "brief why that cook time",\n'
-        '  "difficultyReasoning": "brief why that difficulty",\n'
-        '  "imageUrl": "best image url or empty"\n'
+        f"{keys}\n"
         "}\n"
         "Rules:\n"
         "- Infer a real recipe title from the content if the source title is generic "
@@ -178,7 +404,14 @@ def _polish_description(title: str, ingredients: str, instructions: str) -> str:
         f"Title: {title}\n\nIngredients:\n{ingredients[:1500]}\n\n"
         f"Instructions:\n{instructions[:1500]}\n\nJSON:"
     )
-    raw = chat(prompt, temperature=0.5, max_tokens=256)
+    raw = chat(
+        prompt,
+        temperature=0.5,
+        max_tokens=256,
+        tier="small",
+        response_format=json_response_format("description", _single_string_schema("desc")),
+        purpose="polish",
+    )
     data = extract_json_object(raw) or {}
     desc = as_text(data.get("desc")) or as_text(raw)
     desc = re.sub(r"^[*`\"']+|[*`\"']+$", "", desc).strip()
@@ -220,6 +453,9 @@ def _finalize_recipe(
             f"Ingredients:\n{ingredients[:1200]}\nJSON:",
             temperature=0.2,
             max_tokens=128,
+            tier="small",
+            response_format=json_response_format("title", _single_string_schema("title")),
+            purpose="title",
         )
         inferred = as_text((extract_json_object(raw) or {}).get("title"))
         if inferred and not _is_generic_title(inferred):
@@ -274,14 +510,137 @@ def _number_instructions(instructions: str) -> str:
     return "\n".join(f"{i}. {p}" for i, p in enumerate(parts, 1))
 
 
+def _record_parse(model: str, event: str) -> None:
+    with _stats_lock:
+        stats = _parse_stats.setdefault(
+            model,
+            {"responses": 0, "parse_failures": 0, "schema_failures": 0, "repairs": 0, "repair_failures": 0},
+        )
+        stats[event] += 1
+
+
+def parse_stats() -> dict[str, dict[str, float]]:
+    """Per-model JSON parse/schema failure counts and parse-failure rate for this process."""
+    with _stats_lock:
+        snapshot = {model: dict(stats) for model, stats in _parse_stats.items()}
+    out: dict[str, dict[str, float]] = {}
+    for model, stats in snapshot.items():
+        row: dict[str, float] = dict(stats)
+        row["parse_failure_rate"] = (
+            round(stats["parse_failures"] / stats["responses"], 4) if stats["responses"] else 0.0
+        )
+        out[model] = row
+    return out
+
+
+def _coerce_extract(data: dict) -> dict:
+    """Fix harmless shape drift (numbers, lists, difficulty case) before schema validation."""
+    from json_util import as_text
+
+    out = dict(data)
+    for key, _ in _EXTRACT_FIELDS:
+        value = out.get(key)
+        if value is not None and not isinstance(value, str):
+            out[key] = as_text(value)
+    difficulty = _normalize_difficulty(as_text(out.get("difficulty")))
+    if difficulty:
+        out["difficulty"] = difficulty
+    return out
+
+
+def _extract_json(prompt: str, tier: str) -> dict:
+    """One extraction call; on parse/schema failure make a single targeted repair call."""
+    from json_util import extract_json_object, schema_errors
+
+    model = tier_model(tier)
+    schema = extract_json_schema()
+    raw = chat(
+        prompt,
+        max_tokens=2500,
+        tier=tier,
+        response_format=json_response_format("recipe", schema),
+        purpose="extract",
+    )
+    _record_parse(model, "responses")
+    parsed = extract_json_object(raw)
+    if parsed is None:
+        _record_parse(model, "parse_failures")
+        errors = ["response is not a JSON object"]
+        data: dict = {}
+    else:
+        data = _coerce_extract(parsed)
+        errors = schema_errors(data, _validation_schema())
+        if errors:
+            _record_parse(model, "schema_failures")
+    if not errors:
+        return data
+
+    logger.info("Extraction JSON invalid (%s); requesting repair", "; ".join(errors[:5]))
+    _record_parse(model, "repairs")
+    repair_prompt = (
+        "Your previous reply did not match the required JSON schema.\n"
+        f"Problems: {'; '.join(errors[:10])}\n"
+        "Return ONLY the corrected JSON object, keeping the same recipe content. "
+        "Use empty strings for unknown values.\n"
+        f"Schema:\n{json.dumps(schema)}\n\n"
+        f"Previous reply:\n{raw[:6000]}\n\nJSON:"
+    )
+    repaired_raw = chat(
+        repair_prompt,
+        temperature=0.0,
+        max_tokens=2500,
+        tier=tier,
+        response_format=json_response_format("recipe", schema),
+        purpose="repair",
+    )
+    repaired = extract_json_object(repaired_raw)
+    if repaired is None:
+        _record_parse(model, "repair_failures")
+        return data
+    repaired = _coerce_extract(repaired)
+    if schema_errors(repaired, _validation_schema()):
+        _record_parse(model, "repair_failures")
+    return repaired
+
+
+def _needs_escalation(data: dict) -> bool:
+    """Small-model output that is unusable as a recipe (no ingredients or generic title)."""
+    from json_util import as_text
+
+    return not as_text(data.get("ingredients")) or _is_generic_title(as_text(data.get("title")))
+
+
+def is_complete_recipe(data: dict, min_ingredients: int = 3, min_steps: int = 2) -> bool:
+    """Finished recipe that needs no more evidence: specific title, ingredient list and steps."""
+    from json_util import as_text
+
+    ingredients = [ln for ln in as_text(data.get("ingredients")).splitlines() if ln.strip()]
+    steps = [ln for ln in as_text(data.get("instructions")).splitlines() if ln.strip()]
+    return (
+        len(ingredients) >= min_ingredients
+        and len(steps) >= min_steps
+        and not _is_generic_title(as_text(data.get("title")))
+    )
+
+
+def _extract_tiered(prompt: str, tier: str) -> dict:
+    """Run an extraction prompt on the routed tier; escalate small → large on bad output."""
+    data = _extract_json(prompt, tier)
+    if tier == "small" and _needs_escalation(data):
+        logger.info("Small-model extraction failed validation; escalating to large tier")
+        with _stats_lock:
+            _tier_row("small")["escalations"] += 1
+        data = _extract_json(prompt, "large")
+    return data
+
+
 def extract_recipe_from_page_text(
     visible_text: str,
     *,
     page_cook_time: str = "",
     known_image_urls: list[str] | None = None,
+    has_jsonld: bool = False,
 ) -> dict:
-    from json_util import extract_json_object
-
     hint = ""
     if page_cook_time:
         hint += f"Page states total time around {page_cook_time} minutes — use that for cookTime unless clearly wrong.\n"
@@ -291,8 +650,8 @@ def extract_recipe_from_page_text(
         f"{hint}"
         f"Page text:\n{visible_text[:8000]}\n\nJSON:"
     )
-    raw = chat(prompt, max_tokens=2500)
-    data = extract_json_object(raw) or {}
+    tier = route_tier(visible_text, has_jsonld=has_jsonld)
+    data = _extract_tiered(prompt, tier)
     result = _finalize_recipe(data, allow_image=True, page_cook_time=page_cook_time)
     result["instructions"] = _number_instructions(result.get("instructions") or "")
     # Drop hallucinated image URLs not found on the page
@@ -306,8 +665,6 @@ def extract_recipe_from_page_text(
 def extract_recipe_from_video(
     title: str, description: str, transcript: str, comments: str = ""
 ) -> dict:
-    from json_util import extract_json_object
-
     body = (
         f"Source title: {title}\n\n"
         f"Source description:\n{description or '(none)'}\n\n"
@@ -326,8 +683,8 @@ def extract_recipe_from_video(
         "When comments include ingredients/steps, treat them as primary recipe source.\n\n"
         f"{body}JSON:"
     )
-    raw = chat(prompt, max_tokens=2500)
-    data = extract_json_object(raw) or {}
+    tier = route_tier(body, has_transcript=bool(transcript))
+    data = _extract_tiered(prompt, tier)
     result = _finalize_recipe(data, source_title=title, allow_image=False)
     result["instructions"] = _number_instructions(result.get("instructions") or "")
     return result
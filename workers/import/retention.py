@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Retention: move old finished ImportJob rows into ImportJobArchive in small, throttled batches.
+
+Runs on a background thread of worker.py (started when idle, every
+RETENTION_INTERVAL_SECONDS) or on its own:
+
+    IMPORT_SCHEMA=metrobistro python retention.py
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+import db
+
+logger = logging.getLogger(__name__)
+
+
+def run_once(schema: Optional[str] = None) -> dict[str, Any]:
+    """Archive batches in schema (default IMPORT_SCHEMA) until one is not full or RETENTION_MAX_SECONDS is spent.
+
+    RETENTION_DAYS: finished jobs older than this are archived (default 30).
+    RETENTION_UNSAVED_DAYS: completed jobs never saved as a recipe are kept until this
+    age (default 0 = kept). Each batch moves at most RETENTION_BATCH_SIZE rows in its
+    own short transaction, followed by a RETENTION_PAUSE_SECONDS pause so row locks
+    and WAL are spread out.
+    """
+    now = datetime.now(timezone.utc)
+    older_than = now - timedelta(days=float(os.environ.get("RETENTION_DAYS", "30")))
+    unsaved_days = float(os.environ.get("RETENTION_UNSAVED_DAYS", "0"))
+    unsaved_older_than = now - timedelta(days=unsaved_days) if unsaved_days > 0 else None
+    batch_size = int(os.environ.get("RETENTION_BATCH_SIZE", "500"))
+    pause = float(os.environ.get("RETENTION_PAUSE_SECONDS", "0.5"))
+    budget = float(os.environ.get("RETENTION_MAX_SECONDS", "300"))
+
+    started = time.monotonic()
+    totals = {"rows": 0, "bytes": 0, "batches": 0, "kept": 0}
+    while time.monotonic() - started < budget:
+        rows, size, kept = db.archive_finished_batch(
+            older_than, unsaved_older_than, batch_size, schema=schema
+        )
+        totals["rows"] += rows
+        totals["bytes"] += size
+        totals["batches"] += 1
+        totals["kept"] += kept
+        if rows + kept < batch_size:
+            break
+        time.sleep(pause)
+    totals["seconds"] = round(time.monotonic() - started, 1)
+    logger.info(
+        "retention %s: archived %d rows (%.1f MB) in %d batches, %.1fs; older than %s",
+        schema or db.default_schema(),
+        totals["rows"],
+        totals["bytes"] / 1e6,
+        totals["batches"],
+        totals["seconds"],
+        older_than.date(),
+    )
+    if totals["kept"]:
+        logger.warning(
+            "retention %s: %d rows left in place (id already archived)",
+            schema or db.default_schema(),
+            totals["kept"],
+        )
+    return totals
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    load_dotenv()
+    load_dotenv(Path(__file__).resolve().parent / ".env")
+    if not os.environ.get("DATABASE_URL"):
+        logger.error("Missing required env DATABASE_URL")
+        return 1
+    run_once()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
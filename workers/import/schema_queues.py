@@ -0,0 +1,123 @@
+"""Weighted fair scheduling of claims across ImportJob schemas served by one poller."""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class SchemaQueue:
+    name: str
+    weight: float = 1.0
+    max_in_flight: int = 0  # 0 = only the poller's WORKER_CONCURRENCY applies
+    in_flight: int = 0
+    pass_value: float = 0.0  # stride-scheduling virtual time; lowest claims next
+    idle_until: float = 0.0
+    claimed: int = 0
+    completed: int = 0
+    failed: int = 0
+    empty_polls: int = 0
+    busy_seconds: float = 0.0
+
+
+def parse(spec: str, default: str) -> list[SchemaQueue]:
+    """IMPORT_SCHEMAS="public:3:2,metrobistro:1:1" → name[:weight[:max_in_flight]]; empty → default only.
+
+    Raises ValueError for a weight that is not > 0 or a given max_in_flight below 1, so a bad
+    spec fails at startup instead of after a job has been claimed.
+    """
+    queues = []
+    for part in (spec or "").split(","):
+        fields = [f.strip() for f in part.split(":")]
+        if not fields[0]:
+            continue
+        entry = f"IMPORT_SCHEMAS entry {part.strip()!r}"
+        try:
+            weight = float(fields[1]) if len(fields) > 1 and fields[1] else 1.0
+            max_in_flight = int(fields[2]) if len(fields) > 2 and fields[2] else 0
+        except ValueError:
+            raise ValueError(f"{entry}: expected name[:weight[:max_in_flight]]") from None
+        if not weight > 0:
+            raise ValueError(f"{entry}: weight must be > 0")
+        if len(fields) > 2 and fields[2] and max_in_flight < 1:
+            raise ValueError(f"{entry}: max_in_flight must be >= 1 (omit it for no cap)")
+        queues.append(SchemaQueue(name=fields[0], weight=weight, max_in_flight=max_in_flight))
+    return queues or [SchemaQueue(name=default)]
+
+
+class SchemaScheduler:
+    """Stride scheduling: each claim advances the schema's pass by 1/weight.
+
+    A schema with work gets claims in proportion to its weight while others also have
+    work; an empty schema is not polled again for idle_seconds, and on its next claim
+    its pass catches up to the current one, so idle time is not banked as a burst.
+    """
+
+    def __init__(self, queues: list[SchemaQueue], idle_seconds: float) -> None:
+        self.queues = queues
+        self.idle_seconds = idle_seconds
+        self._vtime = 0.0
+        self._changed = threading.Condition()
+
+    def candidates(self) -> list[SchemaQueue]:
+        now = time.monotonic()
+        with self._changed:
+            ready = [
+                q for q in self.queues
+                if q.idle_until <= now and (not q.max_in_flight or q.in_flight < q.max_in_flight)
+            ]
+        return sorted(ready, key=lambda q: (q.pass_value, -q.weight))
+
+    def claimed(self, q: SchemaQueue) -> None:
+        with self._changed:
+            self._vtime = max(self._vtime, q.pass_value)
+            q.pass_value = max(q.pass_value, self._vtime) + 1.0 / q.weight
+            q.in_flight += 1
+            q.claimed += 1
+
+    def empty(self, q: SchemaQueue) -> None:
+        with self._changed:
+            q.idle_until = time.monotonic() + self.idle_seconds
+            q.empty_polls += 1
+
+    def finished(self, q: SchemaQueue, ok: bool, seconds: float) -> None:
+        with self._changed:
+            q.in_flight -= 1
+            q.busy_seconds += seconds
+            if ok:
+                q.completed += 1
+            else:
+                q.failed += 1
+            self._changed.notify_all()
+
+    def in_flight(self) -> int:
+        with self._changed:
+            return sum(q.in_flight for q in self.queues)
+
+    def wait(self, until_finished: bool = False) -> None:
+        """Sleep until a job finishes or (unless until_finished) an idle schema is due for a poll."""
+        now = time.monotonic()
+        with self._changed:
+            due = [q.idle_until - now for q in self.queues if q.idle_until > now]
+            if until_finished or not due:
+                self._changed.wait(timeout=self.idle_seconds)
+            else:
+                self._changed.wait(timeout=max(0.05, min(due)))
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._changed:
+            return {
+                q.name: {
+                    "weight": q.weight,
+                    "maxInFlight": q.max_in_flight,
+                    "inFlight": q.in_flight,
+                    "claimed": q.claimed,
+                    "completed": q.completed,
+                    "failed": q.failed,
+                    "emptyPolls": q.empty_polls,
+                    "busySeconds": round(q.busy_seconds, 1),
+                }
+                for q in self.queues
+            }
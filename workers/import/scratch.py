@@ -0,0 +1,149 @@
+"""Per-job scratch directories: unique, byte quotas while yt-dlp/ffmpeg run, always removed."""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import llm_usage
+
+logger = logging.getLogger(__name__)
+
+
+class ScratchQuotaExceeded(RuntimeError):
+    pass
+
+
+def _tree_bytes(path: Path) -> int:
+    """Allocated bytes under path (files being written included, vanished files skipped)."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                else:
+                    st = entry.stat(follow_symlinks=False)
+                    total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+            except OSError:
+                continue
+    return total
+
+
+def scratch_root(work_dir: Path) -> Path:
+    """SCRATCH_DIR if set; /dev/shm/import-worker when SCRATCH_TMPFS=1; else work_dir."""
+    explicit = (os.environ.get("SCRATCH_DIR") or "").strip()
+    if explicit:
+        return Path(explicit)
+    if (os.environ.get("SCRATCH_TMPFS") or "").strip().lower() in ("1", "true", "yes"):
+        shm = Path("/dev/shm")
+        if shm.is_dir():
+            return shm / "import-worker"
+        logger.warning("SCRATCH_TMPFS=1 but /dev/shm is missing; using %s", work_dir)
+    return work_dir
+
+
+def _sweep_stale(root: Path, max_age_s: float) -> None:
+    """Remove job dirs left behind by crashed runs."""
+    cutoff = time.time() - max_age_s
+    for p in root.glob("job-*"):
+        try:
+            if p.is_dir() and p.stat().st_mtime < cutoff:
+                shutil.rmtree(p, ignore_errors=True)
+                logger.info("removed stale scratch dir %s", p)
+        except OSError:
+            continue
+
+
+class JobScratch:
+    """One job's directory plus a watcher that records peak usage and trips the quotas.
+
+    cancel is set when a quota is exceeded; the yt-dlp progress hook and the ffmpeg
+    loop in video_import stop on it. Callers may also set it when the work in this
+    directory is no longer wanted.
+    """
+
+    def __init__(self, root: Path, label: str, job_max: int, global_max: int) -> None:
+        self.root = root
+        self.path = Path(tempfile.mkdtemp(prefix=f"job-{label}-", dir=root))
+        self.job_max = job_max
+        self.global_max = global_max
+        self.peak_bytes = 0
+        self.exceeded: Optional[str] = None
+        self.cancel = threading.Event()
+        self._stop = threading.Event()
+
+    def check(self) -> None:
+        used = _tree_bytes(self.path)
+        self.peak_bytes = max(self.peak_bytes, used)
+        if self.job_max and used > self.job_max:
+            self.exceeded = f"job scratch {used} bytes > SCRATCH_JOB_MAX_BYTES={self.job_max}"
+        elif self.global_max:
+            everyone = _tree_bytes(self.root)
+            if everyone > self.global_max:
+                self.exceeded = f"scratch total {everyone} bytes > SCRATCH_MAX_BYTES={self.global_max}"
+        if self.exceeded:
+            self.cancel.set()
+            raise ScratchQuotaExceeded(self.exceeded)
+
+    def raise_if_exceeded(self) -> None:
+        if self.exceeded:
+            raise ScratchQuotaExceeded(self.exceeded)
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.check()
+            except ScratchQuotaExceeded as e:
+                logger.warning("scratch quota exceeded (%s); cancelling %s", e, self.path)
+                return
+
+
+@contextmanager
+def job_scratch(work_dir: Path, label: str = "video") -> Iterator[JobScratch]:
+    """Unique scratch dir for one job, watched while in use and removed on exit."""
+    root = scratch_root(work_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    _sweep_stale(root, float(os.environ.get("SCRATCH_STALE_SECONDS", "3600")))
+    scratch = JobScratch(
+        root,
+        re.sub(r"[^a-zA-Z0-9_-]+", "_", label)[:40],
+        int(os.environ.get("SCRATCH_JOB_MAX_BYTES", str(512 * 1024 * 1024))),
+        int(os.environ.get("SCRATCH_MAX_BYTES", str(2 * 1024 * 1024 * 1024))),
+    )
+    watcher = threading.Thread(
+        target=scratch._watch,
+        args=(float(os.environ.get("SCRATCH_POLL_SECONDS", "0.5")),),
+        name="scratch-watch",
+        daemon=True,
+    )
+    watcher.start()
+    try:
+        yield scratch
+    finally:
+        scratch._stop.set()
+        watcher.join(timeout=5)
+        try:
+            scratch.check()
+        except ScratchQuotaExceeded:
+            pass
+        shutil.rmtree(scratch.path, ignore_errors=True)
+        logger.info(
+            "scratch %s peak_bytes=%d exceeded=%s", scratch.path.name, scratch.peak_bytes, bool(scratch.exceeded)
+        )
+        llm_usage.note(
+            "scratch",
+            {"peakBytes": scratch.peak_bytes, "quotaBytes": scratch.job_max, "exceeded": bool(scratch.exceeded)},
+        )
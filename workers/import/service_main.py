@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Cloud Run service entry: Pub/Sub push (or {"jobId"}) → process that ImportJob, reply when done.
+
+Unlike job_main.py (one container per import), this process stays up: DB connections,
+HTTP clients and the url/video import modules are warmed once and reused. A request is
+answered only after complete_job/fail_job has been written, so Pub/Sub redelivers on
+crashes or DB errors. At most SERVICE_CONCURRENCY jobs run at once; extra pushes get
+429 and Pub/Sub retries them with backoff.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from dotenv import load_dotenv
+
+import job_main
+import llm_usage
+import startup_profile
+
+logger = logging.getLogger("import-service")
+
+# Replaced by bench/load_service.py; production runs the same job body as job_main
+process_job = job_main.process_job
+
+
+class JobService:
+    """Claim → process → complete/fail for pushed job ids, bounded by a concurrency limit."""
+
+    def __init__(self, concurrency: int, worker_id: str, lease_seconds: int) -> None:
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.concurrency = concurrency
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.in_flight = 0
+        self.handled = 0
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        """Import the job modules and open DB connections before the first push arrives."""
+        db = job_main._load("db")
+        db.enable_pool(self.concurrency + 1)
+        for name in ("nvidia_client", "url_import", "video_import"):
+            job_main._load(name)
+        try:
+            db.ping()
+        except Exception as e:
+            logger.warning("DB warm-up failed (will connect on first job): %s", e)
+        logger.info("warm: loads_ms=%s", job_main._loads_ms)
+
+    def handle(self, body: bytes) -> tuple[int, str]:
+        """HTTP status + message; 2xx acks the push, anything else makes Pub/Sub redeliver."""
+        job_id = job_main.job_id_from_payload(body.decode("utf-8", errors="replace"))
+        if not job_id:
+            # Redelivering a malformed message can never succeed; ack and drop it
+            logger.error("dropping push without jobId: %r", body[:200])
+            return 204, "no jobId"
+        if not self.slots.acquire(blocking=False):
+            return 429, "busy"
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._run(job_id)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.handled += 1
+            self.slots.release()
+
+    def _run(self, job_id: str) -> tuple[int, str]:
+        db = job_main._load("db")
+        started = time.perf_counter()
+        usage = llm_usage.begin(job_id)
+        job = db.claim_job_by_id(job_id, self.worker_id, self.lease_seconds)
+        if not job:
+            existing = db.get_job(job_id)
+            if existing is None or existing.get("status") in ("completed", "failed"):
+                logger.info("job %s %s; acking", job_id, existing["status"] if existing else "missing")
+                return 204, "nothing to do"
+            # Someone else holds an unexpired lease; let Pub/Sub retry after it ends or expires
+            return 409, "leased by another worker"
+        try:
+            process_job(job)
+            status = 200, "completed"
+        except Exception as e:
+            logger.error("job %s failed: %s", job_id, e)
+            logger.debug(traceback.format_exc())
+            # If this write fails the exception propagates → 500 → redelivery reclaims after lease
+            db.fail_job(job_id, str(e), llm_usage.job_metrics(job_id, job["url"], usage), schema=job.get("schema"))
+            status = 200, "failed"
+        logger.info("job %s %s in %.1fs", job_id, status[1], time.perf_counter() - started)
+        return status
+
+
+def make_handler(service: JobService) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+        def _send(self, status: int, message: str) -> None:
+            body = message.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.startswith("/healthz"):
+                self._send(200, f"ok in_flight={service.in_flight} handled={service.handled}")
+            else:
+                self._send(404, "not found")
+
+        def do_POST(self) -> None:  # noqa: N802
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            try:
+                status, message = service.handle(body)
+            except Exception as e:
+                logger.error("push handling failed: %s", e)
+                status, message = 500, "error"
+            self._send(status, message)
+
+    return Handler
+
+
+def serve(service: JobService, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("0.0.0.0", port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main() -> int:
+    load_dotenv()
+    load_dotenv(Path(__file__).resolve().parent / ".env")
+    for req in ("DATABASE_URL", "NVIDIA_API_KEY"):
+        if not os.environ.get(req):
+            logger.error("Missing required env %s", req)
+            return 1
+
+    service = JobService(
+        concurrency=job_main.env_int("SERVICE_CONCURRENCY", 4),
+        worker_id=os.environ.get("WORKER_ID") or socket.gethostname(),
+        lease_seconds=job_main.env_int("LEASE_SECONDS", 900),
+    )
+    service.warm()
+    if startup_profile.enabled():
+        # Importing job_main installed the import hook; the service must not keep it while serving
+        startup_profile.uninstall()
+        ready_ms = (time.perf_counter() - job_main._STARTED) * 1000
+        profile = startup_profile.report(dict(job_main._loads_ms), ready_ms)
+        profile["timeToReadyMs"] = profile.pop("timeToClaimMs")
+        logger.info("startup profile: %s", json.dumps(profile))
+    port = job_main.env_int("PORT", 8080)
+    server = serve(service, port)
+    # Cloud Run sends SIGTERM before stopping; unfinished jobs are reclaimed after their lease
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    logger.info("import service on :%d concurrency=%d worker=%s", port, service.concurrency, service.worker_id)
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
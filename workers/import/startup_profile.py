@@ -0,0 +1,64 @@
+"""Cold-start profiling for job_main: per-module import time (like -X importtime) and time-to-claim."""
+from __future__ import annotations
+
+import builtins
+import os
+import sys
+import time
+from typing import Any, Optional
+
+_orig_import = builtins.__import__
+_rows: dict[str, dict[str, float]] = {}
+_stack: list[float] = []
+
+
+def enabled() -> bool:
+    return (os.environ.get("STARTUP_PROFILE") or "").strip().lower() in ("1", "true", "yes")
+
+
+def _profiled_import(name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> Any:
+    if level or name in sys.modules:
+        return _orig_import(name, globals, locals, fromlist, level)
+    started = time.perf_counter()
+    _stack.append(0.0)
+    try:
+        return _orig_import(name, globals, locals, fromlist, level)
+    finally:
+        children = _stack.pop()
+        total = time.perf_counter() - started
+        if _stack:
+            _stack[-1] += total
+        _rows.setdefault(name, {"selfMs": round((total - children) * 1000, 2), "cumulativeMs": round(total * 1000, 2)})
+
+
+def install() -> None:
+    """Time every first-time `import` statement from here on (single-threaded startup only)."""
+    builtins.__import__ = _profiled_import
+
+
+def uninstall() -> None:
+    builtins.__import__ = _orig_import
+
+
+def since_process_start_ms() -> Optional[float]:
+    """Wall time since the process was exec'd (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat", encoding="ascii") as f:
+            btime = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        started = btime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+    return round((time.time() - started) * 1000, 1)
+
+
+def report(loads_ms: dict[str, float], time_to_claim_ms: float, top: int = 25) -> dict[str, Any]:
+    """Explicit lazy loads, slowest imported modules by cumulative time, and time-to-claim."""
+    slowest = sorted(_rows.items(), key=lambda kv: kv[1]["cumulativeMs"], reverse=True)[:top]
+    return {
+        "timeToClaimMs": round(time_to_claim_ms, 1),
+        "sinceProcessStartMs": since_process_start_ms(),
+        "loadsMs": loads_ms,
+        "imports": dict(slowest),
+    }
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Worker modules are flat (imported by name from workers/import)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,27 @@
+import pytest
+
+import audio_chunks
+
+
+def test_cuts_in_silence():
+    windows = audio_chunks.plan_chunks(1000.0, [(590.0, 592.0)], 600.0, 2.0)
+    assert windows == [(0.0, 591.0), (591.0, 1000.0)]
+
+
+def test_hard_cut_overlaps():
+    windows = audio_chunks.plan_chunks(1000.0, [], 600.0, 2.0)
+    assert windows == [(0.0, 600.0), (598.0, 1000.0)]
+
+
+@pytest.mark.parametrize("overlap", [600.0, 900.0])
+def test_overlap_not_below_window_still_terminates(overlap):
+    windows = audio_chunks.plan_chunks(3000.0, [], 600.0, overlap)
+    assert windows[-1][1] == 3000.0
+    assert all(end - start <= 600.0 for start, end in windows)
+    assert all(b[0] > a[0] for a, b in zip(windows, windows[1:]))
+    assert len(windows) < 20
+
+
+def test_rejects_non_positive_window():
+    with pytest.raises(ValueError):
+        audio_chunks.plan_chunks(100.0, [], 0.0, 2.0)
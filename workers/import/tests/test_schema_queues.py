@@ -0,0 +1,15 @@
+import pytest
+
+import schema_queues
+
+
+def test_parse_defaults_and_fields():
+    queues = schema_queues.parse("public:3:2,metrobistro", "public")
+    assert [(q.name, q.weight, q.max_in_flight) for q in queues] == [("public", 3.0, 2), ("metrobistro", 1.0, 0)]
+    assert [q.name for q in schema_queues.parse("", "public")] == ["public"]
+
+
+@pytest.mark.parametrize("spec", ["metrobistro:0", "public:-1", "public:abc", "public:1:0", "public:1:x"])
+def test_parse_rejects_bad_entries(spec):
+    with pytest.raises(ValueError, match="IMPORT_SCHEMAS"):
+        schema_queues.parse(spec, "public")
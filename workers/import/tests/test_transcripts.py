@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import transcripts
+import video_import
+
+REPLAY = Path(__file__).resolve().parent.parent / "bench" / "corpus" / "replay"
+
+
+def test_punctuated_captions_one_sentence_per_line():
+    text = transcripts.compact(["Heat the oil. Add the onions", "and cook them. Serve."])
+    assert text.splitlines() == ["Heat the oil.", "Add the onions and cook them.", "Serve."]
+
+
+def test_unpunctuated_captions_are_broken_into_lines():
+    words = "mix the flour and water then cover it and leave it overnight " * 10
+    lines = transcripts.compact([words]).splitlines()
+    assert len(lines) > 1
+    assert all(len(line.split()) <= transcripts.MAX_LINE_WORDS for line in lines)
+    assert " ".join(lines).split() == words.split()
+
+
+def test_replay_caption_fixture_keeps_bound_words_together():
+    raw = (REPLAY / "video_captions" / "dQw4cooking.en.srt").read_text(encoding="utf-8")
+    lines = transcripts.compact(video_import._subtitle_text(raw).splitlines()).splitlines()
+    assert "add all that garlic and cook it gently don't let it burn" in lines
+    assert "stir in oyster sauce soy sauce and sugar" in lines
@@ -0,0 +1,192 @@
+"""Per-job stage spans (nested, with attributes), summarized into job metrics and exported as OTLP/JSON.
+
+Spans live in a ContextVar, so threads started with contextvars.copy_context() (Groq
+chunks, speculative audio) nest under the span that was current when they were
+submitted. Outside a job, span() yields a shared no-op span.
+
+TRACE_EXPORT selects where finished job traces go: off (default; only the summary
+in ImportJob.metrics.stages), file (append one OTLP/JSON ExportTraceServiceRequest per
+line to TRACE_FILE), or otlp (POST it to TRACE_OTLP_ENDPOINT, an OTLP/HTTP collector).
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "import-worker"
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attrs", "error")
+
+    def __init__(self, trace: Optional["Trace"], name: str, parent_id: str, attrs: dict[str, Any]) -> None:
+        self.trace = trace
+        self.span_id = os.urandom(8).hex() if trace else ""
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        if self.trace is not None:
+            self.attrs.update(attrs)
+
+
+class Trace:
+    """All spans of one job; appended to from several threads."""
+
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+        self.trace_id = os.urandom(16).hex()
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+_NOOP = Span(None, "", "", {})
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time a stage under the current span; exceptions mark it failed and propagate."""
+    parent = _current.get()
+    if parent is None or parent.trace is None:
+        yield _NOOP
+        return
+    s = Span(parent.trace, name, parent.span_id, attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        _current.reset(token)
+        s.end_ns = time.time_ns()
+        parent.trace.add(s)
+
+
+def record(name: str, duration_s: float, **attrs: Any) -> None:
+    """Add an already finished child span ending now (e.g. an HTTP call timed by its client)."""
+    parent = _current.get()
+    if parent is None or parent.trace is None:
+        return
+    s = Span(parent.trace, name, parent.span_id, {k: v for k, v in attrs.items() if v is not None})
+    s.end_ns = time.time_ns()
+    s.start_ns = s.end_ns - int(duration_s * 1e9)
+    parent.trace.add(s)
+
+
+def summary(trace: Trace) -> dict[str, Any]:
+    """Wall ms per span name (summed when repeated, e.g. Whisper chunks), plus repeat counts and errors."""
+    ms: dict[str, int] = {}
+    counts: dict[str, int] = {}
+    errors: list[str] = []
+    for s in sorted(trace.spans, key=lambda s: s.start_ns):
+        if not s.end_ns:
+            continue
+        ms[s.name] = ms.get(s.name, 0) + (s.end_ns - s.start_ns) // 1_000_000
+        counts[s.name] = counts.get(s.name, 0) + 1
+        if s.error:
+            errors.append(f"{s.name}: {s.error}")
+    out: dict[str, Any] = {"ms": ms}
+    repeated = {k: n for k, n in counts.items() if n > 1}
+    if repeated:
+        out["counts"] = repeated
+    if errors:
+        out["errors"] = errors[:5]
+    return out
+
+
+def _attr_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest for one job."""
+    spans = []
+    for s in trace.spans:
+        item: dict[str, Any] = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": _attr_value(v)} for k, v in s.attrs.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        spans.append(item)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def export(trace: Trace) -> None:
+    """Send the trace per TRACE_EXPORT; failures are logged, never raised."""
+    mode = (os.environ.get("TRACE_EXPORT") or "off").strip().lower()
+    if mode in ("", "off", "0", "false"):
+        return
+    try:
+        body = json.dumps(to_otlp(trace))
+        if mode == "file":
+            path = os.environ.get("TRACE_FILE") or "/tmp/import-traces.jsonl"
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(body + "\n")
+        elif mode == "otlp":
+            import httpx
+
+            endpoint = os.environ.get("TRACE_OTLP_ENDPOINT") or "http://localhost:4318/v1/traces"
+            httpx.post(endpoint, content=body, headers={"Content-Type": "application/json"}, timeout=2.0)
+        else:
+            logger.warning("unknown TRACE_EXPORT=%r", mode)
+    except Exception as e:
+        logger.warning("trace export failed: %s", e)
+
+
+@contextmanager
+def job(job_id: str, **attrs: Any) -> Iterator[Span]:
+    """Root span for one import; on exit notes the stage summary on the job's metrics and exports."""
+    import llm_usage  # imports this module for record(); resolved at call time
+
+    trace = Trace(job_id)
+    root = Span(trace, "import", "", {"job.id": job_id, **attrs})
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        _current.reset(token)
+        root.end_ns = time.time_ns()
+        trace.add(root)
+        llm_usage.note("stages", summary(trace))
+        export(trace)
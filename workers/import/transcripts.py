@@ -0,0 +1,94 @@
+"""Caption/transcript compaction before extraction: rolling duplicates, filler, token budget."""
+from __future__ import annotations
+
+import re
+
+# [Music], [Applause], (laughs), ♪ notes, >> speaker-change marks
+_FILLER = re.compile(r"\[[^\]]{1,30}\]|\((?:music|applause|laughs?|laughter|inaudible)\)|♪+|>>", re.IGNORECASE)
+_NORM = re.compile(r"[^\w']+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'¡¿])")
+# Auto-generated captions have no punctuation; long runs are broken before these words
+# (sequencing words and the imperatives recipe steps start with), else at MAX_LINE_WORDS
+_BREAK_BEFORE = frozenset(
+    "then now next so after once okay alright first finally meanwhile add bake beat boil bring chop combine "
+    "cook cover cut drain fold fry heat let melt mix place pour preheat put remove season serve simmer slice "
+    "sprinkle stir take toss transfer turn whisk".split()
+)
+# ...unless the previous word binds to it ("don't let", "before you slice", "and fold")
+_NO_BREAK_AFTER = frozenset("don't dont not never to you we i and will can should just please".split())
+MIN_LINE_WORDS = 6
+MAX_LINE_WORDS = 24
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token for English prose)."""
+    return (len(text) + 3) // 4
+
+
+def _norm(word: str) -> str:
+    return _NORM.sub("", word.lower())
+
+
+def merge_overlapping(pieces: list[str], max_overlap_words: int = 30) -> list[str]:
+    """Words of pieces joined in order, dropping each piece's head that repeats the text so far.
+
+    Covers rolling auto-caption windows (each cue repeats the previous line) and audio
+    chunks cut with overlap. Overlaps shorter than two words only count when they are
+    the whole piece, so ordinary repeated words survive.
+    """
+    out: list[str] = []
+    normed: list[str] = []
+    for piece in pieces:
+        words = [w for w in piece.split() if _norm(w)]
+        if not words:
+            continue
+        head = [_norm(w) for w in words[:max_overlap_words]]
+        tail = normed[-max_overlap_words:]
+        drop = 0
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k] and (k >= 2 or k == len(words)):
+                drop = k
+                break
+        out.extend(words[drop:])
+        normed.extend(_norm(w) for w in words[drop:])
+    return out
+
+
+def _break_long(sentence: str) -> list[str]:
+    """Unpunctuated run → lines of MIN..MAX_LINE_WORDS words, cut before a step-like word."""
+    words = sentence.split()
+    if len(words) <= MAX_LINE_WORDS:
+        return [sentence]
+    out: list[str] = []
+    line: list[str] = []
+    for word in words:
+        step_start = _norm(word) in _BREAK_BEFORE and _norm(line[-1] if line else "") not in _NO_BREAK_AFTER
+        if len(line) >= MAX_LINE_WORDS or (len(line) >= MIN_LINE_WORDS and step_start):
+            out.append(" ".join(line))
+            line = []
+        line.append(word)
+    if line:
+        out.append(" ".join(line))
+    return out
+
+
+def compact(lines: list[str]) -> str:
+    """Caption lines → deduplicated running text, one sentence per line.
+
+    Sentences come from punctuation; unpunctuated auto-captions are broken by _break_long.
+    """
+    cleaned = [" ".join(_FILLER.sub(" ", line).split()) for line in lines]
+    text = " ".join(merge_overlapping([c for c in cleaned if c]))
+    return "\n".join(
+        line for s in _SENTENCE_END.split(text) if s.strip() for line in _break_long(s.strip())
+    )
+
+
+def fit_budget(text: str, max_tokens: int) -> str:
+    """Trim to about max_tokens, keeping the opening (ingredients) and the ending (final steps)."""
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text
+    budget_chars = max_tokens * 4
+    head = text[: int(budget_chars * 0.7)].rsplit(" ", 1)[0]
+    tail = text[-int(budget_chars * 0.3) :].split(" ", 1)[-1]
+    return f"{head}\n[…]\n{tail}"
@@ -3,12 +3,17 @@ from __future__ import annotations
 import logging
 import re
 from typing import Callable
+from urllib.parse import urlparse
 
 import httpx
 from bs4 import BeautifulSoup, Comment
 
+import extract_cache
+import llm_usage
+import metrics
 import nvidia_client
 import page_signals
+import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -105,24 +110,58 @@ def _fetch_html(url: str) -> str:
 def import_from_url(url: str, on_step: Callable[[str], None]) -> dict:
     on_step("fetching")
     logger.info("httpx fetch: %s", url)
-    html = _fetch_html(url)
-
-    soup = BeautifulSoup(html, "html.parser")
-    jsonld = page_signals.extract_json_ld_recipe(soup)
-    visible = page_signals.format_jsonld_hint(jsonld) + _clean_html(soup)
-    page_cook = page_signals.extract_cook_time_from_text(visible) or jsonld.get("cookTime")
-    candidates = page_signals.collect_image_candidates(soup, url)
-    if jsonld.get("imageUrl"):
-        candidates = [jsonld["imageUrl"]] + candidates
-    best_image = page_signals.select_best_image(candidates)
+    with tracing.span("fetch", host=urlparse(url).hostname or "") as span:
+        html = _fetch_html(url)
+        span.set(bytes=len(html))
+        metrics.fetched("html", len(html))
+
+    with tracing.span("parse"):
+        soup = BeautifulSoup(html, "html.parser")
+    with tracing.span("jsonld") as span:
+        jsonld = page_signals.extract_json_ld_recipe(soup)
+        span.set(found=bool(jsonld))
+    with tracing.span("clean") as span:
+        visible = page_signals.format_jsonld_hint(jsonld) + _clean_html(soup)
+        span.set(chars=len(visible))
+    with tracing.span("images") as span:
+        page_cook = page_signals.extract_cook_time_from_text(visible) or jsonld.get("cookTime")
+        candidates = page_signals.collect_image_candidates(soup, url)
+        if jsonld.get("imageUrl"):
+            candidates = [jsonld["imageUrl"]] + candidates
+        best_image = page_signals.select_best_image(candidates)
+        span.set(candidates=len(candidates))
 
     on_step("extracting")
-    result = nvidia_client.extract_recipe_from_page_text(
-        visible,
-        page_cook_time=str(page_cook) if page_cook else "",
-        known_image_urls=candidates,
-    )
+    fp = hit = None
+    if extract_cache.enabled():
+        with tracing.span("extract.cache") as span:
+            fp = extract_cache.fingerprint(visible)
+            hit = extract_cache.lookup(fp) if fp else None
+            span.set(hit=hit is not None)
+        metrics.extract_cache("skip" if fp is None else "hit" if hit else "miss")
+    if hit is not None:
+        # hit.url is another user's import (maybe a private share link): never log or store it here
+        logger.info("extract cache hit similarity=%.2f", hit.similarity)
+        llm_usage.note("extractCache", {"hit": True, "similarity": hit.similarity})
+        result = hit.result
+    else:
+        with tracing.span("extract"):
+            result = nvidia_client.extract_recipe_from_page_text(
+                visible,
+                page_cook_time=str(page_cook) if page_cook else "",
+                known_image_urls=candidates,
+                has_jsonld=bool(jsonld),
+            )
+        if fp is not None and (result.get("title") or result.get("ingredients")):
+            extract_cache.store(fp, result, url)
+
+    with tracing.span("finalize"):
+        _finalize(result, jsonld, candidates, best_image, page_cook)
+    return result
 
+
+def _finalize(result: dict, jsonld: dict, candidates: list[str], best_image: str, page_cook: object) -> None:
+    """Reconcile the LLM result with page signals (images, JSON-LD fields, cook time) in place."""
     # Prefer scraper/JSON-LD images over hallucinated LLM URLs
     llm_image = (result.get("imageUrl") or "").strip()
     if llm_image and candidates and llm_image not in candidates:
@@ -154,5 +193,3 @@ def import_from_url(url: str, on_step: Callable[[str], None]) -> dict:
     ):
         result["cookTime"] = str(page_cook)
         result["timeReasoning"] = "Extracted from page text / structured data."
-
-    return result
@@ -0,0 +1,115 @@
+"""On-disk cache of video metadata + transcript keyed by (extractor, video id).
+
+Off unless VIDEO_CACHE_DIR is set: on Cloud Run /tmp is memory-backed and a job execution
+starts with it empty, so only a persistent directory (poller disk, mounted volume) pays off.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ("title", "description", "transcript", "thumbnail", "comments")
+
+
+def _cache_dir() -> Optional[Path]:
+    raw = (os.environ.get("VIDEO_CACHE_DIR") or "").strip()
+    if not raw or raw.lower() == "off":
+        return None
+    return Path(raw)
+
+
+def enabled() -> bool:
+    return _cache_dir() is not None
+
+
+def video_key(url: str) -> Optional[tuple[str, str]]:
+    """(extractor key, video id) from the URL alone, without network; None for generic pages."""
+    from yt_dlp.extractor import gen_extractor_classes
+
+    for ie in gen_extractor_classes():
+        if ie.suitable(url):
+            if ie.ie_key() == "Generic":
+                return None
+            video_id = ie.get_temp_id(url)
+            return (ie.ie_key(), str(video_id)) if video_id else None
+    return None
+
+
+def _path(root: Path, key: tuple[str, str]) -> Path:
+    digest = hashlib.sha256(f"{key[0]}:{key[1]}".encode()).hexdigest()[:32]
+    return root / f"{digest}.json"
+
+
+def get(key: tuple[str, str]) -> Optional[dict[str, str]]:
+    """Cached entry for key if present and younger than VIDEO_CACHE_TTL_SECONDS."""
+    root = _cache_dir()
+    if root is None:
+        return None
+    path = _path(root, key)
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    ttl = float(os.environ.get("VIDEO_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    if entry.get("key") != list(key) or time.time() - float(entry.get("storedAt") or 0) > ttl:
+        path.unlink(missing_ok=True)
+        return None
+    try:
+        os.utime(path)  # mtime is the LRU clock for eviction
+    except OSError:
+        return None  # evicted by another worker since the read
+    return {f: entry.get(f) or "" for f in _FIELDS}
+
+
+def put(key: tuple[str, str], **fields: Any) -> None:
+    """Store an entry (atomic replace), then evict least recently used files over VIDEO_CACHE_MAX_BYTES."""
+    root = _cache_dir()
+    if root is None:
+        return
+    entry = {"key": list(key), "storedAt": time.time()}
+    entry.update({f: fields.get(f) or "" for f in _FIELDS})
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        path = _path(root, key)
+        # Unique per writer: worker threads in one process may cache the same video at once
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=root, prefix=path.stem + ".", suffix=".tmp", delete=False
+        ) as f:
+            tmp = Path(f.name)
+            try:
+                json.dump(entry, f, ensure_ascii=False)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+        os.replace(tmp, path)
+        _evict(root, int(os.environ.get("VIDEO_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+    except OSError as e:
+        logger.warning("video cache write failed for %s:%s: %s", key[0], key[1], e)
+
+
+def _evict(root: Path, max_bytes: int) -> None:
+    files = []
+    for p in root.glob("*.json"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in files)
+    evicted = 0
+    for _, size, p in sorted(files, key=lambda f: f[0]):
+        if total <= max_bytes:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+        evicted += 1
+    if evicted:
+        logger.info("video cache evicted=%d bytes=%d", evicted, total)
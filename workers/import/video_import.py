@@ -1,28 +1,55 @@
 from __future__ import annotations
 
-import json
+import contextvars
 import logging
 import os
 import re
 import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
 from pathlib import Path
-from typing import Callable, Optional, Tuple
+from typing import Any, Callable, Optional, Tuple
 
+import yt_dlp
+
+import audio_chunks
 import groq_client
+import metrics
 import nvidia_client
+import scratch
+import tracing
+import transcripts
+import video_cache
 
 logger = logging.getLogger(__name__)
 
+SUB_LANGS = ["en.*", "zh.*", "es.*", "en", "zh", "es"]
+# Formats ffmpeg can read straight from the resolved URL (no yt-dlp fragment downloader needed)
+_STREAMABLE_PROTOCOLS = ("http", "https", "m3u8", "m3u8_native")
+_VTT_HEADER = re.compile(r"^(WEBVTT|Kind:|Language:|NOTE\b|STYLE\b)")
+_CUE_TIMING = re.compile(r"^(\d{2}:)?\d{2}:\d{2}[,.]\d{3}\s*-->\s*")
+_INLINE_TAG = re.compile(r"<[^>]+>")
+_MEASURE = re.compile(
+    r"\b(\d+\s*/\s*\d+|\d+(?:\.\d+)?|½|¼|¾)\s*"
+    r"(cups?|tbsps?|tsps?|tablespoons?|teaspoons?|g|grams?|kg|ml|l|oz|lbs?|cloves?|pinch|eggs?)\b",
+    re.IGNORECASE,
+)
+
 
-def _srt_to_text(srt_path: Path) -> str:
+def _subtitle_text(raw: str) -> str:
+    """SRT or WebVTT body → caption lines (no cue numbers, timings or inline tags)."""
     lines = []
-    for line in srt_path.read_text(encoding="utf-8", errors="replace").splitlines():
+    for line in raw.splitlines():
         line = line.strip()
-        if not line or line.isdigit() or line == "WEBVTT":
+        if not line or line.isdigit() or _VTT_HEADER.match(line):
             continue
-        if re.match(r"^\d{2}:\d{2}:\d{2}[,.]\d{3}\s*-->\s*", line):
+        if _CUE_TIMING.match(line):
             continue
-        lines.append(line)
+        line = _INLINE_TAG.sub("", line).strip()
+        if line:
+            lines.append(line)
     return "\n".join(lines).strip()
 
 
@@ -45,138 +72,471 @@ def _comments_from_same_user(comments: list, max_count: int = 2) -> str:
     return "\n".join(lines)
 
 
-def _download(url: str, work_dir: Path) -> Tuple[str, str, str, Optional[Path], str, str]:
-    """
-    Returns title, description, transcript, audio_path, thumbnail_url, comments_text.
-    Prefers subtitles; downloads audio when no subtitle.
-    """
-    work_dir.mkdir(parents=True, exist_ok=True)
+def _looks_like_ingredients(text: str) -> bool:
+    """Ingredient list present: an 'ingredients' heading or several quantity + unit mentions."""
+    if re.search(r"\bingredients?\b", text, re.IGNORECASE):
+        return True
+    return len(_MEASURE.findall(text)) >= 3
+
+
+def _comments_mode() -> str:
+    """VIDEO_COMMENTS: adaptive (default, only when needed), always, or off."""
+    mode = (os.environ.get("VIDEO_COMMENTS") or "adaptive").strip().lower()
+    return mode if mode in ("adaptive", "always", "off") else "adaptive"
+
+
+def _ydl_params(work_dir: Path) -> dict[str, Any]:
+    """Options for the single in-process yt-dlp session used per video."""
+    params: dict[str, Any] = {
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "socket_timeout": float(os.environ.get("YTDLP_SOCKET_TIMEOUT", "30")),
+        "format": "bestaudio/best",
+        "outtmpl": str(work_dir / "audio.%(ext)s"),
+        "writesubtitles": True,
+        "writeautomaticsub": True,
+        "subtitleslangs": SUB_LANGS,
+        "subtitlesformat": "srt/vtt/best",
+        # Comments are extracted lazily (see _metadata); top sort surfaces the pinned uploader comment
+        "getcomments": _comments_mode() != "off",
+        "extractor_args": {
+            "youtube": {
+                "max_comments": [os.environ.get("VIDEO_MAX_COMMENTS", "10"), "all", "0"],
+                "comment_sort": ["top"],
+            }
+        },
+    }
     cookies = os.environ.get("YTDLP_COOKIES", "").strip()
-    cmd = [
-        "yt-dlp",
-        "--write-info-json",
-        "--write-auto-sub",
-        "--write-sub",
-        "--write-comments",
-        "--extractor-args",
-        "youtube:max-comments=50",
-        "--sub-langs",
-        "en.*,zh.*,es.*,en,zh,es",
-        "--skip-download",
-        "--convert-subs",
-        "srt",
-        "-o",
-        str(work_dir / "%(id)s.%(ext)s"),
-        url,
-    ]
     if cookies and Path(cookies).is_file():
-        cmd[1:1] = ["--cookies", cookies]
+        params["cookiefile"] = cookies
+    return params
 
-    logger.info("yt-dlp metadata/subs: %s", url)
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-    if result.returncode != 0:
-        logger.warning("yt-dlp skip-download stderr: %s", (result.stderr or "")[:800])
-
-    info_files = list(work_dir.glob("*.info.json"))
-    title = ""
-    description = ""
-    thumb = ""
-    comments_text = ""
-    if info_files:
-        info = json.loads(info_files[0].read_text(encoding="utf-8"))
-        title = info.get("title") or ""
-        description = info.get("description") or ""
-        thumb = info.get("thumbnail") or ""
-        comments_text = _comments_from_same_user(info.get("comments") or [])
 
-    transcript = ""
-    for srt in work_dir.glob("*.srt"):
-        transcript = _srt_to_text(srt)
-        if transcript:
-            break
+def _rank_subtitle_tracks(info: dict[str, Any]) -> list[tuple[str, dict[str, Any]]]:
+    """Requested tracks, best first: uploaded before auto-generated, original-language auto
+    captions before machine translations, then SUB_LANGS order."""
+    manual = info.get("subtitles") or {}
+    original = (info.get("language") or "").lower()
 
-    audio_path: Optional[Path] = None
-    if not transcript:
-        # Need audio for Groq Whisper — some platforms require cookies from cloud IPs
-        audio_cmd = [
-            "yt-dlp",
-            "-x",
-            "--audio-format",
-            "mp3",
-            "--audio-quality",
-            "5",
-            "-o",
-            str(work_dir / "audio.%(ext)s"),
-            url,
-        ]
-        if cookies and Path(cookies).is_file():
-            audio_cmd[1:1] = ["--cookies", cookies]
-        logger.info("yt-dlp audio download: %s", url)
-        ar = subprocess.run(audio_cmd, capture_output=True, text=True, timeout=600)
-        if ar.returncode != 0:
-            err = (ar.stderr or ar.stdout or "yt-dlp audio failed")[:1500]
-            raise RuntimeError(
-                "Failed to get captions or audio. For YouTube from cloud IPs, "
-                f"export cookies to YTDLP_COOKIES. Detail: {err}"
+    def lang_rank(lang: str) -> int:
+        base = lang.lower().split("-")[0]
+        for i, pattern in enumerate(SUB_LANGS):
+            if re.fullmatch(pattern, lang) or re.fullmatch(pattern, base):
+                return i
+        return len(SUB_LANGS)
+
+    def score(item: tuple[str, dict[str, Any]]) -> tuple[int, int, int]:
+        lang = item[0]
+        is_original = lang.endswith("-orig") or (original and lang.lower().split("-")[0] == original)
+        return (0 if lang in manual else 1, 0 if is_original else 1, lang_rank(lang))
+
+    return sorted((info.get("requested_subtitles") or {}).items(), key=score)
+
+
+def _subtitles_from_info(ydl: yt_dlp.YoutubeDL, info: dict[str, Any]) -> str:
+    """Fetch the best subtitle track in memory through the same session, compacted."""
+    for lang, sub in _rank_subtitle_tracks(info):
+        try:
+            raw = sub.get("data")
+            if raw is None:
+                raw = ydl.urlopen(sub["url"]).read().decode("utf-8", errors="replace")
+        except Exception as e:
+            logger.warning("subtitle %s fetch failed: %s", lang, e)
+            continue
+        lines = _subtitle_text(raw).splitlines()
+        text = transcripts.compact(lines)
+        if text:
+            logger.info(
+                "subtitles lang=%s lines=%d tokens_raw=%d tokens_compact=%d",
+                lang,
+                len(lines),
+                transcripts.estimate_tokens(" ".join(lines)),
+                transcripts.estimate_tokens(text),
             )
-        candidates = list(work_dir.glob("audio.*"))
-        if not candidates:
-            raise RuntimeError("yt-dlp did not produce an audio file")
-        audio_path = candidates[0]
-        # Normalize to wav 16k mono for Groq
-        wav = work_dir / "for-groq.wav"
-        ff = subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                str(audio_path),
-                "-ac",
-                "1",
-                "-ar",
-                "16000",
-                str(wav),
-            ],
-            capture_output=True,
-            text=True,
-            timeout=300,
-        )
-        if ff.returncode != 0:
-            raise RuntimeError(f"ffmpeg failed: {(ff.stderr or '')[:500]}")
-        audio_path = wav
+            return text
+    return ""
 
-    return title, description, transcript, audio_path, thumb, comments_text
 
+def _deadline_hook(
+    deadline: float, cancel: Optional[threading.Event] = None
+) -> Callable[[dict], None]:
+    def hook(_status: dict) -> None:
+        if cancel is not None and cancel.is_set():
+            raise yt_dlp.utils.DownloadCancelled("audio no longer needed")
+        if time.monotonic() > deadline:
+            raise yt_dlp.utils.DownloadCancelled("audio download exceeded YTDLP_AUDIO_TIMEOUT")
 
-def import_from_video(url: str, work_dir: Path, on_step: Callable[[str], None]) -> dict:
-    on_step("fetching")
-    job_dir = work_dir / re.sub(r"[^a-zA-Z0-9_-]+", "_", url)[:80]
-    if job_dir.exists():
-        for p in job_dir.glob("*"):
+    return hook
+
+
+def _audio_codec() -> tuple[list[str], str]:
+    """ffmpeg output args + upload filename for GROQ_AUDIO_CODEC (opus default, or flac)."""
+    if (os.environ.get("GROQ_AUDIO_CODEC") or "opus").strip().lower() == "flac":
+        return ["-c:a", "flac", "-f", "flac"], "audio.flac"
+    return ["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"], "audio.ogg"
+
+
+def _encode_for_groq(
+    source: str,
+    timeout: float,
+    headers: Optional[dict[str, str]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> tuple[bytes, str]:
+    """One ffmpeg pass: source (URL or file) → 16 kHz mono speech codec, returned in memory.
+
+    ffmpeg is killed on timeout or as soon as cancel is set.
+    """
+    codec_args, filename = _audio_codec()
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin"]
+    if headers:
+        cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    cmd += ["-i", source, "-vn", "-ac", "1", "-ar", "16000", *codec_args, "pipe:1"]
+    deadline = time.monotonic() + timeout
+    with tracing.span("ffmpeg", source="url" if headers is not None else "file") as span:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        while True:
             try:
-                p.unlink()
-            except OSError:
-                pass
-    job_dir.mkdir(parents=True, exist_ok=True)
+                out, err = proc.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if (cancel is not None and cancel.is_set()) or time.monotonic() > deadline:
+                    proc.kill()
+                    proc.communicate()
+                    raise
+        if proc.returncode != 0 or not out:
+            raise RuntimeError(f"ffmpeg failed: {(err or b'').decode('utf-8', 'replace')[:500]}")
+        span.set(bytes=len(out))
+    return out, filename
+
 
-    title, description, transcript, audio_path, thumb, comments = _download(url, job_dir)
+def _stream_audio(
+    ydl: yt_dlp.YoutubeDL,
+    info: dict[str, Any],
+    timeout: float,
+    cancel: Optional[threading.Event] = None,
+) -> Optional[tuple[bytes, str]]:
+    """Pipe the resolved audio format URL straight into ffmpeg; None if not streamable."""
+    media_url = info.get("url")
+    if not media_url or info.get("protocol") not in _STREAMABLE_PROTOCOLS:
+        return None
+    headers = dict(info.get("http_headers") or {})
+    cookie = ydl.cookiejar.get_cookie_header(media_url)
+    if cookie:
+        headers["Cookie"] = cookie
+    try:
+        return _encode_for_groq(media_url, timeout, headers, cancel)
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        if cancel is not None and cancel.is_set():
+            raise
+        logger.warning("Streaming audio via ffmpeg failed (%s); falling back to download", e)
+        return None
 
-    if not transcript and audio_path:
-        on_step("transcribing")
-        transcript = groq_client.transcribe_audio(audio_path)
-        if not transcript:
-            raise RuntimeError("Groq Whisper returned empty transcript")
 
-    if not transcript and not description and not comments:
+def _download_audio(
+    ydl: yt_dlp.YoutubeDL,
+    info: dict[str, Any],
+    work_dir: Path,
+    timeout: float,
+    cancel: Optional[threading.Event] = None,
+) -> tuple[bytes, str, int]:
+    """Fallback for fragmented formats: yt-dlp writes the raw stream, ffmpeg encodes it once.
+
+    timeout covers download and encode together.
+    """
+    deadline = time.monotonic() + timeout
+    ydl.add_progress_hook(_deadline_hook(deadline, cancel))
+    try:
+        ydl.process_ie_result(info, download=True)
+    except (yt_dlp.utils.DownloadError, yt_dlp.utils.DownloadCancelled) as e:
         raise RuntimeError(
-            "No captions, transcript, description, or comments available. "
-            "Set YTDLP_COOKIES for YouTube bot checks, or use a video with captions."
-        )
+            "Failed to get captions or audio. For YouTube from cloud IPs, "
+            f"export cookies to YTDLP_COOKIES. Detail: {str(e)[:1500]}"
+        ) from e
+    candidates = list(work_dir.glob("audio.*"))
+    if not candidates:
+        raise RuntimeError("yt-dlp did not produce an audio file")
+    disk_bytes = candidates[0].stat().st_size
+    try:
+        remaining = max(0.0, deadline - time.monotonic())
+        audio, filename = _encode_for_groq(str(candidates[0]), remaining, cancel=cancel)
+    finally:
+        candidates[0].unlink(missing_ok=True)
+    return audio, filename, disk_bytes
+
+
+def _metadata(ydl: yt_dlp.YoutubeDL, url: str) -> Tuple[dict[str, Any], str, str, str, str, str]:
+    """
+    Returns info, title, description, transcript (from subtitles), thumbnail_url, comments_text.
+
+    The extractor's comment fetcher (__post_extractor) is detached before processing,
+    so comments, often the slowest part of the metadata call, are only fetched when the
+    description and subtitles have no ingredient list (VIDEO_COMMENTS=adaptive).
+    """
+    logger.info("yt-dlp metadata/subs: %s", url)
+    started = time.monotonic()
+    with tracing.span("ytdlp.metadata") as span:
+        try:
+            raw = ydl.extract_info(url, download=False, process=False)
+            fetch_comments = raw.pop("__post_extractor", None)
+            info = ydl.process_ie_result(raw, download=False)
+        except yt_dlp.utils.DownloadError as e:
+            raise RuntimeError(
+                "Failed to get captions or audio. For YouTube from cloud IPs, "
+                f"export cookies to YTDLP_COOKIES. Detail: {str(e)[:1500]}"
+            ) from e
+        description = info.get("description") or ""
+        transcript = _subtitles_from_info(ydl, info)
+        span.set(extractor=info.get("extractor_key") or "", subtitles=bool(transcript))
+    metadata_s = time.monotonic() - started
 
-    on_step("extracting")
-    result = nvidia_client.extract_recipe_from_video(
-        title, description, transcript, comments=comments
+    comments = info.get("comments") or []
+    mode = _comments_mode()
+    wanted = mode == "always" or (
+        mode == "adaptive" and not _looks_like_ingredients(f"{description}\n{transcript}")
     )
+    if fetch_comments and wanted:
+        with tracing.span("ytdlp.comments") as span:
+            try:
+                comments = (fetch_comments() or {}).get("comments") or []
+            except Exception as e:
+                logger.warning("comment fetch failed: %s", e)
+            span.set(count=len(comments))
+    logger.info(
+        "metadata_s=%.1f comments=%s count=%d comments_s=%.1f",
+        metadata_s,
+        mode if wanted else "skipped",
+        len(comments),
+        time.monotonic() - started - metadata_s,
+    )
+    return (
+        info,
+        info.get("title") or "",
+        description,
+        transcript,
+        info.get("thumbnail") or "",
+        _comments_from_same_user(comments),
+    )
+
+
+def _audio(
+    ydl: yt_dlp.YoutubeDL,
+    info: dict[str, Any],
+    work_dir: Path,
+    cancel: Optional[threading.Event] = None,
+) -> tuple[bytes, str, float]:
+    """(encoded bytes, upload filename, duration seconds or 0) for Whisper from the resolved formats."""
+    timeout = float(os.environ.get("YTDLP_AUDIO_TIMEOUT", "600"))
+    started = time.monotonic()
+    disk_bytes = 0
+    mode = "stream"
+    logger.info("audio stream → ffmpeg: %s", info.get("webpage_url") or info.get("id"))
+    with tracing.span("audio") as span:
+        streamed = _stream_audio(ydl, info, timeout, cancel)
+        if streamed is None:
+            mode = "download"
+            # A stream that stalled has already spent part of the budget; the fallback gets the rest
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                raise RuntimeError("audio exceeded YTDLP_AUDIO_TIMEOUT before the download fallback")
+            logger.info(
+                "yt-dlp audio download: %s remaining_s=%.0f",
+                info.get("webpage_url") or info.get("id"),
+                remaining,
+            )
+            data, filename, disk_bytes = _download_audio(ydl, info, work_dir, remaining, cancel)
+        else:
+            data, filename = streamed
+        span.set(mode=mode, uploadBytes=len(data), diskBytes=disk_bytes)
+    metrics.fetched("audio", len(data))
+    logger.info(
+        "audio mode=%s format=%s disk_bytes=%d upload_bytes=%d encode_s=%.1f",
+        mode,
+        info.get("format_id"),
+        disk_bytes,
+        len(data),
+        time.monotonic() - started,
+    )
+    return data, filename, float(info.get("duration") or 0)
+
+
+def _transcribe(
+    data: bytes, filename: str, duration: float, cancel: Optional[threading.Event] = None
+) -> str:
+    """Whisper in one request, or split on silence and transcribe chunks in parallel when long."""
+    max_seconds = float(os.environ.get("GROQ_CHUNK_SECONDS", "600"))
+    max_bytes = int(os.environ.get("GROQ_MAX_UPLOAD_BYTES", str(24 * 1024 * 1024)))
+    if max_seconds <= 0 or (duration <= max_seconds and len(data) <= max_bytes):
+        return groq_client.transcribe_audio(data, filename=filename)
+    chunks = audio_chunks.split(
+        data,
+        "flac" if filename.endswith(".flac") else "ogg",
+        duration=duration,
+        max_seconds=max_seconds,
+        overlap_seconds=float(os.environ.get("GROQ_CHUNK_OVERLAP_SECONDS", "2")),
+    )
+    if len(chunks) == 1:
+        return groq_client.transcribe_audio(chunks[0], filename=filename)
+    return groq_client.transcribe_chunks(chunks, filename=filename, cancel=cancel)
+
+
+def _audio_transcript(
+    ydl: yt_dlp.YoutubeDL,
+    info: dict[str, Any],
+    work_dir: Path,
+    cancel: Optional[threading.Event] = None,
+) -> str:
+    started = time.monotonic()
+    data, filename, duration = _audio(ydl, info, work_dir, cancel)
+    # The speculative result may have been accepted while encoding; don't upload (and pay) then
+    if cancel is not None and cancel.is_set():
+        return ""
+    with tracing.span("transcribe", uploadBytes=len(data), durationS=duration):
+        transcript = _transcribe(data, filename, duration, cancel)
+    logger.info(
+        "transcription upload_bytes=%d audio_to_text_s=%.1f", len(data), time.monotonic() - started
+    )
+    if not transcript:
+        raise RuntimeError("Groq Whisper returned empty transcript")
+    return transcript
+
+
+def _should_speculate(description: str, comments: str) -> bool:
+    if (os.environ.get("VIDEO_SPECULATIVE_EXTRACT") or "1").strip().lower() in ("0", "false", "off"):
+        return False
+    min_chars = int(os.environ.get("VIDEO_SPECULATIVE_MIN_CHARS", "80"))
+    return len(description.strip()) + len(comments.strip()) >= min_chars
+
+
+def _settle_audio(pending: Future) -> None:
+    """Wait (bounded) for cancelled background audio work and log how it ended."""
+    wait_s = float(os.environ.get("VIDEO_SPECULATIVE_CANCEL_WAIT_SECONDS", "15"))
+    try:
+        pending.result(timeout=wait_s)
+        logger.info("speculative audio finished before cancellation took effect")
+    except FutureTimeout:
+        logger.warning("speculative audio still running %.0fs after cancel; leaving it", wait_s)
+    except Exception as e:
+        logger.info("speculative audio stopped: %s", str(e)[:300])
+
+
+def _fetch_sources(
+    url: str, job_scratch: scratch.JobScratch, on_step: Callable[[str], None]
+) -> Tuple[str, str, str, str, str, Optional[dict]]:
+    """
+    Returns title, description, transcript, thumbnail_url, comments_text, early_result.
+
+    Without subtitles, audio download + Whisper run in a background thread while the
+    recipe is extracted from title/description/comments alone. If that speculative
+    result passes nvidia_client.is_complete_recipe it is returned as early_result and
+    the audio work is cancelled (ffmpeg killed, yt-dlp download aborted, no Groq upload
+    started) and waited for up to VIDEO_SPECULATIVE_CANCEL_WAIT_SECONDS before the session
+    and scratch dir close; otherwise the transcript is awaited and early_result is None.
+
+    yt-dlp and ffmpeg stop on job_scratch.cancel, which the scratch watcher sets when a
+    byte quota is exceeded and which is also set here once the audio is not needed.
+    """
+    job_dir = job_scratch.path
+    cancel = job_scratch.cancel
+    with yt_dlp.YoutubeDL(_ydl_params(job_dir)) as ydl:
+        info, title, description, transcript, thumb, comments = _metadata(ydl, url)
+        if transcript:
+            return title, description, transcript, thumb, comments, None
+        if not _should_speculate(description, comments):
+            on_step("transcribing")
+            try:
+                transcript = _audio_transcript(ydl, info, job_dir, cancel)
+            except Exception:
+                job_scratch.raise_if_exceeded()
+                raise
+            job_scratch.raise_if_exceeded()
+            return title, description, transcript, thumb, comments, None
+
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
+        # Copy the context so Groq usage is still recorded on this job's collector
+        pending = pool.submit(
+            contextvars.copy_context().run, _audio_transcript, ydl, info, job_dir, cancel
+        )
+        pool.shutdown(wait=False)
+        awaited = False
+        try:
+            started = time.monotonic()
+            on_step("extracting")
+            with tracing.span("extract.speculative") as span:
+                try:
+                    guess = nvidia_client.extract_recipe_from_video(title, description, "", comments=comments)
+                except Exception as e:
+                    logger.warning("Speculative extraction failed (%s); waiting for transcript", e)
+                    guess = None
+                accepted = guess is not None and nvidia_client.is_complete_recipe(guess)
+                span.set(accepted=accepted)
+            if accepted:
+                logger.info(
+                    "speculative extraction accepted spec_s=%.1f audio_done=%s",
+                    time.monotonic() - started,
+                    pending.done(),
+                )
+                return title, description, "", thumb, comments, guess
+            logger.info("speculative extraction rejected spec_s=%.1f", time.monotonic() - started)
+            on_step("transcribing")
+            awaited = True
+            try:
+                transcript = pending.result()
+            except Exception:
+                job_scratch.raise_if_exceeded()
+                raise
+            job_scratch.raise_if_exceeded()
+            return title, description, transcript, thumb, comments, None
+        finally:
+            if not awaited:
+                # Accepted (or on_step raised): stop the audio and let it finish before the
+                # yt-dlp session and scratch dir it uses are torn down
+                cancel.set()
+                _settle_audio(pending)
+
+
+def import_from_video(url: str, work_dir: Path, on_step: Callable[[str], None]) -> dict:
+    on_step("fetching")
+    key = video_cache.video_key(url) if video_cache.enabled() else None
+    with tracing.span("video.cache") as span:
+        cached = video_cache.get(key) if key else None
+        span.set(hit=bool(cached))
+    result: Optional[dict] = None
+    if cached:
+        logger.info("video cache hit %s:%s", *key)
+        title, description, transcript = cached["title"], cached["description"], cached["transcript"]
+        thumb, comments = cached["thumbnail"], cached["comments"]
+    else:
+        started = time.monotonic()
+        with scratch.job_scratch(work_dir, label=key[1] if key else "video") as job_scratch:
+            title, description, transcript, thumb, comments, result = _fetch_sources(
+                url, job_scratch, on_step
+            )
+        logger.info("video sources ready end_to_end_s=%.1f", time.monotonic() - started)
+
+        if key and (transcript or description):
+            video_cache.put(
+                key,
+                title=title,
+                description=description,
+                transcript=transcript,
+                thumbnail=thumb,
+                comments=comments,
+            )
+
+    if result is None:
+        if not transcript and not description and not comments:
+            raise RuntimeError(
+                "No captions, transcript, description, or comments available. "
+                "Set YTDLP_COOKIES for YouTube bot checks, or use a video with captions."
+            )
+
+        on_step("extracting")
+        budget = int(os.environ.get("TRANSCRIPT_TOKEN_BUDGET", "6000"))
+        with tracing.span("extract"):
+            result = nvidia_client.extract_recipe_from_video(
+                title, description, transcripts.fit_budget(transcript, budget), comments=comments
+            )
     if thumb and not result.get("imageUrl"):
         result["imageUrl"] = thumb
     return result
@@ -1,20 +1,33 @@
 #!/usr/bin/env python3
-"""Local debug poller: claim ImportJob rows from Supabase and process url/video imports.
-Production uses Cloud Run Jobs (job_main.py), not this loop.
+"""Poller: claim ImportJob rows from Supabase and process url/video imports.
+Production uses Cloud Run Jobs (job_main.py). One poller can serve several schemas
+(IMPORT_SCHEMAS) with weighted fair scheduling and per-schema concurrency caps.
 """
 from __future__ import annotations
 
+import json
 import logging
 import os
 import socket
 import sys
+import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
 
 from dotenv import load_dotenv
 
 import db
+import job_profile
+import llm_usage
+import metrics
+import nvidia_client
+import retention
+import schema_queues
+import tracing
 import url_import
 import video_import
 
@@ -32,8 +45,10 @@ def env_int(name: str, default: int) -> int:
         return default
 
 
-def process_job(job: dict) -> None:
+def process_job(job: dict) -> bool:
+    """Run one claimed job to complete/fail in the schema it was claimed from; True if completed."""
     job_id = job["id"]
+    schema = job.get("schema")
     url = job["url"]
     kind = (job.get("kind") or job.get("aiImportKind") or "url").lower()
     lease = env_int("LEASE_SECONDS", 900)
@@ -41,21 +56,57 @@ def process_job(job: dict) -> None:
 
     def on_step(step: str) -> None:
         logger.info("job %s step=%s", job_id, step)
-        db.update_step(job_id, step, renew_lease_seconds=lease)
+        held = db.update_step(job_id, step, renew_lease_seconds=lease, schema=schema, claimed_by=job.get("claimedBy"))
+        metrics.lease_renewal(held)
+        if not held:
+            logger.warning("job %s: lease lost to another worker at step=%s", job_id, step)
 
+    usage = llm_usage.begin(job_id)
     try:
-        if kind == "video":
-            result = video_import.import_from_video(url, work_dir, on_step)
-        else:
-            result = url_import.import_from_url(url, on_step)
+        with job_profile.profiled(job_id), tracing.job(job_id, kind=kind, host=urlparse(url).hostname or ""):
+            if kind == "video":
+                result = video_import.import_from_video(url, work_dir, on_step)
+            else:
+                result = url_import.import_from_url(url, on_step)
         if not result.get("title") and not result.get("ingredients"):
             raise RuntimeError("Extraction returned empty recipe")
-        db.complete_job(job_id, result)
+        db.complete_job(job_id, result, llm_usage.job_metrics(job_id, url, usage), schema=schema)
         logger.info("job %s completed title=%r", job_id, (result.get("title") or "")[:60])
+        logger.info("NVIDIA tier stats (process): %s", nvidia_client.tier_stats())
+        logger.info("NVIDIA JSON parse stats (process): %s", nvidia_client.parse_stats())
+        return True
     except Exception as e:
         logger.error("job %s failed: %s", job_id, e)
         logger.debug(traceback.format_exc())
-        db.fail_job(job_id, str(e))
+        db.fail_job(job_id, str(e), llm_usage.job_metrics(job_id, url, usage), schema=schema)
+        return False
+
+
+def run_claimed(job: dict, queue: schema_queues.SchemaQueue, scheduler: schema_queues.SchemaScheduler) -> None:
+    started = time.monotonic()
+    ok = False
+    outcome = "error"
+    metrics.job_started(queue.name)
+    try:
+        ok = process_job(job)
+        outcome = "completed" if ok else "failed"
+    except Exception:
+        logger.exception("job %s: unhandled error", job["id"])
+    finally:
+        kind = (job.get("kind") or job.get("aiImportKind") or "url").lower()
+        metrics.job_finished(queue.name, kind, outcome, time.monotonic() - started)
+        # brief pause so RAM can settle between yt-dlp jobs
+        time.sleep(2)
+        scheduler.finished(queue, ok, time.monotonic() - started)
+
+
+def run_retention(schemas: list[str]) -> None:
+    """Archive old jobs in each schema; runs on its own thread so the poll loop keeps claiming."""
+    for schema in schemas:
+        try:
+            retention.run_once(schema=schema)
+        except Exception:
+            logger.exception("retention %s failed", schema)
 
 
 def main() -> int:
@@ -69,25 +120,80 @@ def main() -> int:
     worker_id = os.environ.get("WORKER_ID") or socket.gethostname()
     lease = env_int("LEASE_SECONDS", 900)
     idle = env_int("POLL_IDLE_SECONDS", 12)
-    logger.info("Starting import poller id=%s lease=%ss idle=%ss", worker_id, lease, idle)
-
+    concurrency = max(1, env_int("WORKER_CONCURRENCY", 1))
+    retention_every = env_int("RETENTION_INTERVAL_SECONDS", 0)
+    stats_every = env_int("SCHEMA_STATS_SECONDS", 300)
+    metrics_port = env_int("METRICS_PORT", 0)
+    try:
+        queues = schema_queues.parse(os.environ.get("IMPORT_SCHEMAS") or "", db.default_schema())
+    except ValueError as e:
+        logger.error("%s", e)
+        return 1
+    if metrics_port:
+        metrics.enable(metrics_port)
+    scheduler = schema_queues.SchemaScheduler(queues, idle)
+    logger.info(
+        "Starting import poller id=%s lease=%ss idle=%ss concurrency=%d schemas=%s",
+        worker_id,
+        lease,
+        idle,
+        concurrency,
+        ", ".join(f"{q.name}(w={q.weight:g}, max={q.max_in_flight or '-'})" for q in scheduler.queues),
+    )
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+    last_retention = 0.0
+    retention_thread: Optional[threading.Thread] = None
+    last_stats = time.monotonic()
     while True:
         try:
-            job = db.claim_next_job(worker_id, lease)
+            if time.monotonic() - last_stats >= stats_every:
+                last_stats = time.monotonic()
+                logger.info("schema stats: %s", json.dumps(scheduler.snapshot()))
+            if scheduler.in_flight() >= concurrency:
+                scheduler.wait(until_finished=True)
+                continue
+            job = None
+            for queue in scheduler.candidates():
+                claim_started = time.monotonic()
+                job = db.claim_next_job(worker_id, lease, schema=queue.name)
+                metrics.claim(queue.name, job is not None, time.monotonic() - claim_started)
+                if job:
+                    scheduler.claimed(queue)
+                    break
+                scheduler.empty(queue)
             if not job:
-                time.sleep(idle)
+                # Start archiving when every queue is empty; it runs on a background thread
+                # (one pass at a time) so claims continue as soon as new imports arrive
+                if (
+                    not scheduler.in_flight()
+                    and retention_every
+                    and time.monotonic() - last_retention >= retention_every
+                    and (retention_thread is None or not retention_thread.is_alive())
+                ):
+                    last_retention = time.monotonic()
+                    retention_thread = threading.Thread(
+                        target=run_retention,
+                        args=([q.name for q in scheduler.queues],),
+                        name="retention",
+                        daemon=True,
+                    )
+                    retention_thread.start()
+                idle_started = time.monotonic()
+                scheduler.wait()
+                metrics.idle(time.monotonic() - idle_started)
                 continue
             logger.info(
-                "Claimed job %s kind=%s url=%s",
+                "Claimed job %s schema=%s kind=%s url=%s",
                 job["id"],
+                queue.name,
                 job.get("kind"),
                 (job.get("url") or "")[:80],
             )
-            process_job(job)
-            # brief pause so RAM can settle between Playwright/yt-dlp jobs
-            time.sleep(2)
+            pool.submit(run_claimed, job, queue, scheduler)
         except KeyboardInterrupt:
             logger.info("Shutting down")
+            pool.shutdown(wait=True)
             return 0
         except Exception:
             logger.exception("Loop error")